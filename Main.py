@@ -1,7 +1,23 @@
 # Main.py  —  Point d'entrée du projet
+#
+#   python Main.py                 → interface Tkinter
+#   python Main.py batch ARGS...   → traitement hors ligne (voir batchmode.py)
+#   python Main.py export ARGS...  → export CSV / XLSX / Parquet (voir exporter.py)
+#   python Main.py serve ARGS...   → service HTTP pour postes distants (voir server.py)
 
-from faceapp import App
+import sys
 
 if __name__ == "__main__":
-    app = App()
-    app.mainloop()
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from batchmode import main
+        main(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "export":
+        from exporter import main
+        main(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from server import main
+        main(sys.argv[2:])
+    else:
+        from faceapp import App
+        app = App()
+        app.mainloop()
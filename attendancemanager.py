@@ -1,20 +1,42 @@
 # attendancemanager.py
 
 import datetime
+import threading
 from student import Student
 from attendancestatus import AttendanceStatus
 from dbmanager import DBManager
+from writebehind import WriteBehindQueue
+from events import AttendanceEvent, EventBus
+import exporter
 
 
 class AttendanceManager:
     """Orchestre la gestion de la présence des étudiants."""
 
-    def __init__(self, known_students: list[Student], db_path: str = "attendance.db"):
+    # Au-delà, la fin de session n'affiche que le nombre d'absents
+    ABSENT_REPORT_LIMIT = 50
+
+    def __init__(
+        self,
+        known_students: list[Student],
+        db_path: str = "attendance.db",
+        flush_size: int = 100,
+        flush_interval: float = 1.0,
+    ):
         self.known_students: dict[str, Student] = {s.full_name: s for s in known_students}
-        self.absent_students: list[str] = list(self.known_students.keys())
+        # Ensemble : retrait en O(1) à chaque détection, même pour 20 000 inscrits
+        self.absent_students: set[str] = set(self.known_students)
         self.db = DBManager(db_path)
-        # Callback optionnel pour notifier l'interface (ex : Tkinter)
-        self.on_update = None
+        # Écriture différée : seules les lignes modifiées partent en base, par lots
+        self.writer = WriteBehindQueue(self.db, flush_size, flush_interval, self._on_flush)
+        # known_students est remplacé (copy-on-write), jamais modifié en place ;
+        # absent_students n'est modifié que sous ce verrou.
+        self._roster_lock = threading.Lock()
+        # Plusieurs caméras peuvent signaler le même étudiant en même temps
+        self._presence_lock = threading.Lock()
+        # Changements de présence diffusés une fois écrits en base
+        # (interface, exports...) : events.subscribe(callback, debounce=...)
+        self.events = EventBus()
 
     # ------------------------------------------------------------------
     # Présence en temps réel
@@ -22,50 +44,106 @@ class AttendanceManager:
     def process_presence(self, name: str, entry_time: str):
         """Marque un étudiant comme présent s'il ne l'est pas déjà."""
         student = self.known_students.get(name)
-        if student and not student.is_present():
+        if not student or student.is_present():
+            return
+        with self._presence_lock:
+            if student.is_present():
+                return
             student.mark_present(entry_time)
-            if name in self.absent_students:
-                self.absent_students.remove(name)
+            with self._roster_lock:
+                self.absent_students.discard(name)
             print(f"✅ {student.prenom} {student.nom} authentifié à {entry_time}")
-            self._build_and_save()
-            if self.on_update:
-                self.on_update()
-
-    def process_absences(self):
-        """Marque les étudiants non détectés comme absents en fin de session."""
-        absent_time = datetime.datetime.now().strftime("%Y-%m-%d 23:00:00")
-        for name in list(self.absent_students):
-            student = self.known_students[name]
-            student.mark_present(absent_time)
-            print(f"❌ {student.prenom} {student.nom} marqué absent")
-        self._build_and_save()
-        if self.on_update:
-            self.on_update()
+            self._build_and_save([student])
+
+    def process_absences(self, date: str | None = None):
+        """
+        Marque les étudiants non détectés comme absents en fin de session.
+        `date` (YYYY-MM-DD) : jour de la session, aujourd'hui par défaut.
+        """
+        date = date or datetime.date.today().isoformat()
+        absent_time = f"{date} 23:00:00"
+        with self._presence_lock:
+            with self._roster_lock:
+                names, self.absent_students = self.absent_students, set()
+            absents = [self.known_students[n] for n in names if n in self.known_students]
+            # Une détection tardive ne doit plus changer l'état de la journée
+            for student in absents:
+                student.mark_present(absent_time)
+            # Les présences en file passent d'abord : elles ne sont jamais écrasées
+            self.writer.flush()
+            # Une seule transaction pour toute la liste, sans passer par la file
+            rows = self.db.mark_absent([(s.prenom, s.nom) for s in absents], date)
+
+        if len(rows) <= self.ABSENT_REPORT_LIMIT:
+            for prenom, nom, *_ in rows:
+                print(f"❌ {prenom} {nom} marqué absent")
+        print(f"❌ {len(rows)} étudiant(s) marqué(s) absent(s) le {date}")
+        self.events.publish([AttendanceEvent.from_row(row) for row in rows])
+
+    def start_day(self, date: str):
+        """
+        Repart d'une journée vierge pour `date` (YYYY-MM-DD) : tous les étudiants
+        redeviennent absents, sauf ceux qui ont déjà une ligne ce jour-là en base
+        (application, autre poste, traitement hors ligne), qui ne sont plus modifiés.
+        """
+        self.writer.flush()
+        recorded = {(r["prenom"], r["nom"]) for r in self.db.get_by_date(date)}
+        with self._presence_lock:
+            with self._roster_lock:
+                absent = set()
+                for name, student in self.known_students.items():
+                    if (student.prenom, student.nom) in recorded:
+                        student.mark_present(f"{date} 00:00:00")
+                    else:
+                        student.reset()
+                        absent.add(name)
+                self.absent_students = absent
 
     # ------------------------------------------------------------------
-    # Construction + sauvegarde
+    # Mise à jour de la liste des étudiants en cours de session
     # ------------------------------------------------------------------
-    def _build_and_save(self):
-        """Calcule les statuts de tous les étudiants présents et les sauvegarde."""
-        student_library = []
-        now = datetime.datetime.now().strftime("%H:%M:%S")
+    def add_student(self, name: str) -> Student:
+        """Ajoute un étudiant à la liste (absent tant qu'il n'est pas détecté)."""
+        with self._roster_lock:
+            student = self.known_students.get(name)
+            if student is not None:
+                return student
+            student = Student(name)
+            self.known_students = {**self.known_students, name: student}
+            self.absent_students.add(name)
+        print(f"➕ {student.prenom} {student.nom} ajouté à la liste")
+        return student
 
-        for student in self.known_students.values():
-            if not student.is_present():
-                continue
+    def remove_student(self, name: str):
+        """Retire un étudiant de la liste (ses présences déjà enregistrées sont conservées)."""
+        with self._roster_lock:
+            if name not in self.known_students:
+                return
+            students = dict(self.known_students)
+            student = students.pop(name)
+            self.known_students = students
+            self.absent_students.discard(name)
+        print(f"➖ {student.prenom} {student.nom} retiré de la liste")
 
+    # ------------------------------------------------------------------
+    # Construction + sauvegarde
+    # ------------------------------------------------------------------
+    def _build_and_save(self, students: list[Student]):
+        """Calcule le statut des étudiants modifiés et les met en file d'écriture."""
+        for student in students:
             date, heure = student.entry_time.split(" ")
-
-            
             statut, temp_retard = AttendanceStatus.get_status_matin(heure)
-                
-                
-   
-            student_library.append(
-                [student.prenom, student.nom, date, statut, temp_retard]
-            )
+            self.writer.put([student.prenom, student.nom, date, statut, temp_retard])
 
-        self.db.save_all(student_library)
+    def _on_flush(self, rows: list[list]):
+        """Appelé par le thread d'écriture une fois les lignes en base."""
+        self.events.publish([AttendanceEvent.from_row(row) for row in rows])
+
+    def close(self):
+        """Écrit les présences encore en attente (à appeler à la fermeture)."""
+        self.writer.close()
+        self.events.close()
+        self.db.close()
 
     # ------------------------------------------------------------------
     # Accès aux données (pour l'interface)
@@ -76,8 +154,29 @@ class AttendanceManager:
     def get_records_by_date(self, date: str) -> list[dict]:
         return self.db.get_by_date(date)
 
+    def get_records_page(
+        self,
+        after: tuple | None = None,
+        before: tuple | None = None,
+        limit: int = 100,
+        date: str | None = None,
+    ) -> list[dict]:
+        return self.db.get_page(after, before, limit, date)
+
     def get_dates(self) -> list[str]:
         return self.db.get_dates()
 
-    def get_stats(self) -> dict:
-        return self.db.get_stats()
+    def get_stats(self, date: str | None = None, classe: str | None = None) -> dict:
+        return self.db.get_stats(date, classe)
+
+    def export(
+        self,
+        path: str,
+        fmt: str | None = None,
+        start: str | None = None,
+        end: str | None = None,
+        classe: str | None = None,
+    ) -> int:
+        """Exporte les présences enregistrées (CSV, XLSX ou Parquet, voir exporter.py)."""
+        self.writer.flush()
+        return exporter.export(self.db, path, fmt, start, end, classe)
@@ -0,0 +1,167 @@
+# batchencoder.py
+
+import threading
+import time
+from concurrent.futures import Future
+
+import dlib
+import numpy as np
+from face_recognition import api as fr_api
+
+from metrics import Histogram
+
+
+class _Request:
+    __slots__ = ("image", "shapes", "future", "submitted")
+
+    def __init__(self, image: np.ndarray, shapes, future: Future):
+        self.image = image
+        self.shapes = shapes            # dlib.full_object_detections
+        self.future = future
+        self.submitted = time.perf_counter()
+
+
+class BatchEncoder:
+    """
+    Ordonnanceur d'encodage par micro-lots, partagé entre frames et caméras.
+
+    submit(image_rgb, visages) calcule les points de repère dans le thread
+    appelant puis met la demande en attente et retourne un Future. Un thread
+    unique regroupe les demandes de toutes les sources et passe le réseau
+    dlib une fois par lot (compute_face_descriptor sur une liste d'images) :
+    le lot part dès que `max_batch` visages attendent, ou quand la plus
+    ancienne demande attend depuis `max_wait` secondes. Les encodages sont
+    identiques à ceux de face_recognition.face_encodings (même modèle de
+    points, même marge). Après close(), submit() encode directement dans le
+    thread appelant : une caméra qui termine sa frame pendant l'arrêt n'échoue pas.
+
+    Le gain dépend de la build de dlib : importante en CUDA, où le coût fixe
+    d'un appel domine ; faible sur CPU, où chaque visage coûte à peu près
+    pareil quel que soit le lot. stats() donne le débit et la latence
+    (p50/p95/p99) observés pour régler max_batch / max_wait.
+    """
+
+    def __init__(self, max_batch: int = 16, max_wait: float = 0.005, num_jitters: int = 1):
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.num_jitters = num_jitters
+        self._pending: list[_Request] = []
+        self._pending_faces = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        # Mesures
+        self.latency = Histogram()          # soumission → résultat, par demande
+        self.batch_sizes = Histogram((1, 2, 4, 8, 16, 32, 64, 128))
+        self.requests = 0
+        self.faces = 0
+        self.batches = 0
+        self._encode_time = 0.0
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="batch-encoder", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Côté appelants
+    # ------------------------------------------------------------------
+    def submit(self, rgb: np.ndarray, locations: list[tuple]) -> Future:
+        """Encodages des visages `locations` (top, right, bottom, left) de l'image RGB."""
+        future = Future()
+        if not locations:
+            future.set_result([])
+            return future
+        shapes = dlib.full_object_detections()
+        for top, right, bottom, left in locations:
+            shapes.append(fr_api.pose_predictor_5_point(rgb, dlib.rectangle(left, top, right, bottom)))
+        request = _Request(np.ascontiguousarray(rgb), shapes, future)
+        with self._cond:
+            closed = self._closed
+            if not closed:
+                self._pending.append(request)
+                self._pending_faces += len(locations)
+                self._cond.notify_all()
+        if closed:
+            vectors = fr_api.face_encoder.compute_face_descriptor(request.image, shapes, self.num_jitters)
+            future.set_result([np.array(v) for v in vectors])
+        return future
+
+    def encode(self, rgb: np.ndarray, locations: list[tuple]) -> list[np.ndarray]:
+        """Comme face_recognition.face_encodings(rgb, locations), via le lot en cours."""
+        return self.submit(rgb, locations).result()
+
+    def close(self):
+        """Encode les demandes en attente puis arrête le thread (idempotent)."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    # ------------------------------------------------------------------
+    # Thread d'encodage
+    # ------------------------------------------------------------------
+    def _take(self) -> list[_Request] | None:
+        """Attend qu'un lot soit prêt et le retire de la file (None : fermé et vide)."""
+        with self._cond:
+            while not self._pending:
+                if self._closed:
+                    return None
+                self._cond.wait()
+            deadline = self._pending[0].submitted + self.max_wait
+            while self._pending_faces < self.max_batch and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # Au moins une demande, même si elle dépasse seule max_batch visages
+            batch, faces = [], 0
+            while self._pending and (not batch or faces + len(self._pending[0].shapes) <= self.max_batch):
+                request = self._pending.pop(0)
+                batch.append(request)
+                faces += len(request.shapes)
+            self._pending_faces -= faces
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            start = time.perf_counter()
+            try:
+                descriptors = fr_api.face_encoder.compute_face_descriptor(
+                    [r.image for r in batch], [r.shapes for r in batch], self.num_jitters
+                )
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            done = time.perf_counter()
+
+            faces = 0
+            for request, vectors in zip(batch, descriptors):
+                request.future.set_result([np.array(v) for v in vectors])
+                self.latency.observe(done - request.submitted)
+                faces += len(vectors)
+            self.batch_sizes.observe(faces)
+            self.requests += len(batch)
+            self.faces += faces
+            self.batches += 1
+            self._encode_time += done - start
+
+    # ------------------------------------------------------------------
+    def stats(self) -> dict:
+        """Débit (visages/s depuis le démarrage), taille moyenne des lots et latence par demande."""
+        elapsed = time.perf_counter() - self._started
+        return {
+            "requests": self.requests,
+            "faces": self.faces,
+            "batches": self.batches,
+            "mean_batch": self.faces / self.batches if self.batches else 0.0,
+            "faces_per_s": self.faces / elapsed if elapsed else 0.0,
+            "encode_ms_per_face": 1000 * self._encode_time / self.faces if self.faces else 0.0,
+            "p50_ms": 1000 * self.latency.percentile(50),
+            "p95_ms": 1000 * self.latency.percentile(95),
+            "p99_ms": 1000 * self.latency.percentile(99),
+        }
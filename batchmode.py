@@ -0,0 +1,261 @@
+# batchmode.py  —  Traitement hors ligne de vidéos enregistrées et de dossiers de photos
+#
+#   python batchmode.py cours.mp4 --start "2025-01-15 08:00:00" --interval 2
+#   python batchmode.py captures/ --workers 4 --absences
+#   python Main.py batch ...                     (même chose)
+#
+# Sans caméra ni fenêtre : les frames échantillonnées sont reconnues par un
+# pool de processus, et les présences enregistrées par AttendanceManager avec
+# l'heure à laquelle chaque frame a été filmée (ou la photo prise).
+
+import argparse
+import collections
+import datetime
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+from PIL import Image
+
+from student import Student
+from facerecognizer import FaceRecognizer
+from attendancemanager import AttendanceManager
+from workerpool import create_pool, on_worker, recognize_item
+
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov", ".webm", ".m4v")
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Sources : (horodatage, frame ou chemin d'image) dans l'ordre chronologique
+# ─────────────────────────────────────────────────────────────────────────────
+def video_start(path: str, start: datetime.datetime | None = None) -> datetime.datetime:
+    """Début de l'enregistrement : `start` si fourni, sinon date du fichier moins sa durée."""
+    if start is not None:
+        return start
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    frames = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0.0
+    cap.release()
+    duration = frames / fps if fps > 0 else 0.0
+    return datetime.datetime.fromtimestamp(os.path.getmtime(path) - duration)
+
+
+def iter_video(path: str, start: datetime.datetime, interval: float = 1.0, every: int | None = None):
+    """
+    Frames d'une vidéo, une toutes les `interval` secondes de film (ou une sur
+    `every`). Les frames sautées sont seulement lues (grab), pas décodées.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise OSError(f"Vidéo illisible : {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    step = every or max(1, round(fps * interval))
+    index = 0
+    try:
+        while True:
+            if index % step == 0:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield start + datetime.timedelta(seconds=index / fps), frame
+            elif not cap.grab():
+                break
+            index += 1
+    finally:
+        cap.release()
+
+
+def image_time(path: str) -> datetime.datetime:
+    """Date de prise de vue (EXIF DateTimeOriginal), à défaut date du fichier."""
+    try:
+        with Image.open(path) as img:
+            exif = img.getexif()
+            taken = exif.get_ifd(0x8769).get(36867) or exif.get(306)
+        if taken:
+            return datetime.datetime.strptime(str(taken).strip(), "%Y:%m:%d %H:%M:%S")
+    except (OSError, ValueError):
+        pass
+    return datetime.datetime.fromtimestamp(os.path.getmtime(path))
+
+
+def list_images(directory: str, every: int | None = None) -> list[tuple[datetime.datetime, str]]:
+    """Photos d'un dossier, triées par date de prise de vue (une sur `every`)."""
+    paths = [
+        os.path.join(directory, f) for f in os.listdir(directory)
+        if f.lower().endswith(FaceRecognizer.IMAGE_EXTENSIONS)
+    ]
+    dated = sorted((image_time(p), p) for p in paths)
+    return dated[::every or 1]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Traitement par lots
+# ─────────────────────────────────────────────────────────────────────────────
+class BatchProcessor:
+    """
+    Reconnaissance hors ligne sur des vidéos et des dossiers de photos.
+
+    Les frames sont réparties sur `workers` processus (0 : un par cœur,
+    1 : dans ce processus) avec au plus deux frames en cours par processus,
+    et les résultats sont appliqués dans l'ordre chronologique : la première
+    apparition d'un étudiant fixe son heure d'arrivée. Chaque jour filmé a
+    son propre AttendanceManager ; avec absences=True, les étudiants non vus
+    ce jour-là sont marqués absents à la fin. Un étudiant qui a déjà une ligne
+    ce jour-là en base (application, lot précédent) n'est pas modifié.
+    """
+
+    def __init__(
+        self,
+        recognizer: FaceRecognizer,
+        db_path: str = "attendance.db",
+        workers: int = 0,
+        interval: float = 1.0,
+        every: int | None = None,
+        start: datetime.datetime | None = None,
+        absences: bool = False,
+    ):
+        self.recognizer = recognizer
+        self.db_path = db_path
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.interval = interval
+        self.every = every
+        self.start = start
+        self.absences = absences
+        self._managers: dict[str, AttendanceManager] = {}
+        self.stats = {"frames": 0, "faces": 0, "sightings": 0, "seconds": 0.0}
+
+    # ------------------------------------------------------------------
+    # Sources
+    # ------------------------------------------------------------------
+    def _sources(self, inputs: list[str]) -> list[tuple[datetime.datetime, str, object]]:
+        """(début, libellé, itérateur) par entrée, de la plus ancienne à la plus récente."""
+        sources = []
+        for path in inputs:
+            if os.path.isdir(path):
+                items = list_images(path, self.every)
+                if items:
+                    sources.append((items[0][0], path, iter(items)))
+            elif path.lower().endswith(VIDEO_EXTENSIONS):
+                start = video_start(path, self.start)
+                sources.append((start, path,
+                                iter_video(path, start, self.interval, self.every)))
+            else:
+                print(f"⚠️  Entrée ignorée (ni dossier ni vidéo) : {path}")
+        sources.sort(key=lambda s: s[0])
+        return sources
+
+    def _attendance(self, date: str) -> AttendanceManager:
+        manager = self._managers.get(date)
+        if manager is None:
+            students = [Student(n) for n in dict.fromkeys(self.recognizer.known_names)]
+            manager = AttendanceManager(students, self.db_path)
+            # Les présences déjà en base ce jour-là (application, lot précédent) priment
+            manager.start_day(date)
+            self._managers[date] = manager
+        return manager
+
+    # ------------------------------------------------------------------
+    # Exécution
+    # ------------------------------------------------------------------
+    def run(self, inputs: list[str]) -> dict:
+        sources = self._sources(inputs)
+        pool = None
+        if self.workers > 1:
+            # Démarrage des processus (chargement des modèles) hors de la mesure de débit
+            started = time.perf_counter()
+            pool = create_pool(self.recognizer, self.workers)
+            print(f"⚙️  {self.workers} processus prêts en {time.perf_counter() - started:.1f} s")
+        try:
+            for _, label, items in sources:
+                self._run_source(label, items, pool)
+        finally:
+            if pool:
+                pool.shutdown()
+            self._close()
+
+        s = self.stats
+        fps = s["frames"] / s["seconds"] if s["seconds"] else 0.0
+        print(f"\n📊 Total : {s['frames']} frame(s) en {s['seconds']:.1f} s "
+              f"({fps:.2f} frames/s), {s['faces']} visage(s), {s['sightings']} reconnu(s)")
+        return dict(s, fps=fps)
+
+    def _run_source(self, label: str, items, pool: ProcessPoolExecutor | None):
+        frames = faces = 0
+        started = time.perf_counter()
+        inflight = collections.deque()
+
+        def apply(when: datetime.datetime, result: tuple[list[str], int]):
+            nonlocal frames, faces
+            names, count = result
+            frames += 1
+            faces += count
+            stamp = when.strftime(TIME_FORMAT)
+            attendance = self._attendance(stamp[:10])
+            for name in names:
+                self.stats["sightings"] += 1
+                attendance.process_presence(name, stamp)
+
+        for when, item in items:
+            if pool is None:
+                apply(when, recognize_item(self.recognizer, item))
+                continue
+            inflight.append((when, pool.submit(on_worker, recognize_item, item)))
+            # Au plus deux frames en vol par processus : la mémoire reste bornée
+            # et les résultats sont appliqués dans l'ordre de la source
+            while len(inflight) >= 2 * self.workers:
+                when, future = inflight.popleft()
+                apply(when, future.result())
+        while inflight:
+            when, future = inflight.popleft()
+            apply(when, future.result())
+
+        elapsed = time.perf_counter() - started
+        self.stats["frames"] += frames
+        self.stats["faces"] += faces
+        self.stats["seconds"] += elapsed
+        fps = frames / elapsed if elapsed else 0.0
+        print(f"🎞️  {label} : {frames} frame(s) en {elapsed:.1f} s ({fps:.2f} frames/s), "
+              f"{faces} visage(s)")
+
+    def _close(self):
+        for date, manager in sorted(self._managers.items()):
+            if self.absences:
+                manager.process_absences(date)
+            manager.close()
+        self._managers = {}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(
+        description="Présences hors ligne à partir de vidéos et de dossiers de photos."
+    )
+    parser.add_argument("inputs", nargs="+", help="fichiers vidéo et/ou dossiers d'images")
+    parser.add_argument("--img", default="img", help="dossier des photos des étudiants")
+    parser.add_argument("--db", default="attendance.db")
+    parser.add_argument("--threshold", type=float, default=0.4)
+    parser.add_argument("--workers", type=int, default=0, help="0 = un processus par cœur")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="secondes de vidéo entre deux frames analysées")
+    parser.add_argument("--every", type=int, default=None,
+                        help="une frame (ou photo) sur N ; prioritaire sur --interval")
+    parser.add_argument("--start", default=None,
+                        help="début de la vidéo, 'YYYY-MM-DD HH:MM:SS' (défaut : date du fichier)")
+    parser.add_argument("--scale", type=float, default=1.0, help="échelle de détection")
+    parser.add_argument("--absences", action="store_true",
+                        help="marque absents les étudiants non vus, pour chaque jour traité")
+    args = parser.parse_args(argv)
+
+    start = datetime.datetime.strptime(args.start, TIME_FORMAT) if args.start else None
+    recognizer = FaceRecognizer(args.img, args.threshold, workers=args.workers,
+                                detection_scale=args.scale)
+    batch = BatchProcessor(recognizer, args.db, args.workers, args.interval,
+                           args.every, start, args.absences)
+    return batch.run(args.inputs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/bench_absences.py  —  Fin de session : absents ligne à ligne vs en bloc
+#
+#   python benchmarks/bench_absences.py --sizes 10000 100000 --present 0.8
+#
+# Pour chaque taille de liste, une session est simulée : une part `--present`
+# des étudiants est détectée (process_presence), puis la fin de session marque
+# les autres absents. Deux versions sont comparées sur des bases neuves :
+#   - ancienne : liste Python (list.remove à chaque détection), puis une
+#     ligne par absent via la file d'écriture (un upsert par ligne) ;
+#   - actuelle : ensemble (retrait en O(1)) et AttendanceManager.process_absences
+#     (une table temporaire + un seul INSERT ... SELECT, en une transaction).
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attendancemanager import AttendanceManager  # noqa: E402
+from attendancestatus import AttendanceStatus  # noqa: E402
+from student import Student  # noqa: E402
+
+DATE = "2026-01-15"
+
+
+def legacy_absences(manager: AttendanceManager, date: str):
+    """process_absences tel qu'il était : une ligne par absent, via la file."""
+    absent_time = f"{date} 23:00:00"
+    absents = []
+    for name in list(manager.absent_students):
+        student = manager.known_students[name]
+        student.mark_present(absent_time)
+        absents.append(student)
+        print(f"❌ {student.prenom} {student.nom} marqué absent")
+    for student in absents:
+        day, heure = student.entry_time.split(" ")
+        statut, temp_retard = AttendanceStatus.get_status_matin(heure)
+        manager.writer.put([student.prenom, student.nom, day, statut, temp_retard])
+    manager.writer.flush(timeout=None)
+
+
+def run(size: int, present: float, legacy: bool, tmp: str) -> dict:
+    names = [f"Prenom{i}_Nom{i}" for i in range(size)]
+    seen = random.Random(size).sample(names, int(size * present))
+    manager = AttendanceManager([Student(n) for n in names],
+                                os.path.join(tmp, f"{size}-{'old' if legacy else 'new'}.db"))
+    if legacy:
+        manager.absent_students = list(manager.absent_students)
+
+    quiet = io.StringIO()
+    with contextlib.redirect_stdout(quiet):
+        start = time.perf_counter()
+        if legacy:
+            # Ancienne liste : chaque détection retire le nom par un parcours linéaire
+            for name in seen:
+                manager.known_students[name].mark_present(f"{DATE} 06:00:00")
+                manager.absent_students.remove(name)
+                manager._build_and_save([manager.known_students[name]])
+        else:
+            for name in seen:
+                manager.process_presence(name, f"{DATE} 06:00:00")
+        manager.writer.flush(timeout=None)
+        presences = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if legacy:
+            legacy_absences(manager, DATE)
+        else:
+            manager.process_absences(DATE)
+        absences = time.perf_counter() - start
+
+    stats = manager.get_stats(DATE)
+    manager.close()
+    return {"presences": presences, "absences": absences, "absents": stats["absents"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fin de session sur de grandes listes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--present", type=float, default=0.8,
+                        help="part des étudiants détectés pendant la session")
+    args = parser.parse_args()
+
+    print(f"{'étudiants':>10}{'version':>10}{'détections s':>14}{'absents s':>12}{'absents':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            results = {}
+            for legacy in (True, False):
+                r = run(size, args.present, legacy, tmp)
+                results[legacy] = r
+                print(f"{size:>10}{'ancienne' if legacy else 'actuelle':>10}"
+                      f"{r['presences']:>14.2f}{r['absences']:>12.3f}{r['absents']:>10}")
+            old, new = results[True], results[False]
+            assert old["absents"] == new["absents"], "résultats différents"
+            print(f"{'':>10}{'gain':>10}{old['presences'] / new['presences']:>13.1f}x"
+                  f"{old['absences'] / new['absences']:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/bench_batching.py  —  Encodage direct vs micro-lots (BatchEncoder)
+#
+#   python benchmarks/bench_batching.py --cameras 4 --frames 10 --faces 2 \
+#          --configs 1:0 8:0.005 16:0.01 32:0.02
+#
+# Des caméras simulées (un thread chacune) encodent en boucle les visages
+# d'une même photo. Chaque configuration max_batch:max_wait est comparée à
+# l'appel direct face_recognition.face_encodings par frame : débit (visages/s),
+# taille moyenne des lots et latence par frame (p50 / p95 / p99). Le gain
+# attendu dépend de la build de dlib (CUDA ou CPU), indiquée en tête.
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import dlib
+import face_recognition
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batchencoder import BatchEncoder  # noqa: E402
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def run(encode, rgb, locations, cameras: int, frames: int) -> dict:
+    latencies, lock = [], threading.Lock()
+
+    def camera():
+        for _ in range(frames):
+            start = time.perf_counter()
+            encode(rgb, locations)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=camera) for _ in range(cameras)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "faces_per_s": cameras * frames * len(locations) / elapsed,
+        "p50": percentile(latencies, 50), "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encodage direct vs micro-lots")
+    parser.add_argument("--cameras", type=int, default=4)
+    parser.add_argument("--frames", type=int, default=10, help="frames par caméra")
+    parser.add_argument("--faces", type=int, default=2, help="visages par frame")
+    parser.add_argument("--configs", nargs="+", default=["1:0", "8:0.005", "16:0.01", "32:0.02"],
+                        help="max_batch:max_wait (secondes)")
+    parser.add_argument("--image", default=None, help="photo (défaut : première de img/)")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    image = args.image or os.path.join(root, "img", sorted(os.listdir(os.path.join(root, "img")))[0])
+    rgb = face_recognition.load_image_file(image)
+    found = face_recognition.face_locations(rgb)
+    if not found:
+        raise SystemExit(f"Aucun visage dans {image}")
+    locations = (found * args.faces)[:args.faces]
+
+    # Même résultat que l'appel direct
+    reference = face_recognition.face_encodings(rgb, locations)
+    encoder = BatchEncoder()
+    batched = encoder.encode(rgb, locations)
+    encoder.close()
+    gap = max(float(np.abs(a - b).max()) for a, b in zip(reference, batched))
+
+    print(f"dlib {dlib.__version__} (CUDA : {'oui' if dlib.DLIB_USE_CUDA else 'non'}), "
+          f"{args.cameras} caméra(s) × {args.frames} frame(s) × {args.faces} visage(s), "
+          f"écart max des encodages : {gap:.1e}\n")
+    print(f"{'mode':<18}{'visages/s':>10}{'lot moy.':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+
+    r = run(face_recognition.face_encodings, rgb, locations, args.cameras, args.frames)
+    print(f"{'direct':<18}{r['faces_per_s']:>10.2f}{args.faces:>10.1f}"
+          f"{r['p50'] * 1e3:>10.0f}{r['p95'] * 1e3:>10.0f}{r['p99'] * 1e3:>10.0f}")
+    for config in args.configs:
+        max_batch, max_wait = config.split(":")
+        encoder = BatchEncoder(int(max_batch), float(max_wait))
+        r = run(encoder.encode, rgb, locations, args.cameras, args.frames)
+        stats = encoder.stats()
+        encoder.close()
+        print(f"{'lots ' + config:<18}{r['faces_per_s']:>10.2f}{stats['mean_batch']:>10.1f}"
+              f"{r['p50'] * 1e3:>10.0f}{r['p95'] * 1e3:>10.0f}{r['p99'] * 1e3:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/bench_export.py  —  Débit et mémoire de l'export des présences
+#
+#   python benchmarks/bench_export.py --rows 100000 1000000 --formats csv xlsx parquet
+#
+# Pour chaque taille d'historique, exporte la base dans chaque format et
+# mesure le débit (lignes/s), puis, dans une seconde passe sous tracemalloc,
+# le pic de mémoire Python. L'export en flux doit garder un pic constant quand
+# l'historique grandit ; la ligne « get_all » montre, pour comparaison, le pic
+# d'un export CSV qui charge d'abord toute la table (DBManager.get_all).
+
+import argparse
+import csv
+import datetime
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dbmanager import DBManager  # noqa: E402
+import exporter  # noqa: E402
+
+OPTIONAL = {"xlsx": "openpyxl", "parquet": "pyarrow"}
+
+
+def build(path: str, rows: int, students: int = 2000) -> DBManager:
+    db = DBManager(path)
+    conn = db._connect()
+    # Base jetable : les compteurs de statistiques ne servent pas à l'export
+    conn.execute("DROP TRIGGER stats_presence_insert")
+    etats = ("present", "retard", "absent")
+    start = datetime.date(2000, 1, 1)
+    with conn:
+        conn.executemany(
+            "INSERT INTO students (prenom, nom, classe) VALUES (?, ?, ?)",
+            ((f"prenom{s}", f"nom{s}", f"C{s % 12}") for s in range(students)),
+        )
+        conn.executemany(
+            "INSERT INTO presences (student_id, day, etat, tempRetard) VALUES (?, ?, ?, ?)",
+            ((1 + i % students,
+              int((start + datetime.timedelta(days=i // students)).strftime("%Y%m%d")),
+              etats[i % 3], i % 30) for i in range(rows)),
+        )
+    return db
+
+
+def export_get_all(db: DBManager, path: str) -> int:
+    """Export naïf : toute la table en mémoire, puis écriture."""
+    records = db.get_all()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(records[0]) if records else [])
+        writer.writeheader()
+        writer.writerows(records)
+    return len(records)
+
+
+def measure(fn) -> tuple[float, float]:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit et mémoire de l'export des présences")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--formats", nargs="+", default=list(exporter.WRITERS),
+                        choices=list(exporter.WRITERS))
+    parser.add_argument("--chunk", type=int, default=5000)
+    parser.add_argument("--no-baseline", action="store_true", help="sans la mesure get_all")
+    args = parser.parse_args()
+
+    formats = []
+    for fmt in args.formats:
+        if fmt in OPTIONAL and importlib.util.find_spec(OPTIONAL[fmt]) is None:
+            print(f"⚠️  {fmt} ignoré : {OPTIONAL[fmt]} n'est pas installé")
+        else:
+            formats.append(fmt)
+
+    print(f"{'lignes':>10}  {'format':<10}{'s':>8}{'lignes/s':>12}{'pic Mo':>10}{'fichier Mo':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            db = build(os.path.join(tmp, f"{rows}.db"), rows)
+            cases = [(fmt, lambda fmt=fmt: exporter.export(
+                db, os.path.join(tmp, f"out.{fmt}"), chunk_size=args.chunk)) for fmt in formats]
+            if not args.no_baseline:
+                cases.append(("get_all", lambda: export_get_all(db, os.path.join(tmp, "out.get_all"))))
+            for label, fn in cases:
+                elapsed, peak = measure(fn)
+                size = os.path.getsize(os.path.join(tmp, f"out.{label}")) / 2**20
+                print(f"{rows:>10}  {label:<10}{elapsed:>8.2f}{rows / elapsed:>12.0f}"
+                      f"{peak:>10.1f}{size:>12.1f}")
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
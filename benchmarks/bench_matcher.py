@@ -0,0 +1,83 @@
+# benchmarks/bench_matcher.py  —  Rappel vs latence des moteurs de recherche
+#
+#   python benchmarks/bench_matcher.py --size 50000 --queries 500
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from matcher import ExactMatcher, IVFMatcher  # noqa: E402
+
+
+def synthetic_gallery(size: int, queries: int, seed: int = 0):
+    """Galerie d'encodages aléatoires + requêtes bruitées tirées de la galerie."""
+    rng = np.random.default_rng(seed)
+    gallery = rng.normal(0.0, 0.09, (size, 128))
+    truth = rng.choice(size, queries, replace=False)
+    probes = gallery[truth] + rng.normal(0.0, 0.02, (queries, 128))
+    return gallery, probes
+
+
+def time_queries(search, probes) -> tuple[list[int], float]:
+    found = []
+    start = time.perf_counter()
+    for q in probes:
+        found.append(search(q)[0])
+    elapsed = time.perf_counter() - start
+    return found, elapsed / len(probes) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rappel vs latence des moteurs de recherche")
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--frame", type=int, default=60, help="visages par frame (recherche par lot)")
+    args = parser.parse_args()
+
+    gallery, probes = synthetic_gallery(args.size, args.queries)
+    print(f"Galerie : {args.size} encodages — {args.queries} requêtes\n")
+
+    def brute_force(q):
+        d = np.linalg.norm(gallery - q, axis=1)
+        return int(np.argmin(d)), float(d.min())
+
+    reference, t_brute = time_queries(brute_force, probes)
+    print(f"{'moteur':<24}{'µs/requête':>12}{'rappel@1':>10}")
+    print(f"{'norm (historique)':<24}{t_brute:>12.1f}{1.0:>10.3f}")
+
+    exact = ExactMatcher(gallery)
+    found, t_exact = time_queries(exact.search, probes)
+    recall = np.mean(np.array(found) == np.array(reference))
+    print(f"{'exact':<24}{t_exact:>12.1f}{recall:>10.3f}")
+
+    # Recherche par lot : tous les visages d'une frame en un produit matriciel
+    for dtype in (np.float64, np.float32):
+        batch = ExactMatcher(gallery, dtype)
+        found, elapsed = [], 0.0
+        for start in range(0, len(probes), args.frame):
+            t0 = time.perf_counter()
+            idx, _ = batch.search_batch(probes[start:start + args.frame], k=1)
+            elapsed += time.perf_counter() - t0
+            found.extend(idx[:, 0])
+        recall = np.mean(np.array(found) == np.array(reference))
+        label = f"exact lot/{args.frame} {np.dtype(dtype).name}"
+        print(f"{label:<24}{elapsed / len(probes) * 1e6:>12.1f}{recall:>10.3f}")
+
+    start = time.perf_counter()
+    ivf = IVFMatcher(gallery, min_size=0)
+    build = time.perf_counter() - start
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        found, t_ivf = time_queries(ivf.search, probes)
+        recall = np.mean(np.array(found) == np.array(reference))
+        print(f"{f'ivf nprobe={nprobe}':<24}{t_ivf:>12.1f}{recall:>10.3f}")
+    print(f"\nConstruction IVF ({len(ivf.centroids)} groupes) : {build:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# benchmarks/bench_motiongate.py  —  Coût de la reconnaissance avec / sans MotionGate
+#
+#   python benchmarks/bench_motiongate.py --frames 60
+#   python benchmarks/bench_motiongate.py --video cours.mp4 --tracking
+#
+# Sans --video, une scène synthétique (640×480, bruit de capteur) est générée
+# en trois phases : salle vide, visage immobile, visage qui traverse l'image.
+# Chaque phase passe par VideoProcessor._recognize sans puis avec le pré-étage
+# de mouvement : temps et CPU par frame, décisions du pré-étage (ignorées /
+# zones / complètes) et frames où l'étudiant est bien annoté. Avec --video,
+# la vidéo entière forme une seule phase.
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from facerecognizer import FaceRecognizer  # noqa: E402
+from videoprocessor import VideoProcessor  # noqa: E402
+
+
+class CountingAttendance:
+    """Reçoit les présences sans base : compte seulement les appels."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def process_presence(self, name: str, entry_time: str):
+        self.calls += 1
+
+
+def synthetic_phases(face: np.ndarray, frames: int, seed: int = 0) -> dict[str, list[np.ndarray]]:
+    rng = np.random.default_rng(seed)
+    height, width = 480, 640
+    yy, xx = np.mgrid[0:height, 0:width]
+    room = np.dstack([(60 + xx // 8) % 256, (90 + yy // 6) % 256, np.full_like(xx, 120)]).astype(np.uint8)
+    scale = 200 / max(face.shape[:2])
+    face = cv2.resize(face, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    fh, fw = face.shape[:2]
+
+    def frame(x: int | None) -> np.ndarray:
+        image = room.copy()
+        if x is not None:
+            image[140:140 + fh, x:x + fw] = face
+        noise = rng.normal(0, 3, image.shape)
+        return np.clip(image + noise, 0, 255).astype(np.uint8)
+
+    return {
+        "vide": [frame(None) for _ in range(frames)],
+        "immobile": [frame(220) for _ in range(frames)],
+        "mouvement": [frame(int(i * (width - fw) / max(1, frames - 1))) for i in range(frames)],
+    }
+
+
+def video_frames(path: str, limit: int) -> dict[str, list[np.ndarray]]:
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise SystemExit(f"Vidéo illisible : {path}")
+    return {os.path.basename(path): frames}
+
+
+def run(recognizer, frames, tracking: bool, gate: dict | None, name: str | None) -> dict:
+    processor = VideoProcessor(recognizer, CountingAttendance(), tracking=tracking,
+                               url=os.devnull, motion_gate=gate)
+    seen = 0
+    wall, cpu = time.perf_counter(), time.process_time()
+    for frame in frames:
+        detections = processor._recognize(frame)
+        seen += any(n == name for n, _ in detections)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    processor.cap.release()
+    return {
+        "ms": 1000 * wall / len(frames), "cpu_ms": 1000 * cpu / len(frames), "seen": seen,
+        "gate": processor.gate.stats() if processor.gate else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconnaissance avec / sans MotionGate")
+    parser.add_argument("--frames", type=int, default=60, help="frames par phase (ou max. de la vidéo)")
+    parser.add_argument("--video", default=None, help="vidéo enregistrée (défaut : scène synthétique)")
+    parser.add_argument("--tracking", action="store_true", help="avec FaceTracker")
+    parser.add_argument("--threshold", type=int, default=25, help="sensibilité : écart de gris (0-255)")
+    parser.add_argument("--min-area", type=float, default=0.002, help="fraction minimale changée")
+    parser.add_argument("--refresh", type=float, default=10.0, help="détection forcée (s)")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    image = os.path.join(root, "img", sorted(os.listdir(os.path.join(root, "img")))[0])
+    recognizer = FaceRecognizer(os.path.join(root, "img"), cache_path=None)
+    phases = (video_frames(args.video, args.frames) if args.video
+              else synthetic_phases(cv2.imread(image), args.frames))
+    name = None
+    if not args.video:
+        # Nom attendu : celui que la reconnaissance donne au visage seul
+        found = recognizer.identify_faces(phases["immobile"][0])
+        name = found[0][0] if found else None
+
+    gate = {"threshold": args.threshold, "min_area": args.min_area, "refresh": args.refresh}
+    print(f"{'phase':<12}{'pré-étage':<11}{'ms/frame':>10}{'CPU ms':>9}"
+          f"{'ignorées':>10}{'zones':>7}{'complètes':>11}{'pré ms':>8}{'annotée':>9}")
+    for phase, frames in phases.items():
+        for label, options in (("non", None), ("oui", gate)):
+            r = run(recognizer, frames, args.tracking, options, name)
+            g = r["gate"] or {"skipped": "-", "regions": "-", "full": "-", "gate_ms": float("nan")}
+            print(f"{phase:<12}{label:<11}{r['ms']:>10.1f}{r['cpu_ms']:>9.1f}"
+                  f"{g['skipped']:>10}{g['regions']:>7}{g['full']:>11}{g['gate_ms']:>8.2f}{r['seen']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_schema.py  —  Requêtes de présence : ancien schéma texte vs schéma v2
+#
+#   python benchmarks/bench_schema.py --rows 10000000 --students 5000
+#
+# Construit une base au format historique (clés texte prenom/nom/date), mesure
+# les requêtes de DBManager telles qu'elles étaient écrites, migre la base sur
+# place puis mesure les mêmes accès sur le schéma v2 (identifiants entiers,
+# dates AAAAMMJJ, index couvrants).
+
+import argparse
+import datetime
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dbmanager import DBManager  # noqa: E402
+
+LEGACY_DDL = """
+    CREATE TABLE presences (
+        id         INTEGER PRIMARY KEY AUTOINCREMENT,
+        prenom     TEXT    NOT NULL,
+        nom        TEXT    NOT NULL,
+        date       TEXT    NOT NULL,
+        etat       TEXT,
+        tempRetard INTEGER DEFAULT 0,
+        UNIQUE(prenom, nom, date)
+    )
+"""
+
+LEGACY_QUERIES = {
+    "get_by_date": ("SELECT prenom, nom, date, etat, tempRetard FROM presences "
+                    "WHERE date = ? ORDER BY nom ASC", "date"),
+    "get_by_student": ("SELECT prenom, nom, date, etat, tempRetard FROM presences "
+                       "WHERE prenom = ? AND nom = ? ORDER BY date DESC", "student"),
+    "get_dates": ("SELECT DISTINCT date FROM presences ORDER BY date DESC", None),
+    "get_stats": ("SELECT COUNT(DISTINCT prenom || nom), "
+                  "SUM(etat = 'present'), SUM(etat = 'absent'), SUM(etat = 'retard') "
+                  "FROM presences", None),
+}
+
+
+def build_legacy(path: str, rows: int, students: int) -> tuple[str, tuple[str, str]]:
+    days = max(1, rows // students)
+    start = datetime.date(2000, 1, 1)
+    conn = sqlite3.connect(path)
+    conn.execute(LEGACY_DDL)
+    etats = ("present", "retard", "absent")
+
+    def generate():
+        for d in range(days):
+            date = (start + datetime.timedelta(days=d)).isoformat()
+            for s in range(students):
+                yield (f"prenom{s}", f"nom{s}", date, etats[(s + d) % 3], (s * d) % 30)
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO presences (prenom, nom, date, etat, tempRetard) VALUES (?, ?, ?, ?, ?)",
+            generate(),
+        )
+    conn.close()
+    middle = (start + datetime.timedelta(days=days // 2)).isoformat()
+    return middle, ("prenom7", "nom7")
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Requêtes de présence : ancien schéma vs v2")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--students", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        t0 = time.perf_counter()
+        date, (prenom, nom) = build_legacy(path, args.rows, args.students)
+        print(f"Base historique : {args.rows} lignes construites en {time.perf_counter() - t0:.1f} s")
+
+        conn = sqlite3.connect(path)
+        params = {"date": (date,), "student": (prenom, nom), None: ()}
+        legacy = {
+            name: timed(lambda sql=sql, p=params[kind]: conn.execute(sql, p).fetchall())
+            for name, (sql, kind) in LEGACY_QUERIES.items()
+        }
+        conn.close()
+
+        t0 = time.perf_counter()
+        db = DBManager(path)
+        print(f"Migration sur place : {time.perf_counter() - t0:.1f} s\n")
+        current = {
+            "get_by_date": timed(lambda: db.get_by_date(date)),
+            "get_by_student": timed(lambda: db.get_by_student(prenom, nom)),
+            "get_dates": timed(db.get_dates),
+            "get_stats": timed(db.get_stats),
+        }
+        db.close()
+
+    print(f"{'requête':<18}{'v1 ms':>12}{'v2 ms':>12}{'gain':>8}")
+    for name in current:
+        gain = legacy[name] / current[name] if current[name] else float("inf")
+        print(f"{name:<18}{legacy[name]:>12.2f}{current[name]:>12.2f}{gain:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+# benchmarks/bench_suite.py  —  Suite de mesures des chemins critiques, avec comparaison
+#
+#   python benchmarks/bench_suite.py --out bench.json
+#   python benchmarks/bench_suite.py --baseline bench.json --out new.json --fail-on-regression
+#   python benchmarks/bench_suite.py --only matcher db --quick
+#
+# Sans caméra ni réseau. Les frames sont synthétiques (photos de img/ posées
+# sur un fond 1280x720) ou lues depuis --frames (dossier d'images ou vidéo) ;
+# les galeries sont complétées par des encodages aléatoires pré-calculés
+# pour isoler la recherche. Chaque mesure est la médiane de --repeat passages
+# et le résultat est écrit en JSON ; avec --baseline, chaque mesure est
+# comparée à un fichier précédent et les écarts au-delà de --tolerance sont
+# signalés comme régressions.
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attendancemanager import AttendanceManager  # noqa: E402
+from dbmanager import DBManager  # noqa: E402
+from facerecognizer import FaceRecognizer  # noqa: E402
+from student import Student  # noqa: E402
+from videoprocessor import VideoProcessor  # noqa: E402
+
+SECTIONS = ("recognizer", "matcher", "db", "pipeline")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Mesure
+# ─────────────────────────────────────────────────────────────────────────────
+class Results:
+    """Mesures nommées (médiane, p95, unité) destinées au fichier JSON."""
+
+    def __init__(self):
+        self.metrics: dict[str, dict] = {}
+
+    def time(self, name: str, fn, repeat: int, unit: str = "ms", per: int = 1) -> float:
+        """Exécute fn `repeat` fois ; enregistre la durée par appel (divisée par `per`)."""
+        scale = {"ms": 1e3, "us": 1e6, "s": 1.0}[unit]
+        fn()    # échauffement (caches, requêtes préparées) hors mesure
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * scale / per)
+        return self.record(name, samples, unit)
+
+    def record(self, name: str, samples: list[float], unit: str) -> float:
+        samples = sorted(samples)
+        median = statistics.median(samples)
+        self.metrics[name] = {
+            "median": median,
+            "p95": samples[min(len(samples) - 1, int(0.95 * len(samples)))],
+            "unit": unit,
+            "samples": len(samples),
+        }
+        print(f"  {name:<44}{median:>12.3f} {unit}")
+        return median
+
+
+def synthetic_gallery(size: int, seed: int = 0) -> np.ndarray:
+    """Encodages aléatoires de la même échelle que ceux de dlib."""
+    return np.random.default_rng(seed).normal(0.0, 0.09, (size, 128))
+
+
+def load_frames(source: str | None, img_dir: str, count: int) -> list[np.ndarray]:
+    """Frames enregistrées (--frames), ou photos de la galerie posées sur un fond 1280x720."""
+    frames = []
+    if source and os.path.isdir(source):
+        for name in sorted(os.listdir(source))[:count]:
+            frame = cv2.imread(os.path.join(source, name))
+            if frame is not None:
+                frames.append(frame)
+    elif source:
+        cap = cv2.VideoCapture(source)
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+    else:
+        photos = [cv2.imread(os.path.join(img_dir, f)) for f in sorted(os.listdir(img_dir))
+                  if f.lower().endswith(FaceRecognizer.IMAGE_EXTENSIONS)]
+        photos = [p for p in photos if p is not None]
+        for i in range(count):
+            frame = np.full((720, 1280, 3), 40, dtype=np.uint8)
+            if photos:
+                photo = photos[i % len(photos)]
+                h = 720
+                w = min(1280, int(photo.shape[1] * h / photo.shape[0]))
+                frame[:, :w] = cv2.resize(photo, (w, h))
+            frames.append(frame)
+    if not frames:
+        raise SystemExit(f"Aucune frame lisible dans {source or img_dir}")
+    return frames
+
+
+def make_recognizer(img_dir: str, extra: int) -> FaceRecognizer:
+    """Galerie réelle de img/ complétée par `extra` encodages synthétiques."""
+    recognizer = FaceRecognizer(img_dir, cache_path=None)
+    encodings = np.vstack([recognizer.known_encodings, synthetic_gallery(extra)])
+    names = list(recognizer.known_names) + [f"synth_{i}" for i in range(extra)]
+    recognizer.set_gallery(encodings, names)
+    return recognizer
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Sections
+# ─────────────────────────────────────────────────────────────────────────────
+def bench_recognizer(results: Results, args, frames: list[np.ndarray]):
+    """identify_faces décomposé : conversion, détection, encodage, recherche."""
+    print("\n🔍 FaceRecognizer.identify_faces")
+    recognizer = make_recognizer(args.img, args.gallery)
+    steps = {"convert": [], "detect": [], "encode": [], "match": [], "total": []}
+    faces = 0
+    for _ in range(args.repeat):
+        for frame in frames:
+            t0 = time.perf_counter()
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            t1 = time.perf_counter()
+            locations = recognizer.detect_faces(rgb)
+            t2 = time.perf_counter()
+            encodings = recognizer.encode_faces(rgb, locations)
+            t3 = time.perf_counter()
+            recognizer.match_batch(encodings)
+            t4 = time.perf_counter()
+            recognizer.identify_faces(frame)
+            t5 = time.perf_counter()
+            for step, elapsed in zip(steps, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+                steps[step].append(elapsed * 1e3)
+            faces += len(locations)
+    for step, samples in steps.items():
+        results.record(f"recognizer.{step}_ms", samples, "ms")
+    results.record("recognizer.faces_per_frame", [faces / (args.repeat * len(frames))], "faces")
+
+
+def bench_matcher(results: Results, args):
+    """_best_match (une requête) et match_batch (une frame) selon la taille de la galerie."""
+    print("\n🧮 FaceRecognizer._best_match")
+    recognizer = FaceRecognizer(None, cache_path=None)
+    rng = np.random.default_rng(1)
+    for size in args.sizes:
+        gallery = synthetic_gallery(size)
+        recognizer.set_gallery(gallery, [f"s{i}" for i in range(size)])
+        probes = gallery[rng.choice(size, args.queries)] + rng.normal(0, 0.02, (args.queries, 128))
+
+        def single(probes=probes):
+            for q in probes:
+                recognizer._best_match(q)
+
+        def batch(probes=probes):
+            for start in range(0, len(probes), 16):
+                recognizer.match_batch(probes[start:start + 16])
+
+        results.time(f"matcher.best_match_us@{size}", single, args.repeat, "us", per=len(probes))
+        results.time(f"matcher.batch16_us_per_face@{size}", batch, args.repeat, "us", per=len(probes))
+
+
+def bench_db(results: Results, args):
+    """upsert, get_stats, get_page et get_by_date selon le nombre de lignes en base."""
+    print("\n🗄️  DBManager")
+    students = 500
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DBManager(os.path.join(tmp, "bench.db"))
+            days = max(1, rows // students)
+            start = datetime.date(2020, 1, 1)
+            for d in range(days):
+                date = (start + datetime.timedelta(days=d)).isoformat()
+                db.save_many([[f"p{s}", f"n{s}", date, ("present", "retard", "absent")[(s + d) % 3], 0]
+                              for s in range(min(students, rows))])
+            last = (start + datetime.timedelta(days=days - 1)).isoformat()
+            counter = iter(range(10 ** 9))
+
+            def upsert():
+                i = next(counter)
+                db.upsert(f"p{i % students}", f"n{i % students}", last, "present", 0)
+
+            results.time(f"db.upsert_ms@{rows}", upsert, max(20, args.repeat * 10))
+            results.time(f"db.get_stats_ms@{rows}", db.get_stats, max(20, args.repeat * 10))
+            results.time(f"db.get_page_ms@{rows}", lambda: db.get_page(limit=100), args.repeat * 5)
+            results.time(f"db.get_by_date_ms@{rows}", lambda: db.get_by_date(last), args.repeat * 5)
+            db.close()
+
+
+def bench_pipeline(results: Results, args, frames: list[np.ndarray]):
+    """VideoProcessor._process_frame de bout en bout (présences en base comprises)."""
+    print("\n🎥 VideoProcessor._process_frame")
+    recognizer = make_recognizer(args.img, args.gallery)
+    with tempfile.TemporaryDirectory() as tmp:
+        students = [Student(n) for n in dict.fromkeys(recognizer.known_names)]
+        attendance = AttendanceManager(students, os.path.join(tmp, "bench.db"))
+        for tracking in (False, True):
+            processor = VideoProcessor(recognizer, attendance, tracking=tracking, url=os.devnull)
+            processor.cap.release()
+
+            def run(processor=processor):
+                for frame in frames:
+                    processor._process_frame(frame.copy())
+
+            label = "tracking" if tracking else "full"
+            results.time(f"pipeline.process_frame_ms.{label}", run, args.repeat, per=len(frames))
+        attendance.close()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Comparaison à une référence
+# ─────────────────────────────────────────────────────────────────────────────
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Affiche l'écart de chaque mesure ; retourne les noms des régressions."""
+    regressions = []
+    print(f"\n{'mesure':<46}{'référence':>12}{'actuel':>12}{'écart':>9}")
+    for name, metric in current.items():
+        if metric["unit"] == "faces" or name not in baseline:
+            continue
+        before, now = baseline[name]["median"], metric["median"]
+        ratio = now / before if before else float("inf")
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  ⚠️  régression"
+            regressions.append(name)
+        elif ratio < 1 - tolerance:
+            flag = "  ✅"
+        print(f"{name:<46}{before:>12.3f}{now:>12.3f}{(ratio - 1) * 100:>+8.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de mesures des chemins critiques")
+    parser.add_argument("--only", nargs="+", choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument("--img", default="img", help="photos réelles de la galerie")
+    parser.add_argument("--frames", default=None, help="dossier d'images ou vidéo enregistrée")
+    parser.add_argument("--count", type=int, default=4, help="nombre de frames")
+    parser.add_argument("--gallery", type=int, default=1000, help="encodages synthétiques ajoutés")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="tailles réduites")
+    parser.add_argument("--out", default=None, help="fichier JSON de résultats")
+    parser.add_argument("--baseline", default=None, help="résultats JSON de référence")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="écart toléré (0.15 = 15 %%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+    if args.quick:
+        args.sizes, args.rows, args.count = [100, 10000], [10_000, 100_000], 2
+
+    results = Results()
+    frames = None
+    if {"recognizer", "pipeline"} & set(args.only):
+        frames = load_frames(args.frames, args.img, args.count)
+    if "recognizer" in args.only:
+        bench_recognizer(results, args, frames)
+    if "matcher" in args.only:
+        bench_matcher(results, args)
+    if "db" in args.only:
+        bench_db(results, args)
+    if "pipeline" in args.only:
+        bench_pipeline(results, args, frames)
+
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "args": vars(args),
+        },
+        "metrics": results.metrics,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Résultats écrits dans {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["metrics"]
+        regressions = compare(results.metrics, baseline, args.tolerance)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} régression(s) au-delà de {args.tolerance:.0%}")
+            if args.fail_on_regression:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
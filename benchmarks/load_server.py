@@ -0,0 +1,176 @@
+# benchmarks/load_server.py  —  Charge sur le service HTTP (server.py)
+#
+#   python benchmarks/load_server.py --clients 8 --seconds 20 --workers 2
+#   python benchmarks/load_server.py --url http://10.0.0.5:8765 --clients 16
+#
+# Sans --url, le service est lancé dans ce processus sur la galerie img/ et
+# une base temporaire. Des postes simulés (`--clients`) envoient en boucle une
+# même photo JPEG, ré-encodée à la taille d'une caméra de porte, pendant
+# qu'un lecteur interroge /stats et /records. Sont mesurés : frames acceptées
+# par seconde, latence des frames acceptées, refus 429 (contre-pression) et
+# latence des lectures pendant la saturation.
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attendancemanager import AttendanceManager  # noqa: E402
+from facerecognizer import FaceRecognizer  # noqa: E402
+from server import AttendanceServer  # noqa: E402
+from student import Student  # noqa: E402
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def load_jpeg(path: str, width: int) -> bytes:
+    image = cv2.imread(path)
+    if image is None:
+        raise SystemExit(f"Image illisible : {path}")
+    if image.shape[1] > width:
+        height = round(image.shape[0] * width / image.shape[1])
+        image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+    return cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes()
+
+
+class Client:
+    """Client HTTP/1.1 minimal avec connexion persistante (un poste de porte)."""
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> int:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"Content-Type: image/jpeg\r\nContent-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode("latin-1") + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length, close = 0, False
+        while (line := await self.reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+            elif name.lower() == "connection" and value.strip().lower() == "close":
+                close = True
+        await self.reader.readexactly(length)
+        if close:
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+async def door(host, port, jpeg, deadline, backoff, results, number):
+    client = Client(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status = await client.request("POST", f"/frames?camera=porte-{number}", jpeg)
+            except (ConnectionError, asyncio.IncompleteReadError, IndexError):
+                client.close()
+                results["errors"] += 1
+                continue
+            elapsed = time.perf_counter() - start
+            if status == 200:
+                results["latencies"].append(elapsed)
+            elif status == 429:
+                results["rejected"] += 1
+                await asyncio.sleep(backoff)
+            else:
+                results["errors"] += 1
+    finally:
+        client.close()
+
+
+async def reader(host, port, deadline, results):
+    client = Client(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            for path in ("/stats", "/records"):
+                start = time.perf_counter()
+                status = await client.request("GET", path)
+                if status == 200:
+                    results["reads"].append(time.perf_counter() - start)
+            await asyncio.sleep(0.05)
+    finally:
+        client.close()
+
+
+async def run_load(host, port, jpeg, clients, seconds, backoff) -> dict:
+    results = {"latencies": [], "reads": [], "rejected": 0, "errors": 0}
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    await asyncio.gather(
+        reader(host, port, deadline, results),
+        *(door(host, port, jpeg, deadline, backoff, results, n) for n in range(clients)),
+    )
+    results["seconds"] = time.perf_counter() - started
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Charge sur le service HTTP de présence")
+    parser.add_argument("--url", default=None, help="service existant (défaut : lancé ici)")
+    parser.add_argument("--clients", type=int, default=8, help="postes simulés")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=0, help="service local : 0 = un par cœur")
+    parser.add_argument("--max-pending", type=int, default=None)
+    parser.add_argument("--image", default=None, help="photo envoyée (défaut : première de img/)")
+    parser.add_argument("--width", type=int, default=640, help="largeur de la frame envoyée")
+    parser.add_argument("--backoff", type=float, default=0.05, help="pause après un 429 (s)")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    image = args.image or os.path.join(root, "img", sorted(os.listdir(os.path.join(root, "img")))[0])
+    jpeg = load_jpeg(image, args.width)
+
+    server = attendance = None
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            recognizer = FaceRecognizer(os.path.join(root, "img"), cache_path=None)
+            students = [Student(n) for n in dict.fromkeys(recognizer.known_names)]
+            attendance = AttendanceManager(students, os.path.join(tmp, "load.db"))
+            server = AttendanceServer(recognizer, attendance, port=0, workers=args.workers,
+                                      max_pending=args.max_pending).start()
+            host, port = server.host, server.port
+
+        r = asyncio.run(run_load(host, port, jpeg, args.clients, args.seconds, args.backoff))
+
+        if server is not None:
+            server.stop()
+            attendance.close()
+
+    accepted = len(r["latencies"])
+    print(f"\n{args.clients} poste(s), {r['seconds']:.1f} s, frame de {len(jpeg) / 1024:.0f} Ko")
+    print(f"  acceptées  : {accepted} ({accepted / r['seconds']:.2f} frames/s)")
+    print(f"  latence    : p50 {percentile(r['latencies'], 50) * 1e3:.0f} ms, "
+          f"p95 {percentile(r['latencies'], 95) * 1e3:.0f} ms")
+    print(f"  refusées   : {r['rejected']} (429)   erreurs : {r['errors']}")
+    print(f"  lectures   : {len(r['reads'])}, p50 {percentile(r['reads'], 50) * 1e3:.1f} ms, "
+          f"p95 {percentile(r['reads'], 95) * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
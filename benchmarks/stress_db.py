@@ -0,0 +1,95 @@
+# benchmarks/stress_db.py  —  Lecteurs concurrents vs écrivain sur DBManager
+#
+#   python benchmarks/stress_db.py --readers 4 --seconds 5
+#
+# Un thread écrit des lots de présences en continu pendant que plusieurs
+# threads relisent la table (get_all / get_stats / get_by_date). La latence
+# de l'écrivain est mesurée seul puis avec les lecteurs : en WAL, elle ne doit
+# pas augmenter sensiblement et aucune erreur "database is locked" n'apparaît
+# (l'écart restant vient du GIL partagé par les threads Python, pas de SQLite).
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dbmanager import DBManager  # noqa: E402
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def run_writer(db: DBManager, seconds: float, batch: int, errors: list) -> list[float]:
+    latencies, day = [], 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        day += 1
+        date = f"2026-{1 + day // 28 % 12:02d}-{1 + day % 28:02d}"
+        rows = [[f"p{i}", f"n{i}", date, "present", 0] for i in range(batch)]
+        start = time.perf_counter()
+        try:
+            db.save_many(rows)
+        except sqlite3.OperationalError as e:
+            errors.append(str(e))
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run_reader(db: DBManager, stop: threading.Event, counts: list, errors: list):
+    n = 0
+    while not stop.is_set():
+        try:
+            db.get_stats()
+            db.get_by_date("2026-01-02")
+            db.get_dates()
+        except sqlite3.OperationalError as e:
+            errors.append(str(e))
+        n += 1
+    counts.append(n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lecteurs concurrents vs écrivain sur DBManager")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--batch", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(os.path.join(tmp, "stress.db"))
+        errors: list[str] = []
+
+        alone = run_writer(db, args.seconds / 2, args.batch, errors)
+
+        stop, counts = threading.Event(), []
+        readers = [
+            threading.Thread(target=run_reader, args=(db, stop, counts, errors))
+            for _ in range(args.readers)
+        ]
+        for t in readers:
+            t.start()
+        loaded = run_writer(db, args.seconds, args.batch, errors)
+        stop.set()
+        for t in readers:
+            t.join()
+        db.close()
+
+    print(f"{'écrivain':<22}{'lots':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for label, lat in (("seul", alone), (f"+ {args.readers} lecteurs", loaded)):
+        print(f"{label:<22}{len(lat):>8}{percentile(lat, 50) * 1e3:>10.2f}"
+              f"{percentile(lat, 99) * 1e3:>10.2f}{max(lat) * 1e3:>10.2f}")
+    print(f"\nLectures effectuées : {sum(counts)} — erreurs 'locked' : {len(errors)}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,37 +2,326 @@
 
 import sqlite3
 import datetime
+import threading
 from typing import Optional
 
 
 class DBManager:
-    """Gère la persistance des données de présence via SQLite."""
+    """
+    Gère la persistance des données de présence via SQLite.
+
+    Chaque thread (interface Tkinter, caméra, écriture différée...) garde sa
+    propre connexion ouverte, réutilisée d'un appel à l'autre avec son cache
+    de requêtes préparées. La base est en mode WAL : les lectures ne bloquent
+    pas l'écriture, et inversement.
+    """
+
+    PRAGMAS = (
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",     # sûr en WAL, évite un fsync par transaction
+        "PRAGMA cache_size = -16000",      # 16 Mo de cache de pages
+        "PRAGMA mmap_size = 268435456",    # lecture via mmap (256 Mo max)
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA busy_timeout = 5000",
+    )
+
+    SCHEMA_VERSION = 4
+
+    # Compteurs matérialisés : day = 0 pour « toutes dates », classe = '*' pour
+    # « toutes classes » ; cle = état de présence, ou '_etudiants' (nombre
+    # d'étudiants ayant au moins une présence, tenu uniquement pour day = 0).
+    ALL_DAYS = 0
+    ALL_CLASSES = "*"
+    STUDENTS_KEY = "_etudiants"
+
+    # Les dates sont stockées en entier AAAAMMJJ et relues au format YYYY-MM-DD
+    DATE_SQL = "printf('%04d-%02d-%02d', p.day / 10000, p.day / 100 % 100, p.day % 100)"
+
+    STUDENT_SQL = "INSERT INTO students (prenom, nom) VALUES (?, ?) ON CONFLICT DO NOTHING"
+
+    UPSERT_SQL = """
+        INSERT INTO presences (student_id, day, etat, tempRetard)
+        SELECT id, ?, ?, ? FROM students WHERE prenom = ? AND nom = ?
+        ON CONFLICT(student_id, day) DO UPDATE SET
+            etat       = excluded.etat,
+            tempRetard = excluded.tempRetard
+    """
+
+    RECORD_SQL = (
+        "SELECT s.prenom, s.nom, " + DATE_SQL + " AS date, p.etat, p.tempRetard "
+        "FROM presences p JOIN students s ON s.id = p.student_id "
+    )
 
     def __init__(self, db_path: str = "attendance.db"):
         self.db_path = db_path
+        self._local = threading.local()
+        self._connections: list[tuple[threading.Thread, sqlite3.Connection]] = []
+        self._connections_lock = threading.Lock()
         self._init_db()
 
     # ------------------------------------------------------------------
     # Initialisation
     # ------------------------------------------------------------------
     def _init_db(self):
-        """Crée la table si elle n'existe pas encore."""
-        with self._connect() as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS presences (
-                    id        INTEGER PRIMARY KEY AUTOINCREMENT,
-                    prenom    TEXT    NOT NULL,
-                    nom       TEXT    NOT NULL,
-                    date      TEXT    NOT NULL,
-                    etat    TEXT,
-                    
-                    tempRetard INTEGER DEFAULT z0,
-                    UNIQUE(prenom, nom, date)
-                )
-            """)
+        """Crée le schéma, ou migre sur place une base d'une version antérieure."""
+        conn = self._connect()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= self.SCHEMA_VERSION:
+            return
+
+        legacy = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'presences'"
+        ).fetchone() is not None
+
+        # Migration atomique : tout ou rien, version comprise
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if version < 2:
+                if legacy:
+                    conn.execute("ALTER TABLE presences RENAME TO presences_v1")
+                self._create_schema(conn)
+                if legacy:
+                    self._migrate_v1(conn)
+            if version < 3:
+                self._migrate_v2(conn)
+            if version < 4:
+                self._migrate_v3(conn)
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.isolation_level = ""
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS students (
+                id      INTEGER PRIMARY KEY,
+                prenom  TEXT    NOT NULL,
+                nom     TEXT    NOT NULL,
+                UNIQUE(prenom, nom)
+            )
+        """)
+        # Clé (student_id, day) : couvre les requêtes par étudiant
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS presences (
+                student_id  INTEGER NOT NULL REFERENCES students(id),
+                day         INTEGER NOT NULL,
+                etat        TEXT,
+                tempRetard  INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (student_id, day)
+            ) WITHOUT ROWID
+        """)
+        # Index couvrant pour les requêtes par date (get_by_date, get_dates, get_all)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_presences_day
+            ON presences (day, student_id, etat, tempRetard)
+        """)
+
+    @staticmethod
+    def _migrate_v1(conn: sqlite3.Connection):
+        """Reprend les données de l'ancienne table (clés texte prenom/nom/date)."""
+        conn.execute("""
+            INSERT INTO students (prenom, nom)
+            SELECT DISTINCT prenom, nom FROM presences_v1 WHERE true
+            ON CONFLICT DO NOTHING
+        """)
+        conn.execute("""
+            INSERT INTO presences (student_id, day, etat, tempRetard)
+            SELECT s.id, CAST(replace(v.date, '-', '') AS INTEGER), v.etat,
+                   COALESCE(CAST(v.tempRetard AS INTEGER), 0)
+            FROM presences_v1 v JOIN students s ON s.prenom = v.prenom AND s.nom = v.nom
+            WHERE true
+            ON CONFLICT(student_id, day) DO UPDATE SET
+                etat       = excluded.etat,
+                tempRetard = excluded.tempRetard
+        """)
+        migrated = conn.execute("SELECT COUNT(*) FROM presences_v1").fetchone()[0]
+        conn.execute("DROP TABLE presences_v1")
+        print(f"🗄️  Base migrée vers le schéma v2 ({migrated} présence(s))")
+
+    # ------------------------------------------------------------------
+    # Statistiques matérialisées (schéma v3)
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _bump_sql(row: str, key: str, sign: int, days: str, condition: str = "true") -> str:
+        """
+        Incrémente (sign = 1) ou décrémente (sign = -1) la clé `key` des compteurs
+        de la ligne `row` (NEW ou OLD) pour chaque jour de `days`, dans la classe
+        de l'étudiant et dans '*'.
+        """
+        return f"""
+            INSERT INTO stats_counters (day, classe, cle, total)
+            SELECT d.day, c.classe, {key}, {sign}
+            FROM ({days}) d,
+                 (SELECT classe FROM students WHERE id = {row}.student_id
+                  UNION ALL SELECT '*') c
+            WHERE {condition}
+            ON CONFLICT(day, classe, cle) DO UPDATE SET total = total + excluded.total;
+        """
+
+    @classmethod
+    def _create_stats(cls, conn: sqlite3.Connection):
+        """Table des compteurs et triggers qui la tiennent à jour dans chaque transaction."""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS stats_counters (
+                day     INTEGER NOT NULL,
+                classe  TEXT    NOT NULL,
+                cle     TEXT    NOT NULL,
+                total   INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, classe, cle)
+            ) WITHOUT ROWID
+        """)
+        etat_new, etat_old = "COALESCE(NEW.etat, '')", "COALESCE(OLD.etat, '')"
+        days_new = "SELECT NEW.day AS day UNION ALL SELECT 0"
+        days_old = "SELECT OLD.day AS day UNION ALL SELECT 0"
+        students = f"'{cls.STUDENTS_KEY}'"
+
+        cls._create_insert_trigger(conn)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS stats_presence_delete AFTER DELETE ON presences
+            BEGIN
+                {cls._bump_sql("OLD", etat_old, -1, days_old)}
+                {cls._bump_sql("OLD", students, -1, "SELECT 0 AS day",
+                               "NOT EXISTS (SELECT 1 FROM presences WHERE student_id = OLD.student_id)")}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS stats_presence_update AFTER UPDATE OF etat ON presences
+            WHEN OLD.etat IS NOT NEW.etat
+            BEGIN
+                {cls._bump_sql("OLD", etat_old, -1, days_old)}
+                {cls._bump_sql("NEW", etat_new, 1, days_new)}
+            END
+        """)
+        # Les compteurs sont indexés par (étudiant, jour) : ces clés ne changent pas
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS stats_presence_rekey BEFORE UPDATE OF student_id, day ON presences
+            WHEN OLD.student_id <> NEW.student_id OR OLD.day <> NEW.day
+            BEGIN
+                SELECT RAISE(ABORT, 'student_id et day ne sont pas modifiables');
+            END
+        """)
+        # Changement de classe : l'historique de l'étudiant passe dans la nouvelle classe
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS stats_student_classe AFTER UPDATE OF classe ON students
+            WHEN OLD.classe IS NOT NEW.classe
+            BEGIN
+                INSERT INTO stats_counters (day, classe, cle, total)
+                SELECT g.day, c.classe, g.cle, c.sign * g.total
+                FROM (SELECT day, COALESCE(etat, '') AS cle, COUNT(*) AS total
+                      FROM presences WHERE student_id = NEW.id GROUP BY day, cle
+                      UNION ALL
+                      SELECT 0, COALESCE(etat, ''), COUNT(*)
+                      FROM presences WHERE student_id = NEW.id GROUP BY 2
+                      UNION ALL
+                      SELECT 0, {students}, 1
+                      WHERE EXISTS (SELECT 1 FROM presences WHERE student_id = NEW.id)) g,
+                     (SELECT OLD.classe AS classe, -1 AS sign
+                      UNION ALL SELECT NEW.classe, 1) c
+                WHERE true
+                ON CONFLICT(day, classe, cle) DO UPDATE SET total = total + excluded.total;
+            END
+        """)
+
+    @classmethod
+    def _create_insert_trigger(cls, conn: sqlite3.Connection):
+        """
+        Trigger d'insertion des compteurs. Il ne fait rien tant que `stats_bulk`
+        a une ligne : une insertion en bloc y en écrit une le temps de sa
+        transaction (invisible des autres connexions) et met les compteurs à
+        jour elle-même, par agrégat.
+        """
+        conn.execute("CREATE TABLE IF NOT EXISTS stats_bulk (active INTEGER PRIMARY KEY)")
+        days_new = "SELECT NEW.day AS day UNION ALL SELECT 0"
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS stats_presence_insert AFTER INSERT ON presences
+            WHEN NOT EXISTS (SELECT 1 FROM stats_bulk)
+            BEGIN
+                {cls._bump_sql("NEW", "COALESCE(NEW.etat, '')", 1, days_new)}
+                {cls._bump_sql("NEW", f"'{cls.STUDENTS_KEY}'", 1, "SELECT 0 AS day",
+                               "NOT EXISTS (SELECT 1 FROM presences WHERE student_id = NEW.student_id"
+                               " AND day <> NEW.day)")}
+            END
+        """)
+
+    @classmethod
+    def _migrate_v2(cls, conn: sqlite3.Connection):
+        """Ajoute la classe des étudiants et les compteurs matérialisés."""
+        columns = {r[1] for r in conn.execute("PRAGMA table_info(students)")}
+        if "classe" not in columns:
+            conn.execute("ALTER TABLE students ADD COLUMN classe TEXT NOT NULL DEFAULT ''")
+        cls._create_stats(conn)
+        cls._recompute_stats(conn)
+
+    @classmethod
+    def _migrate_v3(cls, conn: sqlite3.Connection):
+        """Trigger d'insertion suspendu par la table stats_bulk, sans DDL en cours de session."""
+        conn.execute("DROP TRIGGER IF EXISTS stats_presence_insert")
+        cls._create_insert_trigger(conn)
+
+    # Recalcul complet des compteurs à partir des présences
+    STATS_SQL = """
+        WITH base AS (
+            SELECT p.day, p.student_id, s.classe, COALESCE(p.etat, '') AS cle
+            FROM presences p JOIN students s ON s.id = p.student_id
+        )
+        SELECT day, classe, cle, COUNT(*) FROM base GROUP BY day, classe, cle
+        UNION ALL SELECT day, '*', cle, COUNT(*) FROM base GROUP BY day, cle
+        UNION ALL SELECT 0, classe, cle, COUNT(*) FROM base GROUP BY classe, cle
+        UNION ALL SELECT 0, '*', cle, COUNT(*) FROM base GROUP BY cle
+        UNION ALL SELECT 0, classe, '_etudiants', COUNT(DISTINCT student_id) FROM base GROUP BY classe
+        UNION ALL SELECT 0, '*', '_etudiants', COUNT(DISTINCT student_id) FROM base
+    """
+
+    @classmethod
+    def _recompute_stats(cls, conn: sqlite3.Connection):
+        conn.execute("DELETE FROM stats_counters")
+        conn.execute(f"INSERT INTO stats_counters (day, classe, cle, total) {cls.STATS_SQL}")
+
+    @staticmethod
+    def _day(date: str) -> int:
+        """'YYYY-MM-DD' → AAAAMMJJ."""
+        return int(date.replace("-", ""))
+
+    @staticmethod
+    def _date(day: int) -> str:
+        """AAAAMMJJ → 'YYYY-MM-DD'."""
+        return f"{day // 10000:04d}-{day // 100 % 100:02d}-{day % 100:02d}"
 
     def _connect(self) -> sqlite3.Connection:
-        return sqlite3.connect(self.db_path)
+        """Connexion persistante du thread courant (créée au premier appel)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        conn.row_factory = sqlite3.Row
+        self._local.conn = conn
+        with self._connections_lock:
+            # Les connexions des threads terminés sont fermées au passage
+            alive = []
+            for thread, other in self._connections:
+                if thread.is_alive():
+                    alive.append((thread, other))
+                else:
+                    other.close()
+            alive.append((threading.current_thread(), conn))
+            self._connections = alive
+        return conn
+
+    def close(self):
+        """Ferme toutes les connexions ouvertes."""
+        with self._connections_lock:
+            for _, conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
 
     # ------------------------------------------------------------------
     # Écriture
@@ -46,20 +335,105 @@ class DBManager:
         temp_retard: int,
     ):
         """Insère ou met à jour un enregistrement de présence."""
-        with self._connect() as conn:
-            conn.execute("""
-                INSERT INTO presences (prenom, nom, date, etat, tempRetard)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT(prenom, nom, date) DO UPDATE SET
-                    etat     = excluded.etat,
-                    tempRetard = excluded.tempRetard
-            """, (prenom, nom, date, etat, temp_retard))
+        self.save_many([[prenom, nom, date, etat, temp_retard]])
 
     def save_all(self, student_library: list[list]):
         """Sauvegarde une liste complète d'enregistrements."""
-        for row in student_library:
-            prenom, nom, date, etat, temp_retard = row
-            self.upsert(prenom, nom, date, etat, temp_retard or 0)
+        self.save_many(student_library)
+
+    def save_many(self, rows: list[list]):
+        """Insère ou met à jour plusieurs enregistrements en une seule transaction."""
+        with self._connect() as conn:
+            conn.executemany(self.STUDENT_SQL, {(r[0], r[1]) for r in rows})
+            conn.executemany(self.UPSERT_SQL, [
+                (self._day(date), etat, temp_retard or 0, prenom, nom)
+                for prenom, nom, date, etat, temp_retard in rows
+            ])
+
+    # Compteurs d'une insertion en bloc de la table temporaire `roster` (état
+    # 'absent' ; `first` = première présence de l'étudiant, tous jours confondus)
+    ABSENT_STATS_SQL = """
+        INSERT INTO stats_counters (day, classe, cle, total)
+        SELECT * FROM (
+            WITH base AS (
+                SELECT s.classe, r.first FROM temp.roster r JOIN students s ON s.id = r.student_id
+            )
+            SELECT ? AS day, classe, 'absent' AS cle, COUNT(*) AS n FROM base GROUP BY classe
+            UNION ALL SELECT ?, '*', 'absent', COUNT(*) FROM base
+            UNION ALL SELECT 0, classe, 'absent', COUNT(*) FROM base GROUP BY classe
+            UNION ALL SELECT 0, '*', 'absent', COUNT(*) FROM base
+            UNION ALL SELECT 0, classe, '_etudiants', TOTAL(first) FROM base GROUP BY classe
+            UNION ALL SELECT 0, '*', '_etudiants', TOTAL(first) FROM base
+        ) WHERE n > 0
+        ON CONFLICT(day, classe, cle) DO UPDATE SET total = total + excluded.total
+    """
+
+    def mark_absent(self, students: list[tuple[str, str]], date: str) -> list[list]:
+        """
+        Fin de session : marque absents, pour le jour `date`, les (prenom, nom)
+        qui n'y ont encore aucune présence, en une seule transaction. La liste
+        passe par une table temporaire puis un unique INSERT ... SELECT ; une
+        présence déjà enregistrée ce jour-là n'est jamais écrasée. Retourne les
+        lignes [prenom, nom, date, etat, tempRetard] ainsi écrites.
+        """
+        day = self._day(date)
+        conn = self._connect()
+        conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS roster (
+                prenom      TEXT    NOT NULL,
+                nom         TEXT    NOT NULL,
+                student_id  INTEGER,
+                first       INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (prenom, nom)
+            ) WITHOUT ROWID
+        """)
+        with conn:
+            conn.execute("DELETE FROM temp.roster")
+            conn.executemany("INSERT OR IGNORE INTO temp.roster (prenom, nom) VALUES (?, ?)", students)
+            conn.execute("""
+                INSERT INTO students (prenom, nom)
+                SELECT prenom, nom FROM temp.roster WHERE true
+                ON CONFLICT DO NOTHING
+            """)
+            conn.execute("""
+                UPDATE temp.roster SET student_id = (
+                    SELECT id FROM students s WHERE s.prenom = roster.prenom AND s.nom = roster.nom
+                )
+            """)
+            conn.execute("""
+                DELETE FROM temp.roster WHERE EXISTS (
+                    SELECT 1 FROM presences WHERE student_id = roster.student_id AND day = ?
+                )
+            """, (day,))
+            conn.execute("""
+                UPDATE temp.roster SET first = NOT EXISTS (
+                    SELECT 1 FROM presences WHERE student_id = roster.student_id
+                )
+            """)
+            # Le trigger d'insertion coûte quatre upserts de compteurs par ligne :
+            # il est suspendu dans cette transaction (stats_bulk) et les compteurs
+            # sont mis à jour une fois, par agrégat
+            conn.execute("INSERT INTO stats_bulk (active) VALUES (1)")
+            conn.execute("""
+                INSERT INTO presences (student_id, day, etat, tempRetard)
+                SELECT student_id, ?, 'absent', 0 FROM temp.roster
+            """, (day,))
+            conn.execute(self.ABSENT_STATS_SQL, (day, day))
+            conn.execute("DELETE FROM stats_bulk")
+            rows = conn.execute("SELECT prenom, nom FROM temp.roster").fetchall()
+            conn.execute("DELETE FROM temp.roster")
+        return [[prenom, nom, date, "absent", 0] for prenom, nom in rows]
+
+    def set_class(self, prenom: str, nom: str, classe: str):
+        """Affecte un étudiant à une classe (son historique suit dans les statistiques)."""
+        if classe == self.ALL_CLASSES:
+            raise ValueError(f"Nom de classe réservé : {classe!r}")
+        with self._connect() as conn:
+            conn.execute(self.STUDENT_SQL, (prenom, nom))
+            conn.execute(
+                "UPDATE students SET classe = ? WHERE prenom = ? AND nom = ?",
+                (classe, prenom, nom)
+            )
 
     # ------------------------------------------------------------------
     # Lecture
@@ -67,21 +441,122 @@ class DBManager:
     def get_all(self) -> list[dict]:
         """Retourne tous les enregistrements sous forme de liste de dicts."""
         with self._connect() as conn:
-            conn.row_factory = sqlite3.Row
             rows = conn.execute(
-                "SELECT prenom, nom, date, etat, tempRetard "
-                "FROM presences ORDER BY date DESC, nom ASC"
+                self.RECORD_SQL + "ORDER BY p.day DESC, s.nom ASC"
             ).fetchall()
         return [dict(r) for r in rows]
 
     def get_by_date(self, date: str) -> list[dict]:
         """Retourne les présences d'une date donnée (format YYYY-MM-DD)."""
+        try:
+            day = self._day(date)
+        except ValueError:
+            return []
         with self._connect() as conn:
-            conn.row_factory = sqlite3.Row
             rows = conn.execute(
-                "SELECT prenom, nom, date, etat, tempRetard "
-                "FROM presences WHERE date = ? ORDER BY nom ASC",
-                (date,)
+                self.RECORD_SQL + "WHERE p.day = ? ORDER BY s.nom ASC",
+                (day,)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def get_page(
+        self,
+        after: tuple | None = None,
+        before: tuple | None = None,
+        limit: int = 100,
+        date: str | None = None,
+    ) -> list[dict]:
+        """
+        Pagination par clé (keyset) dans l'ordre de get_all (date décroissante,
+        puis nom, prénom). `after` / `before` sont la clé (date, nom, prenom)
+        de la dernière / première ligne déjà affichée : la page suivante ou
+        précédente est lue par l'index sans parcourir les lignes qui précèdent,
+        quelle que soit la profondeur. Les lignes sont toujours retournées dans
+        l'ordre d'affichage. `date` restreint à un jour (YYYY-MM-DD).
+        """
+        where, params = [], []
+        try:
+            if date is not None:
+                where.append("p.day = ?")
+                params.append(self._day(date))
+            if after is not None:
+                day = self._day(after[0])
+                where.append("p.day <= ? AND (p.day < ? OR (s.nom, s.prenom) > (?, ?))")
+                params += [day, day, after[1], after[2]]
+            if before is not None:
+                day = self._day(before[0])
+                where.append("p.day >= ? AND (p.day > ? OR (s.nom, s.prenom) < (?, ?))")
+                params += [day, day, before[1], before[2]]
+        except ValueError:
+            return []
+
+        sql = self.RECORD_SQL
+        if where:
+            sql += "WHERE " + " AND ".join(where) + " "
+        # Vers l'arrière : lecture en ordre inverse puis remise à l'endroit
+        if before is not None and after is None:
+            sql += "ORDER BY p.day ASC, s.nom DESC, s.prenom DESC LIMIT ?"
+        else:
+            sql += "ORDER BY p.day DESC, s.nom ASC, s.prenom ASC LIMIT ?"
+        params.append(limit)
+
+        with self._connect() as conn:
+            rows = [dict(r) for r in conn.execute(sql, params).fetchall()]
+        if before is not None and after is None:
+            rows.reverse()
+        return rows
+
+    def iter_records(
+        self,
+        start: str | None = None,
+        end: str | None = None,
+        classe: str | None = None,
+        chunk_size: int = 1000,
+    ):
+        """
+        Parcourt les présences par lots de `chunk_size` tuples
+        (prenom, nom, date, etat, tempRetard, classe), du plus ancien au plus
+        récent puis par nom, sans jamais charger toute la table : le curseur
+        suit l'index par date et seules les lignes d'un même jour sont triées.
+        `start` / `end` (YYYY-MM-DD, inclus) et `classe` filtrent les lignes.
+        """
+        where, params = [], []
+        if start is not None:
+            where.append("p.day >= ?")
+            params.append(self._day(start))
+        if end is not None:
+            where.append("p.day <= ?")
+            params.append(self._day(end))
+        if classe is not None:
+            where.append("s.classe = ?")
+            params.append(classe)
+        sql = (
+            "SELECT s.prenom, s.nom, " + self.DATE_SQL + " AS date, p.etat, p.tempRetard, s.classe "
+            "FROM presences p JOIN students s ON s.id = p.student_id "
+        )
+        if where:
+            sql += "WHERE " + " AND ".join(where) + " "
+        sql += "ORDER BY p.day ASC, s.nom ASC, s.prenom ASC"
+
+        cursor = self._connect().cursor()
+        cursor.row_factory = None       # tuples bruts : pas de sqlite3.Row par ligne
+        cursor.arraysize = chunk_size
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cursor.close()
+
+    def get_by_student(self, prenom: str, nom: str) -> list[dict]:
+        """Retourne l'historique de présence d'un étudiant, du plus récent au plus ancien."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                self.RECORD_SQL + "WHERE s.prenom = ? AND s.nom = ? ORDER BY p.day DESC",
+                (prenom, nom)
             ).fetchall()
         return [dict(r) for r in rows]
 
@@ -89,26 +564,72 @@ class DBManager:
         """Retourne la liste des dates distinctes enregistrées."""
         with self._connect() as conn:
             rows = conn.execute(
-                "SELECT DISTINCT date FROM presences ORDER BY date DESC"
+                "SELECT DISTINCT day FROM presences ORDER BY day DESC"
+            ).fetchall()
+        return [self._date(r[0]) for r in rows]
+
+    def get_classes(self) -> list[str]:
+        """Retourne la liste des classes connues."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT classe FROM students WHERE classe <> '' ORDER BY classe"
             ).fetchall()
         return [r[0] for r in rows]
 
-    def get_stats(self) -> dict:
-        """Retourne des statistiques globales."""
+    def get_stats(self, date: str | None = None, classe: str | None = None) -> dict:
+        """
+        Retourne les statistiques globales, ou restreintes à une date
+        (YYYY-MM-DD) et/ou à une classe. Lecture directe des compteurs
+        matérialisés : le coût ne dépend pas de la taille de l'historique.
+        """
+        try:
+            day = self._day(date) if date else self.ALL_DAYS
+        except ValueError:
+            day = -1
         with self._connect() as conn:
-            total = conn.execute("SELECT COUNT(DISTINCT prenom || nom) FROM presences").fetchone()[0]
-            presents = conn.execute(
-                "SELECT COUNT(*) FROM presences WHERE etat = 'present'"
-            ).fetchone()[0]
-            absents = conn.execute(
-                "SELECT COUNT(*) FROM presences WHERE etat = 'absent'"
-            ).fetchone()[0]
-            retards = conn.execute(
-                "SELECT COUNT(*) FROM presences WHERE etat = 'retard'"
-            ).fetchone()[0]
+            counts = dict(conn.execute(
+                "SELECT cle, total FROM stats_counters WHERE day = ? AND classe = ?",
+                (day, classe if classe is not None else self.ALL_CLASSES)
+            ).fetchall())
+        if day == self.ALL_DAYS:
+            total = counts.get(self.STUDENTS_KEY, 0)
+        else:
+            # Une seule présence par étudiant et par jour
+            total = sum(counts.values())
         return {
             "total_etudiants": total,
-            "presents": presents,
-            "absents": absents,
-            "retards": retards,
+            "presents": counts.get("present", 0),
+            "absents": counts.get("absent", 0),
+            "retards": counts.get("retard", 0),
         }
+
+    # ------------------------------------------------------------------
+    # Cohérence des compteurs
+    # ------------------------------------------------------------------
+    def verify_stats(self) -> list[tuple]:
+        """
+        Compare les compteurs matérialisés à un recalcul complet depuis les
+        présences. Retourne les écarts (day, classe, cle, stocké, attendu) ;
+        une liste vide signifie que les compteurs sont cohérents.
+        """
+        with self._connect() as conn:
+            expected = {
+                (day, classe, cle): total
+                for day, classe, cle, total in conn.execute(self.STATS_SQL)
+            }
+            stored = {
+                (day, classe, cle): total
+                for day, classe, cle, total in conn.execute(
+                    "SELECT day, classe, cle, total FROM stats_counters"
+                )
+            }
+        return [
+            (*key, stored.get(key, 0), expected.get(key, 0))
+            for key in sorted(expected.keys() | stored.keys())
+            if stored.get(key, 0) != expected.get(key, 0)
+        ]
+
+    def rebuild_stats(self):
+        """Recalcule entièrement les compteurs (après une modification hors DBManager)."""
+        with self._connect() as conn:
+            self._recompute_stats(conn)
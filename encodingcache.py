@@ -0,0 +1,120 @@
+# encodingcache.py
+
+import hashlib
+import json
+import os
+import numpy as np
+
+
+class EncodingCache:
+    """
+    Cache disque des encodages faciaux de la galerie.
+
+    Deux fichiers sont écrits à côté de `cache_path` :
+      - <cache_path>.npy  : matrice (N, 128) des encodages, relue en mmap
+      - <cache_path>.json : index {chemin: taille, mtime, sha1, ligne}
+
+    Une photo est réutilisée si sa taille et son mtime n'ont pas changé ;
+    sinon son empreinte sha1 est recalculée et comparée. Les photos sans
+    visage sont aussi mémorisées (ligne = -1) pour ne pas être ré-analysées.
+    Les entrées des photos supprimées disparaissent à la prochaine sauvegarde.
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_path: str):
+        self.matrix_path = cache_path + ".npy"
+        self.index_path = cache_path + ".json"
+        self._index: dict[str, dict] = {}
+        self._matrix: np.ndarray | None = None
+        self._entries: dict[str, tuple[dict, np.ndarray | None]] = {}
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+    def _load(self):
+        if not (os.path.isfile(self.index_path) and os.path.isfile(self.matrix_path)):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != self.VERSION:
+                return
+            self._matrix = np.load(self.matrix_path, mmap_mode="r")
+            self._index = data["entries"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️  Cache d'encodages ignoré ({e})")
+            self._index, self._matrix = {}, None
+
+    @staticmethod
+    def _file_hash(path: str) -> str:
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        return h.hexdigest()
+
+    def get(self, path: str) -> tuple[bool, np.ndarray | None]:
+        """
+        Cherche l'encodage d'une photo.
+        Retourne (trouvé, encodage_ou_None) ; encodage None = aucun visage.
+        """
+        st = os.stat(path)
+        meta = {"size": st.st_size, "mtime": st.st_mtime_ns}
+        entry = self._index.get(path)
+        if entry is None or entry["size"] != meta["size"]:
+            return False, None
+
+        if entry["mtime"] != meta["mtime"]:
+            meta["sha1"] = self._file_hash(path)
+            if meta["sha1"] != entry.get("sha1"):
+                return False, None
+        else:
+            meta["sha1"] = entry.get("sha1")
+
+        row = entry["row"]
+        if row >= 0 and (self._matrix is None or row >= len(self._matrix)):
+            return False, None
+        encoding = np.array(self._matrix[row]) if row >= 0 else None
+        self._entries[path] = (meta, encoding)
+        return True, encoding
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+    def put(self, path: str, encoding: np.ndarray | None):
+        """Mémorise l'encodage (ou l'absence de visage) d'une photo."""
+        st = os.stat(path)
+        meta = {
+            "size": st.st_size,
+            "mtime": st.st_mtime_ns,
+            "sha1": self._file_hash(path),
+        }
+        self._entries[path] = (meta, encoding)
+
+    def save(self):
+        """Réécrit le cache avec les seules photos vues lors de ce chargement."""
+        rows, index = [], {}
+        for path, (meta, encoding) in self._entries.items():
+            row = -1
+            if encoding is not None:
+                row = len(rows)
+                rows.append(encoding)
+            index[path] = {**meta, "row": row}
+
+        matrix = np.array(rows, dtype=np.float64).reshape(-1, 128)
+        # L'index est retiré avant de remplacer la matrice : une coupure entre
+        # les deux écritures force une reconstruction au lieu d'un mauvais appariement.
+        self._matrix = None
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+        tmp_matrix = self.matrix_path + ".tmp"
+        with open(tmp_matrix, "wb") as f:
+            np.save(f, matrix)
+        tmp_index = self.index_path + ".tmp"
+        with open(tmp_index, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "entries": index}, f)
+        os.replace(tmp_matrix, self.matrix_path)
+        os.replace(tmp_index, self.index_path)
+        self._index = index
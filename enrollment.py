@@ -0,0 +1,78 @@
+# enrollment.py
+
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+import face_recognition
+import numpy as np
+
+
+class EnrollmentResult:
+    """Résultat de l'encodage d'une photo de la galerie."""
+
+    NO_FACE = "Aucun visage détecté"
+
+    def __init__(self, path: str, encoding: np.ndarray | None, error: str | None = None):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.encoding = encoding
+        if encoding is None and error is None:
+            error = self.NO_FACE
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.encoding is not None
+
+    def __repr__(self):
+        return f"EnrollmentResult({self.name}, ok={self.ok}, error={self.error!r})"
+
+
+def encode_image(path: str) -> EnrollmentResult:
+    """Décode une photo, détecte le visage et calcule son encodage."""
+    try:
+        img = face_recognition.load_image_file(path)
+        enc = face_recognition.face_encodings(img)
+    except Exception as e:  # image illisible, format non supporté...
+        return EnrollmentResult(path, None, f"{type(e).__name__}: {e}")
+    return EnrollmentResult(path, enc[0] if enc else None)
+
+
+class GalleryEnroller:
+    """
+    Encode un lot de photos, en parallèle sur plusieurs processus si demandé.
+
+    L'ordre des résultats est celui des chemins fournis, quel que soit
+    le nombre de processus (workers=0 : un processus par cœur).
+    `on_progress(fait, total, résultat)` est appelé après chaque photo,
+    dans le processus principal.
+    """
+
+    def __init__(self, workers: int = 1, chunksize: int = 8, on_progress=None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.chunksize = max(1, chunksize)
+        self.on_progress = on_progress
+
+    def enroll(self, paths: list[str]) -> list[EnrollmentResult]:
+        total = len(paths)
+        if total == 0:
+            return []
+
+        results = []
+        if self.workers == 1 or total == 1:
+            for result in map(encode_image, paths):
+                results.append(result)
+                self._report(len(results), total, result)
+            return results
+
+        # spawn : un fork hériterait des threads (interface, caméra) du processus appelant
+        with ProcessPoolExecutor(max_workers=min(self.workers, total),
+                                 mp_context=mp.get_context("spawn")) as pool:
+            for result in pool.map(encode_image, paths, chunksize=self.chunksize):
+                results.append(result)
+                self._report(len(results), total, result)
+        return results
+
+    def _report(self, done: int, total: int, result: EnrollmentResult):
+        if self.on_progress:
+            self.on_progress(done, total, result)
@@ -0,0 +1,169 @@
+# events.py
+
+import threading
+import time
+
+
+class AttendanceEvent:
+    """Changement de présence d'un étudiant, tel qu'écrit en base."""
+
+    __slots__ = ("prenom", "nom", "date", "status", "delay")
+
+    def __init__(self, prenom: str, nom: str, date: str, status: str | None, delay: int = 0):
+        self.prenom = prenom
+        self.nom = nom
+        self.date = date            # YYYY-MM-DD
+        self.status = status        # "present" / "retard" / "absent"
+        self.delay = delay or 0     # minutes de retard
+
+    @classmethod
+    def from_row(cls, row: list) -> "AttendanceEvent":
+        """Depuis une ligne [prenom, nom, date, etat, tempRetard]."""
+        return cls(*row)
+
+    def as_row(self) -> list:
+        return [self.prenom, self.nom, self.date, self.status, self.delay]
+
+    @property
+    def key(self) -> tuple:
+        """Un étudiant, un jour : deux événements de même clé se remplacent."""
+        return (self.prenom, self.nom, self.date)
+
+    def __eq__(self, other):
+        return isinstance(other, AttendanceEvent) and self.as_row() == other.as_row()
+
+    def __repr__(self):
+        return (f"AttendanceEvent({self.prenom} {self.nom}, {self.date}, "
+                f"{self.status}, retard={self.delay})")
+
+
+class _Subscription:
+    def __init__(self, callback, debounce: float):
+        self.callback = callback
+        self.debounce = debounce
+        self.pending: dict[tuple, AttendanceEvent] = {}
+        self.deadline: float | None = None
+
+
+class EventBus:
+    """
+    Diffusion des AttendanceEvent vers plusieurs abonnés.
+
+    Chaque abonné reçoit des lots : les événements publiés pendant sa
+    fenêtre `debounce` (comptée depuis le premier du lot) sont regroupés et
+    ceux d'un même (étudiant, date) fusionnés, seul le dernier état étant
+    transmis. Les callbacks tournent dans le thread de diffusion du bus,
+    jamais dans celui qui publie ; une erreur d'un abonné n'affecte pas
+    les autres.
+    """
+
+    def __init__(self, debounce: float = 0.0):
+        self.debounce = debounce
+        self._subscriptions: list[_Subscription] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._delivering = False
+        self.published = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self._thread = threading.Thread(target=self._run, name="event-bus", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Abonnement / publication
+    # ------------------------------------------------------------------
+    def subscribe(self, callback, debounce: float | None = None):
+        """
+        Abonne `callback(events: list[AttendanceEvent])`. Retourne une fonction
+        de désabonnement.
+        """
+        subscription = _Subscription(callback, self.debounce if debounce is None else debounce)
+        with self._cond:
+            # Copy-on-write : le thread de diffusion itère sans verrou
+            self._subscriptions = self._subscriptions + [subscription]
+
+        def unsubscribe():
+            with self._cond:
+                self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+        return unsubscribe
+
+    def publish(self, events: list[AttendanceEvent]):
+        if not events:
+            return
+        now = time.monotonic()
+        with self._cond:
+            if self._closed:
+                return
+            self.published += len(events)
+            for subscription in self._subscriptions:
+                if not subscription.pending:
+                    subscription.deadline = now + subscription.debounce
+                for event in events:
+                    if event.key in subscription.pending:
+                        self.coalesced += 1
+                    subscription.pending[event.key] = event
+            self._cond.notify_all()
+
+    def flush(self, timeout: float | None = 5.0) -> bool:
+        """Livre sans attendre les lots en cours ; False si pas terminé dans le délai."""
+        with self._cond:
+            for subscription in self._subscriptions:
+                if subscription.pending:
+                    subscription.deadline = float("-inf")
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: not self._delivering
+                and not any(s.pending for s in self._subscriptions),
+                timeout,
+            )
+
+    def close(self):
+        """Livre les lots en attente puis arrête le thread de diffusion (idempotent)."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    # ------------------------------------------------------------------
+    # Thread de diffusion
+    # ------------------------------------------------------------------
+    def _due(self, now: float) -> list[tuple[_Subscription, list[AttendanceEvent]]]:
+        batches = []
+        for subscription in self._subscriptions:
+            if subscription.pending and (self._closed or subscription.deadline <= now):
+                batches.append((subscription, list(subscription.pending.values())))
+                subscription.pending = {}
+                subscription.deadline = None
+        return batches
+
+    def _next_deadline(self) -> float | None:
+        deadlines = [s.deadline for s in self._subscriptions if s.pending]
+        return min(deadlines) if deadlines else None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    batches = self._due(time.monotonic())
+                    if batches:
+                        break
+                    if self._closed:
+                        return
+                    deadline = self._next_deadline()
+                    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                    self._cond.wait(timeout)
+                self._delivering = True
+
+            try:
+                for subscription, events in batches:
+                    try:
+                        subscription.callback(events)
+                    except Exception as e:
+                        print(f"⚠️  Abonné {subscription.callback!r} en erreur : {e}")
+                    self.delivered += len(events)
+            finally:
+                with self._cond:
+                    self._delivering = False
+                    self._cond.notify_all()
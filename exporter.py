@@ -0,0 +1,160 @@
+# exporter.py  —  Export des présences en CSV, Excel (XLSX) ou Parquet
+#
+#   python exporter.py student_data.xlsx
+#   python exporter.py janvier.csv --from 2025-01-01 --to 2025-01-31 --classe L3
+#   python Main.py export ...                    (même chose)
+#
+# Les lignes sont lues par lots depuis SQLite (DBManager.iter_records) et
+# écrites au fil de l'eau : la mémoire utilisée ne dépend pas de la taille
+# de l'historique.
+
+import argparse
+import csv
+import datetime
+import os
+import time
+
+from dbmanager import DBManager
+
+
+COLUMNS = ("prenom", "nom", "date", "etat", "tempRetard", "classe")
+XLSX_MAX_ROWS = 1_048_576          # limite d'une feuille Excel, en-tête compris
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Écrivains : (lots de lignes, chemin) → nombre de lignes écrites
+# ─────────────────────────────────────────────────────────────────────────────
+def write_csv(chunks, path: str) -> int:
+    count = 0
+    # BOM : accents lisibles à l'ouverture directe dans Excel
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for rows in chunks:
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+def write_xlsx(chunks, path: str) -> int:
+    """Classeur en mode write-only : chaque ligne part sur disque dès son ajout."""
+    try:
+        from openpyxl import Workbook
+    except ImportError as e:
+        raise ImportError("L'export XLSX nécessite openpyxl : pip install openpyxl") from e
+
+    workbook = Workbook(write_only=True)
+    sheet, sheet_rows, sheets, count = None, XLSX_MAX_ROWS, 0, 0
+    for rows in chunks:
+        for row in rows:
+            # Au-delà d'un million de lignes, la suite continue sur une nouvelle feuille
+            if sheet_rows >= XLSX_MAX_ROWS:
+                sheets += 1
+                sheet = workbook.create_sheet("Présences" if sheets == 1 else f"Présences {sheets}")
+                sheet.append(COLUMNS)
+                sheet_rows = 1
+            sheet.append(row)
+            sheet_rows += 1
+        count += len(rows)
+    if sheet is None:
+        workbook.create_sheet("Présences").append(COLUMNS)
+    workbook.save(path)
+    return count
+
+
+def write_parquet(chunks, path: str) -> int:
+    """Un groupe de lignes Parquet par lot lu en base."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("L'export Parquet nécessite pyarrow : pip install pyarrow") from e
+
+    schema = pa.schema([
+        ("prenom", pa.string()), ("nom", pa.string()), ("date", pa.string()),
+        ("etat", pa.string()), ("tempRetard", pa.int32()), ("classe", pa.string()),
+    ])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in chunks:
+            columns = [pa.array(values, type=field.type)
+                       for values, field in zip(zip(*rows), schema)]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            count += len(rows)
+    return count
+
+
+WRITERS = {"csv": write_csv, "xlsx": write_xlsx, "parquet": write_parquet}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+def _check_date(date: str | None):
+    if date is None:
+        return
+    try:
+        datetime.date.fromisoformat(date)
+    except ValueError:
+        raise ValueError(f"Date invalide : {date!r} (format attendu : YYYY-MM-DD)") from None
+
+
+def export(
+    db: DBManager,
+    path: str,
+    fmt: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    classe: str | None = None,
+    chunk_size: int = 5000,
+) -> int:
+    """
+    Exporte les présences (du `start` au `end` inclus, d'une `classe`) vers
+    `path`. Le format vient de `fmt` ou, à défaut, de l'extension du fichier.
+    Le fichier est écrit à côté puis renommé : un export interrompu ne laisse
+    jamais de fichier tronqué à la place du précédent. Retourne le nombre de
+    lignes exportées.
+    """
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    writer = WRITERS.get(fmt)
+    if writer is None:
+        raise ValueError(f"Format d'export inconnu : {fmt!r} (choix : {', '.join(WRITERS)})")
+    _check_date(start)
+    _check_date(end)
+
+    tmp_path = f"{path}.tmp"
+    try:
+        count = writer(db.iter_records(start, end, classe, chunk_size), tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return count
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Export des présences en CSV, XLSX ou Parquet.")
+    parser.add_argument("output", help="fichier de sortie (.csv, .xlsx ou .parquet)")
+    parser.add_argument("--db", default="attendance.db")
+    parser.add_argument("--format", choices=list(WRITERS), default=None,
+                        help="format (défaut : extension du fichier)")
+    parser.add_argument("--from", dest="start", default=None, help="première date, YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", default=None, help="dernière date, YYYY-MM-DD")
+    parser.add_argument("--classe", default=None)
+    parser.add_argument("--chunk", type=int, default=5000, help="lignes lues par lot")
+    args = parser.parse_args(argv)
+
+    db = DBManager(args.db)
+    started = time.perf_counter()
+    try:
+        count = export(db, args.output, args.format, args.start, args.end,
+                       args.classe, args.chunk)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - started
+    print(f"📤 {count} présence(s) exportée(s) vers {args.output} en {elapsed:.1f} s "
+          f"({count / elapsed if elapsed else 0:.0f} lignes/s)")
+    return count
+
+
+if __name__ == "__main__":
+    main()
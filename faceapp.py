@@ -1,15 +1,20 @@
 # app.py  —  Interface Tkinter pour la gestion des présences
 
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import threading
 import datetime
+import time
 from PIL import Image, ImageTk
 
 from student import Student
 from facerecognizer import FaceRecognizer
 from attendancemanager import AttendanceManager
 from videoprocessor import VideoProcessor
+from gallery import GalleryWatcher
+from virtualtable import VirtualTable
+from framerenderer import FrameRenderer
+from metrics import Metrics, MetricsServer, instrument
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -40,7 +45,15 @@ class App(tk.Tk):
     IMAGE_DIR = "img"
     THRESHOLD = 0.4
     DB_PATH   = "attendance.db"
+    ENROLL_WORKERS = 1        # encodage des photos hors cache dans ce processus (0 = un par cœur)
+    DETECT_EVERY = 5          # détection complète une frame sur N (suivi entre les deux)
+    MOTION_GATE = None        # options de MotionGate ({} = défauts) : pas de détection si rien ne bouge
+    EVENT_DEBOUNCE = 0.25     # regroupement des mises à jour du tableau (secondes)
     CAM_W, CAM_H = 440, 300   # taille d'affichage du flux dans l'interface
+    RENDER_FPS = 25           # cadence de rafraîchissement de l'image caméra
+    METRICS_PORT = None       # ex : 9108 → mesures sur http://127.0.0.1:9108/metrics (None = coupé)
+    METRICS_OVERLAY = False   # latences par étage incrustées à côté de l'horloge
+    EXPORT_FILE = "student_data.xlsx"   # nom proposé pour l'export des présences
 
     def __init__(self):
         super().__init__()
@@ -50,7 +63,8 @@ class App(tk.Tk):
         self.configure(bg=BG_DARK)
 
         # ── Instanciation des classes métier ───────────────────────────
-        self.recognizer = FaceRecognizer(self.IMAGE_DIR, self.THRESHOLD)
+        self.recognizer = FaceRecognizer(self.IMAGE_DIR, self.THRESHOLD,
+                                         workers=self.ENROLL_WORKERS)
 
         # AttendanceManager reçoit la liste des étudiants connus
         # (déduits des noms uniques chargés par FaceRecognizer)
@@ -59,13 +73,36 @@ class App(tk.Tk):
         self.attendance = AttendanceManager(students, self.DB_PATH)
 
         # VideoProcessor orchestre caméra + reconnaissance + présences
-        self.processor = VideoProcessor(self.recognizer, self.attendance)
+        self.processor = VideoProcessor(self.recognizer, self.attendance,
+                                        tracking=True, detect_every=self.DETECT_EVERY,
+                                        threaded=True, motion_gate=self.MOTION_GATE)
 
-        # Callback : AttendanceManager notifie l'UI après chaque détection
-        self.attendance.on_update = self._schedule_refresh
+        # AttendanceManager diffuse les changements écrits en base, regroupés
+        # par rafales de EVENT_DEBOUNCE secondes
+        self.attendance.events.subscribe(self._on_attendance_events,
+                                         debounce=self.EVENT_DEBOUNCE)
+
+        # Ajout / retrait de photos dans img/ pris en compte sans redémarrer
+        self.watcher = GalleryWatcher(self.recognizer, self.IMAGE_DIR, self.attendance)
+        self.watcher.start()
 
         # ── Thread de capture (démarré uniquement quand l'user clique) ─
         self._cam_thread: threading.Thread | None = None
+        # Les frames sont préparées hors du thread Tkinter et affichées à cadence fixe
+        self.renderer = FrameRenderer(self.CAM_W, self.CAM_H)
+        self._render_job = None
+        self._fps_last = (0.0, 0)
+
+        # ── Mesures par étage (aucun coût si coupées) ──────────────────
+        self.metrics_server = None
+        if self.METRICS_PORT is not None or self.METRICS_OVERLAY:
+            metrics = instrument(Metrics(), self.recognizer, self.processor,
+                                 self.attendance, self.renderer)
+            if self.METRICS_OVERLAY:
+                self.processor.metrics_overlay = metrics
+            if self.METRICS_PORT is not None:
+                self.metrics_server = MetricsServer(metrics, port=self.METRICS_PORT)
+                self.metrics_server.start()
 
         # ── Construction de l'interface ────────────────────────────────
         self._build_ui()
@@ -109,15 +146,18 @@ class App(tk.Tk):
         card.pack(fill="x", pady=(0, 10))
         tk.Label(card, text="📷  Flux Caméra", font=FONT_HEAD,
                  bg=BG_CARD, fg=TEXT_LIGHT).pack(pady=(10, 6))
-        self.lbl_cam = tk.Label(card, bg="#000000",
+        # PhotoImage unique : chaque frame y est collée au lieu d'en créer une nouvelle
+        self._photo = ImageTk.PhotoImage("RGB", (self.CAM_W, self.CAM_H))
+        self.lbl_cam = tk.Label(card, bg="#000000", image=self._photo,
                                  width=self.CAM_W, height=self.CAM_H)
-        self.lbl_cam.pack(padx=10, pady=(0, 10))
+        self.lbl_cam.pack(padx=10, pady=(0, 4))
+        self.lbl_fps = tk.Label(card, text="", font=FONT_SMALL, bg=BG_CARD, fg=TEXT_MUTED)
+        self.lbl_fps.pack(pady=(0, 8))
         self._show_placeholder()
 
     def _show_placeholder(self):
-        img = Image.new("RGB", (self.CAM_W, self.CAM_H), "#111111")
-        self._ph = ImageTk.PhotoImage(img)
-        self.lbl_cam.configure(image=self._ph)
+        self._photo.paste(Image.new("RGB", (self.CAM_W, self.CAM_H), "#111111"))
+        self.lbl_fps.configure(text="")
 
     # ── Contrôles ─────────────────────────────────────────────────────
     def _build_controls(self, parent):
@@ -141,6 +181,8 @@ class App(tk.Tk):
                   "#8e44ad", self._finalize).grid(row=1, column=0, padx=6, pady=4, sticky="ew")
         self._btn(btn_f, "🔄  Rafraîchir",
                   "#27ae60", self._refresh_all).grid(row=1, column=1, padx=6, pady=4, sticky="ew")
+        self.btn_export = self._btn(btn_f, "📤  Exporter", "#d35400", self._export)
+        self.btn_export.grid(row=2, column=0, columnspan=2, padx=6, pady=4, sticky="ew")
 
         btn_f.columnconfigure(0, weight=1)
         btn_f.columnconfigure(1, weight=1)
@@ -208,15 +250,17 @@ class App(tk.Tk):
         self.tree.tag_configure("absent",  foreground=RED)
 
         sb = ttk.Scrollbar(frame_tree, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=sb.set)
         sb.pack(side="right", fill="y")
         self.tree.pack(fill="both", expand=True)
 
+        # Seule une fenêtre de lignes autour de la zone visible est chargée
+        self.table = VirtualTable(self.tree, sb, self.attendance.get_records_page)
+
     # ═══════════════════════════════════════════════════════════════════
     # Gestion caméra — délégation complète à VideoProcessor
     # ═══════════════════════════════════════════════════════════════════
     def _start_camera(self):
-        """Démarre VideoProcessor en mode Tkinter et lance la boucle d'affichage."""
+        """Démarre VideoProcessor, le thread de préparation des frames et l'affichage."""
         self.processor.start()                         # ← VideoProcessor.start()
         self.btn_start.configure(state="disabled")
         self.btn_stop.configure(state="normal")
@@ -224,54 +268,69 @@ class App(tk.Tk):
             target=self._camera_loop, daemon=True
         )
         self._cam_thread.start()
+        self.renderer.latest()        # image d'une session précédente
+        self._fps_last = (time.monotonic(), 0)
+        self.renderer.stats()
+        self._render_tick()
 
     def _stop_camera(self):
         """Arrête VideoProcessor et remet le placeholder."""
         self.processor.stop()                          # ← VideoProcessor.stop()
+        if self._render_job is not None:
+            self.after_cancel(self._render_job)
+            self._render_job = None
         self.btn_start.configure(state="normal")
         self.btn_stop.configure(state="disabled")
         self._show_placeholder()
 
     def _camera_loop(self):
         """
-        Tourne dans un thread secondaire.
-        Demande une frame annotée à VideoProcessor et l'affiche dans le Label Tkinter.
-        Toute la logique de détection/présence est dans VideoProcessor._process_frame().
+        Tourne dans un thread secondaire : récupère les frames annotées par
+        VideoProcessor et les prépare pour l'affichage (FrameRenderer), sans
+        jamais toucher aux widgets Tkinter.
         """
         while self.processor.running:
             frame = self.processor.get_annotated_frame()   # ← VideoProcessor.get_annotated_frame()
             if frame is None:
                 break
-
-            from PIL import Image as PILImage
-            import cv2
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            photo = ImageTk.PhotoImage(
-                PILImage.fromarray(frame_rgb).resize((self.CAM_W, self.CAM_H))
-            )
-            # Mise à jour du label dans le thread Tkinter
-            self.lbl_cam.configure(image=photo)
-            self.lbl_cam.image = photo   # référence pour éviter le GC
+            self.renderer.submit(frame)
+
+    def _render_tick(self):
+        """Thread Tkinter, RENDER_FPS fois par seconde : affiche la dernière frame prête."""
+        image = self.renderer.latest()
+        if image is not None:
+            start = time.perf_counter()
+            self._photo.paste(image)
+            self.renderer.shown(time.perf_counter() - start)
+
+        now = time.monotonic()
+        if now - self._fps_last[0] >= 1.0:
+            self._show_fps(now)
+        self._render_job = self.after(1000 // self.RENDER_FPS, self._render_tick)
+
+    def _show_fps(self, now: float):
+        """Cadence d'affichage et cadence de reconnaissance, mesurées séparément."""
+        render = self.renderer.stats()
+        stats = self.processor.pipeline_stats()
+        recognized = stats.get("recognition", {}).get("processed", 0)
+        last_time, last_recognized = self._fps_last
+        self._fps_last = (now, recognized)
+        recognition_fps = (recognized - last_recognized) / (now - last_time)
+        text = (
+            f"Affichage {render['fps']:.0f} fps ({render['prepare_ms']:.1f} + "
+            f"{render['render_ms']:.1f} ms)  ·  Reconnaissance {recognition_fps:.1f} fps  ·  "
+            f"jetées {render['dropped']}"
+        )
+        if "motion" in stats:
+            text += f"  ·  immobiles {stats['motion']['skip_ratio']:.0%}"
+        self.lbl_fps.configure(text=text)
 
     # ═══════════════════════════════════════════════════════════════════
     # Tableau & Stats — délégation à AttendanceManager
     # ═══════════════════════════════════════════════════════════════════
-    def _refresh_table(self, records=None):
-        """Rafraîchit le tableau via AttendanceManager.get_all_records()."""
-        if records is None:
-            records = self.attendance.get_all_records()   # ← AttendanceManager
-
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-
-        for r in records:
-            c1  = r.get("etat") or "—"
-            
-            tag = c1 if c1 in ("present", "retard", "absent") else "absent"
-            self.tree.insert("", "end", values=(
-                r["prenom"], r["nom"], r["date"],
-                c1, r.get("tempRetard", 0)
-            ), tags=(tag,))
+    def _refresh_table(self, date=None):
+        """Recharge la première page du tableau (toutes dates, ou une seule)."""
+        self.table.reset(date)   # ← AttendanceManager.get_records_page()
 
     def _refresh_stats(self):
         """Rafraîchit les cartes de stats via AttendanceManager.get_stats()."""
@@ -290,12 +349,46 @@ class App(tk.Tk):
         if not date:
             messagebox.showwarning("Date vide", "Veuillez saisir une date (YYYY-MM-DD).")
             return
-        records = self.attendance.get_records_by_date(date)  # ← AttendanceManager
-        self._refresh_table(records)
+        self._refresh_table(date)
+
+    def _on_attendance_events(self, events):
+        """Appelé depuis le thread du bus d'événements → planifie la mise à jour dans le thread Tkinter."""
+        self.after(0, self._apply_changes, events)
 
-    def _schedule_refresh(self):
-        """Appelé depuis un thread secondaire → planifie le refresh dans le thread Tkinter."""
-        self.after(0, self._refresh_all)
+    def _apply_changes(self, events):
+        """Reporte les changements dans le tableau, sans relire la base."""
+        self.table.apply([e.as_row() for e in events])
+        self._refresh_stats()
+
+    # ═══════════════════════════════════════════════════════════════════
+    # Export — délégation à AttendanceManager.export()
+    # ═══════════════════════════════════════════════════════════════════
+    def _export(self):
+        path = filedialog.asksaveasfilename(
+            title="Exporter les présences",
+            initialfile=self.EXPORT_FILE,
+            defaultextension=".xlsx",
+            filetypes=[("Excel", "*.xlsx"), ("CSV", "*.csv"), ("Parquet", "*.parquet")],
+        )
+        if not path:
+            return
+        self.btn_export.configure(state="disabled")
+        # Export en arrière-plan : l'interface reste fluide sur un gros historique
+        threading.Thread(target=self._export_worker, args=(path,), daemon=True).start()
+
+    def _export_worker(self, path: str):
+        try:
+            count = self.attendance.export(path)
+            self.after(0, self._export_done, f"{count} présence(s) exportée(s) vers {path}", None)
+        except Exception as e:
+            self.after(0, self._export_done, None, str(e))
+
+    def _export_done(self, message: str | None, error: str | None):
+        self.btn_export.configure(state="normal")
+        if error:
+            messagebox.showerror("Export impossible", error)
+        else:
+            messagebox.showinfo("Export terminé", message)
 
     # ═══════════════════════════════════════════════════════════════════
     # Finalisation — délégation à VideoProcessor.finalize()
@@ -328,7 +421,13 @@ class App(tk.Tk):
         self.after(1000, self._tick_clock)
 
     def _on_close(self):
+        if self._render_job is not None:
+            self.after_cancel(self._render_job)
+        self.watcher.stop()
+        if self.metrics_server:
+            self.metrics_server.stop()
         self.processor.stop()    # ← libère proprement la webcam
+        self.attendance.close()  # ← écrit les présences encore en attente
         self.destroy()
 
 
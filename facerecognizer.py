@@ -1,90 +1,403 @@
 # facerecognizer.py
 
 import os
+import threading
+import time
 import cv2
 import face_recognition
 import numpy as np
+from encodingcache import EncodingCache
+from enrollment import EnrollmentResult, GalleryEnroller, encode_image
+from gallery import Gallery
+from matcher import MATCHERS, create_matcher
 
 
 class FaceRecognizer:
     """Charge les encodages faciaux et identifie les visages dans une frame."""
 
-    def __init__(self, image_directory: str, similarity_threshold: float = 0.4):
+    IMAGE_EXTENSIONS = (".jpeg", ".jpg", ".png", ".heic")
+
+    def __init__(
+        self,
+        image_directory: str | None,
+        similarity_threshold: float = 0.4,
+        cache_path: str | None = "encodings_cache",
+        workers: int = 1,
+        chunksize: int = 8,
+        on_progress=None,
+        matcher: str = "exact",
+        matcher_options: dict | None = None,
+        haar_fallback: bool = True,
+        detection_scale: float = 1.0,
+        adaptive_scale: bool = False,
+        target_frame_time: float = 0.15,
+        batch_encoder=None,
+    ):
         self.threshold = similarity_threshold
-        self.known_encodings: np.ndarray = np.array([])
-        self.known_names: list[str] = []
-        self.known_encodings, self.known_names = self._load_images(image_directory)
+        # Moteur de recherche : "exact" (défaut) ou "ivf" (approximatif, grandes galeries)
+        if matcher not in MATCHERS:
+            raise ValueError(f"Moteur de recherche inconnu : {matcher!r} (choix : {', '.join(MATCHERS)})")
+        self.matcher_kind = matcher
+        self.matcher_options = matcher_options or {}
+        self.cache_path = cache_path
+        self.enroller = GalleryEnroller(workers, chunksize, on_progress)
+        # Résultat détaillé du dernier chargement (une entrée par photo)
+        self.enrollment_report: list[EnrollmentResult] = []
+        # Galerie publiée par simple remplacement de référence (copy-on-write) ;
+        # le verrou ne sérialise que les écrivains.
+        self._write_lock = threading.Lock()
+        # Sans dossier, la galerie reste vide jusqu'à set_gallery() (ex : galerie partagée)
+        if image_directory is None:
+            self._gallery = self._make_gallery(np.empty((0, 128)), [], [])
+        else:
+            self._gallery = self._load_images(image_directory)
+        # Détection sur une copie réduite (1.0 = pleine résolution) ; en mode adaptatif,
+        # l'échelle suit le temps mesuré par frame pour viser target_frame_time secondes.
+        self.detection_scale = detection_scale
+        self.adaptive_scale = adaptive_scale
+        self.target_frame_time = target_frame_time
+        self._frame_time: float | None = None
+        # Plusieurs caméras (threads) partagent ce FaceRecognizer : la moyenne
+        # glissante et la cascade Haar (non réentrante) sont protégées
+        self._scale_lock = threading.Lock()
+        self._cascade_lock = threading.Lock()
+        # Encodage par micro-lots partagé entre caméras (BatchEncoder), None = appel direct
+        self.batch_encoder = batch_encoder
+        # Méthode 2 (cascade Haar) désactivable à chaud pour alléger la charge
+        self.haar_fallback = haar_fallback
         self.face_cascade = cv2.CascadeClassifier(
             cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
         )
 
+    @property
+    def gallery(self) -> Gallery:
+        return self._gallery
+
+    @property
+    def known_encodings(self) -> np.ndarray:
+        return self._gallery.encodings
+
+    @property
+    def known_names(self) -> list[str]:
+        return self._gallery.names
+
+    def worker_options(self) -> dict:
+        """
+        Options d'un FaceRecognizer équivalent dans un autre processus
+        (sans dossier ni cache : la galerie lui est passée par set_gallery()).
+        """
+        return {
+            "cache_path": None,
+            "matcher": self.matcher_kind,
+            "matcher_options": self.matcher_options,
+            "haar_fallback": self.haar_fallback,
+            "detection_scale": self.detection_scale,
+        }
+
+    @property
+    def failed_images(self) -> list[EnrollmentResult]:
+        """Photos écartées au dernier chargement (aucun visage, fichier illisible...)."""
+        return [r for r in self.enrollment_report if not r.ok]
+
     # ------------------------------------------------------------------
     # Chargement des images
     # ------------------------------------------------------------------
-    def _load_images(self, directory: str) -> tuple[np.ndarray, list[str]]:
-        encodings, names = [], []
+    def _list_images(self, directory: str) -> list[str]:
+        return [
+            filename for filename in os.listdir(directory)
+            if filename.lower().endswith(self.IMAGE_EXTENSIONS)
+        ]
+
+    def _load_images(self, directory: str) -> Gallery:
+        self.enrollment_report = []
         if not os.path.isdir(directory):
             print(f"⚠️  Dossier introuvable : {directory}")
-            return np.array([]), []
-
-        for filename in os.listdir(directory):
-            if filename.lower().endswith(".jpeg") or filename.lower().endswith(".jpg") or filename.lower().endswith(".png") or filename.lower().endswith(".heic"):
-                path = os.path.join(directory, filename)
-                img = face_recognition.load_image_file(path)
-                enc = face_recognition.face_encodings(img)
-                if enc:
-                    encodings.append(enc[0])
-                    names.append(os.path.splitext(filename)[0])
-                else:
-                    print(f"⚠️  Aucun visage détecté dans {filename}")
+            return self._make_gallery(np.empty((0, 128)), [], [])
+
+        paths = [os.path.join(directory, f) for f in self._list_images(directory)]
+
+        # Le cache évite de ré-encoder les photos inchangées depuis le dernier démarrage
+        cache = EncodingCache(self.cache_path) if self.cache_path else None
+        results: dict[str, EnrollmentResult] = {}
+        to_encode = []
+        for path in paths:
+            found, enc = cache.get(path) if cache else (False, None)
+            if found:
+                results[path] = EnrollmentResult(path, enc)
+            else:
+                to_encode.append(path)
+
+        for result in self.enroller.enroll(to_encode):
+            results[result.path] = result
+            # Les erreurs de lecture ne sont pas mises en cache : nouvel essai au prochain démarrage
+            if cache and (result.ok or result.error == EnrollmentResult.NO_FACE):
+                cache.put(result.path, result.encoding)
 
+        if cache:
+            try:
+                cache.save()
+            except OSError as e:
+                print(f"⚠️  Impossible d'écrire le cache d'encodages : {e}")
+
+        self.enrollment_report = [results[p] for p in paths]
+        loaded = [r for r in self.enrollment_report if r.ok]
+        names = [r.name for r in loaded]
+        if len(loaded) < len(paths):
+            print(f"⚠️  {len(paths) - len(loaded)} photo(s) ignorée(s) (voir failed_images)")
         print(f"✅ {len(names)} étudiant(s) chargé(s) : {names}")
-        return np.array(encodings), names
+        return self._make_gallery(
+            np.array([r.encoding for r in loaded]), names, [r.path for r in loaded]
+        )
+
+    def _make_gallery(self, encodings: np.ndarray, names: list[str], paths: list[str]) -> Gallery:
+        encodings = np.asarray(encodings, dtype=np.float64).reshape(-1, 128)
+        matcher = create_matcher(self.matcher_kind, encodings, **self.matcher_options)
+        return Gallery(encodings, names, paths, matcher)
+
+    # ------------------------------------------------------------------
+    # Mise à jour à chaud de la galerie
+    # ------------------------------------------------------------------
+    def set_gallery(self, encodings: np.ndarray, names: list[str], paths: list[str] | None = None):
+        """Publie une galerie construite ailleurs (les encodages ne sont pas copiés)."""
+        gallery = self._make_gallery(encodings, names, paths or list(names))
+        with self._write_lock:
+            self._gallery = gallery
+
+    def add_student(self, path: str) -> EnrollmentResult:
+        """
+        Encode une photo et publie une nouvelle galerie qui la contient.
+        Si la photo remplace un fichier déjà chargé, sa ligne est mise à jour.
+        """
+        result = encode_image(path)
+        with self._write_lock:
+            if result.ok:
+                self._gallery = self._gallery.with_entry(path, result.name, result.encoding)
+            elif path in self._gallery.paths:
+                self._gallery = self._gallery.without(path=path)
+        return result
+
+    def remove_student(self, name: str | None = None, path: str | None = None) -> str | None:
+        """
+        Retire un étudiant (toutes ses photos) ou une seule photo.
+        Retourne le nom retiré, ou None si rien ne correspondait.
+        """
+        with self._write_lock:
+            gallery = self._gallery
+            if path is not None and path in gallery.paths:
+                name = gallery.names[gallery.paths.index(path)]
+            elif name not in gallery.names:
+                return None
+            self._gallery = gallery.without(name=None if path else name, path=path)
+        return name
 
     # ------------------------------------------------------------------
     # Reconnaissance
     # ------------------------------------------------------------------
-    def _best_match(self, encoding: np.ndarray) -> tuple[str | None, float]:
+    def _best_match(
+        self, encoding: np.ndarray, gallery: Gallery | None = None
+    ) -> tuple[str | None, float]:
         """Retourne le meilleur nom et sa distance par rapport à l'encodage."""
-        if len(self.known_encodings) == 0:
+        if gallery is None:
+            gallery = self._gallery
+        idx, distance = gallery.matcher.search(encoding)
+        if idx < 0:
             return None, float("inf")
-        distances = np.linalg.norm(self.known_encodings - encoding, axis=1)
-        idx = np.argmin(distances)
-        return self.known_names[idx], float(distances[idx])
+        return gallery.names[idx], distance
+
+    def match_batch(
+        self, encodings: list[np.ndarray], k: int = 1, gallery: Gallery | None = None
+    ) -> list[list[tuple[str, float]]]:
+        """
+        Compare tous les encodages d'une frame à la galerie en un seul produit matriciel.
+        Retourne, pour chaque encodage, ses k meilleurs candidats (nom, distance).
+        """
+        if gallery is None:
+            gallery = self._gallery
+        if len(encodings) == 0:
+            return []
+        indices, distances = gallery.matcher.search_batch(np.asarray(encodings), k)
+        return [
+            [(gallery.names[i], float(d)) for i, d in zip(row_idx, row_dist) if i >= 0]
+            for row_idx, row_dist in zip(indices, distances)
+        ]
+
+    def encode_faces(self, rgb: np.ndarray, locations: list[tuple]) -> list[np.ndarray]:
+        """Encodages 128-d des visages localisés dans une image RGB."""
+        return self.encode_many([(rgb, locations)])[0]
+
+    def encode_many(self, items: list[tuple[np.ndarray, list[tuple]]]) -> list[list[np.ndarray]]:
+        """
+        Encodages de plusieurs (image RGB, visages) : avec un BatchEncoder, toutes
+        les demandes partent avant d'attendre, pour tenir dans le même lot.
+        """
+        encoder = self.batch_encoder
+        if encoder is None:
+            return [face_recognition.face_encodings(rgb, locations) for rgb, locations in items]
+        futures = [encoder.submit(rgb, locations) for rgb, locations in items]
+        return [future.result() for future in futures]
 
     def identify_faces(self, frame: np.ndarray) -> list[tuple[str, tuple]]:
         """
         Identifie les visages dans une frame.
         Retourne une liste de (nom_ou_Inconnu, (top, right, bottom, left)).
         """
+        start = time.perf_counter()
         rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        locations = face_recognition.face_locations(rgb)
-        encodings = face_recognition.face_encodings(rgb, locations)
-        results = []
+        results = self.recognize(frame, rgb, self.detect_faces(rgb))
+        if self.adaptive_scale:
+            self._adapt_scale(time.perf_counter() - start)
+        return results
+
+    def recognize(
+        self, frame: np.ndarray, rgb: np.ndarray, locations: list[tuple]
+    ) -> list[tuple[str, tuple]]:
+        """
+        Encode et identifie des visages déjà localisés (frame BGR + sa copie RGB).
+        Retourne une liste de (nom_ou_Inconnu, (top, right, bottom, left)).
+        """
+        # Une seule galerie pour toute la frame, même si une mise à jour est publiée entre-temps
+        gallery = self._gallery
+        encodings = self.encode_faces(rgb, locations)
+        matches = self.match_batch(encodings, 1, gallery)
+        results, unmatched = [], []
 
-        for (top, right, bottom, left), enc in zip(locations, encodings):
-            name, distance = self._best_match(enc)
+        for box, candidates in zip(locations, matches):
+            name, distance = candidates[0] if candidates else (None, float("inf"))
 
             # Méthode 1 : encodage direct
             if distance < self.threshold:
-                results.append((name, (top, right, bottom, left)))
+                results.append((name, box))
+            else:
+                unmatched.append(len(results))
+                results.append(("Inconnu", box))
+
+        # Méthode 2 : cascade Haar + ré-encodage des ROI, une seule fois pour toute la frame
+        if unmatched and self.haar_fallback:
+            boxes = [results[i][1] for i in unmatched]
+            for i, name in zip(unmatched, self._cascade_fallback(frame, boxes, gallery)):
+                results[i] = (name, results[i][1])
+
+        return results
+
+    # ------------------------------------------------------------------
+    # Détection multi-résolution
+    # ------------------------------------------------------------------
+    MIN_DETECTION_SCALE = 0.25
+
+    def detect_faces(self, rgb: np.ndarray) -> list[tuple]:
+        """
+        Détecte les visages sur une copie réduite de la frame (detection_scale)
+        et retourne les boîtes (top, right, bottom, left) en pleine résolution.
+        """
+        scale = self.detection_scale
+        if scale >= 1.0:
+            return face_recognition.face_locations(rgb)
+
+        small = cv2.resize(rgb, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        height, width = rgb.shape[:2]
+        return [
+            (max(0, int(top / scale)), min(width, int(right / scale)),
+             min(height, int(bottom / scale)), max(0, int(left / scale)))
+            for top, right, bottom, left in face_recognition.face_locations(small)
+        ]
+
+    def detect_faces_in(self, rgb: np.ndarray, regions: list[tuple]) -> list[tuple]:
+        """
+        Comme detect_faces, limité aux zones (top, right, bottom, left) données
+        (ex : zones changées signalées par MotionGate). Boîtes en pleine résolution.
+        Les zones sont déjà petites : elles sont analysées en pleine résolution,
+        sans detection_scale, pour ne pas passer sous la taille minimale du HOG.
+        """
+        locations = []
+        for top, right, bottom, left in regions:
+            crop = np.ascontiguousarray(rgb[top:bottom, left:right])
+            if crop.size == 0:
                 continue
+            locations.extend(
+                (t + top, r + left, b + top, l + left)
+                for t, r, b, l in face_recognition.face_locations(crop)
+            )
+        return locations
+
+    def _adapt_scale(self, elapsed: float):
+        """Ajuste detection_scale d'après la moyenne glissante du temps par frame."""
+        with self._scale_lock:
+            if self._frame_time is None:
+                self._frame_time = elapsed
+            else:
+                self._frame_time = 0.8 * self._frame_time + 0.2 * elapsed
+            if self._frame_time > 1.2 * self.target_frame_time:
+                self.detection_scale = max(self.MIN_DETECTION_SCALE, self.detection_scale * 0.85)
+            elif self._frame_time < 0.6 * self.target_frame_time:
+                self.detection_scale = min(1.0, self.detection_scale * 1.1)
+
+    # ------------------------------------------------------------------
+    # Méthode 2 : cascade Haar
+    # ------------------------------------------------------------------
+    FALLBACK_MARGIN = 0.5   # marge autour d'un visage non reconnu (fraction de sa taille)
 
-            # Méthode 2 : cascade Haar + ré-encodage de la ROI
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces_cascade = self.face_cascade.detectMultiScale(gray, 1.3, 5)
+    def _fallback_regions(self, frame_shape: tuple, boxes: list[tuple]) -> list[tuple]:
+        """Zones (x0, y0, x1, y1) à scanner : visages non reconnus élargis, fusionnés s'ils se chevauchent."""
+        height, width = frame_shape[:2]
+        regions = []
+        for top, right, bottom, left in boxes:
+            mx = int((right - left) * self.FALLBACK_MARGIN)
+            my = int((bottom - top) * self.FALLBACK_MARGIN)
+            regions.append((max(0, left - mx), max(0, top - my),
+                            min(width, right + mx), min(height, bottom + my)))
 
+        # Fusion des zones qui se chevauchent : chaque pixel n'est scanné qu'une fois
+        merged = []
+        for region in regions:
+            hits = [m for m in merged if _overlaps(m, region)]
+            while hits:
+                for m in hits:
+                    merged.remove(m)
+                    region = (min(region[0], m[0]), min(region[1], m[1]),
+                              max(region[2], m[2]), max(region[3], m[3]))
+                hits = [m for m in merged if _overlaps(m, region)]
+            merged.append(region)
+        return merged
+
+    def _cascade_fallback(self, frame: np.ndarray, boxes: list[tuple], gallery: Gallery) -> list[str]:
+        """
+        Recherche de secours pour les visages non reconnus.
+        La cascade ne tourne que sur les zones proches de ces visages, et chaque
+        ROI détectée n'est encodée qu'une fois puis partagée entre tous.
+        """
+        rois = []   # (x0, y0, x1, y1) en coordonnées frame
+        for x0, y0, x1, y1 in self._fallback_regions(frame.shape, boxes):
+            gray = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+            with self._cascade_lock:
+                found = self.face_cascade.detectMultiScale(gray, 1.3, 5)
+            for (x, y, w, h) in found:
+                rois.append((x0 + x, y0 + y, x0 + x + w, y0 + y + h))
+
+        # Un visage par ROI (le premier trouvé), toutes les ROI encodées ensemble
+        encoded, items = [], []
+        for x0, y0, x1, y1 in rois:
+            roi = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2RGB)
+            locations = face_recognition.face_locations(roi)
+            if locations:
+                encoded.append((x0, y0, x1, y1))
+                items.append((roi, locations[:1]))
+        roi_encodings = [encodings[0] for encodings in self.encode_many(items)]
+        roi_matches = self.match_batch(roi_encodings, 1, gallery)
+
+        names = []
+        regions = [self._fallback_regions(frame.shape, [box])[0] for box in boxes]
+        for region in regions:
             best_name, best_dist = "Inconnu", float("inf")
-            for (x, y, w, h) in faces_cascade:
-                roi = cv2.cvtColor(frame[y: y + h, x: x + w], cv2.COLOR_BGR2RGB)
-                roi_enc = face_recognition.face_encodings(roi)
-                if roi_enc:
-                    candidate, dist = self._best_match(roi_enc[0])
-                    if dist < best_dist:
-                        best_dist = dist
-                        best_name = candidate
-
-            final_name = best_name if best_dist < self.threshold else "Inconnu"
-            results.append((final_name, (top, right, bottom, left)))
+            for roi, candidates in zip(encoded, roi_matches):
+                if not candidates or not _overlaps(roi, region):
+                    continue
+                candidate, dist = candidates[0]
+                if dist < best_dist:
+                    best_name, best_dist = candidate, dist
+            names.append(best_name if best_dist < self.threshold else "Inconnu")
+        return names
 
-        return results
+
+def _overlaps(a: tuple, b: tuple) -> bool:
+    """Vrai si deux rectangles (x0, y0, x1, y1) se chevauchent."""
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
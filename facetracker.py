@@ -0,0 +1,160 @@
+# facetracker.py
+
+import itertools
+import time
+import cv2
+import numpy as np
+from facerecognizer import FaceRecognizer
+
+
+def iou(a: tuple, b: tuple) -> float:
+    """Recouvrement (intersection / union) de deux boîtes (top, right, bottom, left)."""
+    top, bottom = max(a[0], b[0]), min(a[2], b[2])
+    left, right = max(a[3], b[3]), min(a[1], b[1])
+    inter = max(0, bottom - top) * max(0, right - left)
+    if inter == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[1] - a[3])
+    area_b = (b[2] - b[0]) * (b[1] - b[3])
+    return inter / float(area_a + area_b - inter)
+
+
+class Track:
+    """Un visage suivi d'une frame à l'autre."""
+
+    def __init__(self, track_id: int, box: tuple):
+        self.id = track_id
+        self.box = box
+        self.name = "Inconnu"
+        self.hits = 0                 # identifications successives concordantes
+        self.missed = 0               # détections consécutives sans ce visage
+        self.encoded_box: tuple | None = None
+
+    def __repr__(self):
+        return f"Track({self.id}, {self.name}, hits={self.hits})"
+
+
+class FaceTracker:
+    """
+    Suivi des visages entre les frames pour éviter de ré-encoder en continu.
+
+    La détection complète ne tourne qu'une frame sur `detect_every` ; entre
+    deux, les noms et boîtes des pistes sont réutilisés tels quels. Lors d'une
+    détection, les boîtes sont associées aux pistes par recouvrement (IoU) et
+    seules les pistes nouvelles, non confirmées (moins de `confirm_hits`
+    identifications concordantes, ou inconnues) ou ayant trop bougé depuis
+    leur dernier encodage (IoU < `drift_iou`) sont ré-encodées.
+    """
+
+    def __init__(
+        self,
+        recognizer: FaceRecognizer,
+        detect_every: int = 5,
+        iou_threshold: float = 0.3,
+        confirm_hits: int = 2,
+        drift_iou: float = 0.5,
+        max_missed: int = 2,
+    ):
+        self.recognizer = recognizer
+        self.detect_every = max(1, detect_every)
+        self.iou_threshold = iou_threshold
+        self.confirm_hits = confirm_hits
+        self.drift_iou = drift_iou
+        self.max_missed = max_missed
+        self.tracks: list[Track] = []
+        self._ids = itertools.count(1)
+        self._frame_index = 0
+        # Compteurs : frames détectées, visages encodés, visages réutilisés
+        self.stats = {"detections": 0, "encoded": 0, "reused": 0}
+
+    def reset(self):
+        self.tracks = []
+        self._frame_index = 0
+
+    def update(self, frame: np.ndarray, regions: list[tuple] | None = None) -> list[tuple[str, tuple]]:
+        """
+        Retourne les (nom, boîte) de la frame, comme FaceRecognizer.identify_faces.
+
+        Avec `regions` (zones changées, cf. MotionGate), la détection se limite
+        à ces zones ; les pistes situées hors de toutes les zones sont
+        considérées comme re-détectées à l'identique.
+        """
+        self._frame_index += 1
+        if (self._frame_index - 1) % self.detect_every != 0:
+            self.stats["reused"] += len(self.tracks)
+            return self._results()
+
+        self.stats["detections"] += 1
+        start = time.perf_counter()
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if regions is None:
+            locations = self.recognizer.detect_faces(rgb)
+        else:
+            locations = self.recognizer.detect_faces_in(rgb, regions) + [
+                t.box for t in self.tracks
+                if t.missed == 0 and not any(iou(t.box, r) > 0 for r in regions)
+            ]
+        to_encode = self._associate(locations)
+
+        if to_encode:
+            identified = self.recognizer.recognize(frame, rgb, [t.box for t in to_encode])
+            for track, (name, _) in zip(to_encode, identified):
+                track.hits = track.hits + 1 if name == track.name else 1
+                track.name = name
+                track.encoded_box = track.box
+        # Détection complète seulement : une détection limitée à des zones est plus courte
+        if self.recognizer.adaptive_scale and regions is None:
+            self.recognizer._adapt_scale(time.perf_counter() - start)
+        self.stats["encoded"] += len(to_encode)
+        self.stats["reused"] += len(locations) - len(to_encode)
+        return self._results()
+
+    # ------------------------------------------------------------------
+    # Association détections ↔ pistes
+    # ------------------------------------------------------------------
+    def _associate(self, locations: list[tuple]) -> list[Track]:
+        """Met à jour les pistes et retourne celles qui doivent être ré-encodées."""
+        pairs = sorted(
+            ((iou(t.box, loc), ti, li)
+             for ti, t in enumerate(self.tracks)
+             for li, loc in enumerate(locations)),
+            reverse=True,
+        )
+        used_tracks, used_locs = set(), set()
+        to_encode = []
+        for score, ti, li in pairs:
+            if score < self.iou_threshold:
+                break
+            if ti in used_tracks or li in used_locs:
+                continue
+            used_tracks.add(ti)
+            used_locs.add(li)
+            track = self.tracks[ti]
+            track.box = locations[li]
+            track.missed = 0
+            if self._needs_encoding(track):
+                to_encode.append(track)
+
+        kept = []
+        for ti, track in enumerate(self.tracks):
+            if ti not in used_tracks:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    continue
+            kept.append(track)
+
+        for li, loc in enumerate(locations):
+            if li not in used_locs:
+                track = Track(next(self._ids), loc)
+                kept.append(track)
+                to_encode.append(track)
+        self.tracks = kept
+        return to_encode
+
+    def _needs_encoding(self, track: Track) -> bool:
+        if track.name == "Inconnu" or track.hits < self.confirm_hits:
+            return True
+        return iou(track.box, track.encoded_box) < self.drift_iou
+
+    def _results(self) -> list[tuple[str, tuple]]:
+        return [(t.name, t.box) for t in self.tracks if t.missed == 0]
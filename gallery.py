@@ -0,0 +1,140 @@
+# gallery.py
+
+import os
+import threading
+import numpy as np
+from matcher import ExactMatcher
+
+
+class Gallery:
+    """
+    Instantané immuable des encodages connus.
+
+    Toute modification produit un nouvel objet (copy-on-write) : un lecteur
+    qui a pris une référence sur la galerie la voit toujours entière et
+    cohérente, même si une autre est publiée pendant son traitement.
+    Le moteur de recherche (voir matcher.py) fait partie de l'instantané
+    et est reconstruit à chaque modification.
+    """
+
+    def __init__(self, encodings: np.ndarray, names: list[str], paths: list[str], matcher=None):
+        encodings = np.asarray(encodings, dtype=np.float64).reshape(-1, 128)
+        encodings.setflags(write=False)
+        self.encodings = encodings
+        self.names = list(names)
+        self.paths = list(paths)
+        self.matcher = matcher if matcher is not None else ExactMatcher(encodings)
+
+    def _derive(self, encodings: np.ndarray, names: list[str], paths: list[str]) -> "Gallery":
+        encodings = np.asarray(encodings, dtype=np.float64).reshape(-1, 128)
+        return Gallery(encodings, names, paths, self.matcher.rebuild(encodings))
+
+    def __len__(self):
+        return len(self.names)
+
+    def with_entry(self, path: str, name: str, encoding: np.ndarray) -> "Gallery":
+        """Ajoute une photo (ou remplace la ligne existante de ce fichier)."""
+        encodings = np.array(self.encodings)
+        names, paths = list(self.names), list(self.paths)
+        if path in paths:
+            idx = paths.index(path)
+            encodings[idx] = encoding
+            names[idx] = name
+        else:
+            encodings = np.vstack([encodings, encoding[np.newaxis, :]])
+            names.append(name)
+            paths.append(path)
+        return self._derive(encodings, names, paths)
+
+    def without(self, name: str | None = None, path: str | None = None) -> "Gallery":
+        """Retire toutes les photos d'un étudiant, ou une photo précise."""
+        keep = [
+            i for i, (n, p) in enumerate(zip(self.names, self.paths))
+            if not (n == name or p == path)
+        ]
+        return self._derive(
+            self.encodings[keep],
+            [self.names[i] for i in keep],
+            [self.paths[i] for i in keep],
+        )
+
+
+class GalleryWatcher:
+    """
+    Surveille le dossier des photos et met à jour la galerie à chaud.
+
+    Le dossier est scruté toutes les `interval` secondes (taille + mtime) ;
+    les photos ajoutées ou modifiées sont encodées puis publiées via
+    FaceRecognizer.add_student, les photos supprimées retirées via
+    remove_student. Si un AttendanceManager est fourni, sa liste
+    d'étudiants suit les mêmes changements.
+    """
+
+    def __init__(self, recognizer, directory: str, attendance=None, interval: float = 2.0):
+        self.recognizer = recognizer
+        self.directory = directory
+        self.attendance = attendance
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        if not os.path.isdir(self.directory):
+            return {}
+        snapshot = {}
+        for filename in self.recognizer._list_images(self.directory):
+            path = os.path.join(self.directory, filename)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def poll(self):
+        """Applique les changements survenus depuis le dernier passage."""
+        current = self._scan()
+        for path in self._snapshot.keys() - current.keys():
+            # Encodage déjà retiré (photo illisible au passage précédent) : nom d'après le fichier
+            name = self.recognizer.remove_student(path=path)
+            self._forget(name or os.path.splitext(os.path.basename(path))[0])
+        for path, stamp in list(current.items()):
+            if self._snapshot.get(path) == stamp:
+                continue
+            result = self.recognizer.add_student(path)
+            if result.ok:
+                if self.attendance:
+                    self.attendance.add_student(result.name)
+                continue
+            if result.error != result.NO_FACE:
+                # Fichier probablement en cours de copie : nouvel essai au prochain passage.
+                # Un chemin déjà connu garde son ancienne empreinte, pour qu'une
+                # suppression ultérieure soit encore vue.
+                if path in self._snapshot:
+                    current[path] = self._snapshot[path]
+                else:
+                    del current[path]
+            # Photo remplacée sans visage ou illisible : l'encodage a pu disparaître
+            self._forget(result.name)
+        self._snapshot = current
+
+    def _forget(self, name: str):
+        """Retire de la liste un étudiant qui n'a plus aucun encodage dans la galerie."""
+        if self.attendance and name not in self.recognizer.known_names:
+            self.attendance.remove_student(name)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"⚠️  Surveillance de la galerie : {e}")
@@ -0,0 +1,227 @@
+# matcher.py
+
+import numpy as np
+
+
+class ExactMatcher:
+    """
+    Recherche exacte du plus proche encodage.
+
+    Les normes au carré de la galerie sont précalculées :
+    ||g - q||² = ||g||² - 2 g·q + ||q||², soit un seul produit
+    matrice-vecteur par requête (matrice-matrice pour un lot),
+    sans temporaire (N, 128). `dtype=np.float32` divise par deux
+    la mémoire lue à chaque recherche.
+    """
+
+    kind = "exact"
+    BLOCK = 64   # requêtes traitées par produit matriciel (borne la matrice M x N)
+
+    def __init__(self, encodings: np.ndarray, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self.encodings = np.ascontiguousarray(encodings, dtype=self.dtype).reshape(-1, 128)
+        self.sq_norms = np.einsum("ij,ij->i", self.encodings, self.encodings)
+
+    def search(self, encoding: np.ndarray) -> tuple[int, float]:
+        """Retourne (indice, distance) du plus proche voisin ; (-1, inf) si galerie vide."""
+        if len(self.encodings) == 0:
+            return -1, float("inf")
+        encoding = np.asarray(encoding, dtype=self.dtype)
+        d2 = self.sq_norms - 2.0 * (self.encodings @ encoding)
+        idx = int(np.argmin(d2))
+        return idx, _distance(d2[idx], encoding)
+
+    def search_batch(self, queries: np.ndarray, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Recherche les k plus proches voisins de chaque requête en un produit matriciel.
+        Retourne (indices (M, k), distances (M, k)), triés par distance croissante ;
+        les places vides sont remplies avec -1 / inf.
+        """
+        queries = np.asarray(queries, dtype=self.dtype).reshape(-1, 128)
+        indices = np.full((len(queries), k), -1, dtype=np.intp)
+        distances = np.full((len(queries), k), np.inf)
+        if len(self.encodings) == 0:
+            return indices, distances
+
+        for start in range(0, len(queries), self.BLOCK):
+            block = queries[start:start + self.BLOCK]
+            d2 = self.sq_norms[np.newaxis, :] - 2.0 * (block @ self.encodings.T)
+            d2 += np.einsum("ij,ij->i", block, block)[:, np.newaxis]
+            idx, dist = _top_k(d2, k)
+            indices[start:start + len(block), :idx.shape[1]] = idx
+            distances[start:start + len(block), :idx.shape[1]] = dist
+        return indices, distances
+
+    def rebuild(self, encodings: np.ndarray) -> "ExactMatcher":
+        return ExactMatcher(encodings, self.dtype)
+
+
+class IVFMatcher:
+    """
+    Index approximatif par partition k-means (IVF), en NumPy pur.
+
+    La galerie est répartie en `nlist` groupes autour de centroïdes ;
+    une requête n'est comparée qu'aux encodages des `nprobe` groupes
+    les plus proches. En dessous de `min_size` encodages, la recherche
+    reste exacte (l'index n'apporterait rien).
+    """
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        encodings: np.ndarray,
+        nlist: int | None = None,
+        nprobe: int = 8,
+        min_size: int = 2000,
+        iterations: int = 10,
+        centroids: np.ndarray | None = None,
+        seed: int = 0,
+        dtype=np.float64,
+    ):
+        self.nprobe = nprobe
+        self.min_size = min_size
+        self.iterations = iterations
+        self.seed = seed
+        self.nlist = nlist
+        self._exact = ExactMatcher(encodings, dtype)
+        self.dtype = self._exact.dtype
+        self.encodings = self._exact.encodings
+        self.trained_size = len(encodings)
+        self.centroids = None
+        if len(encodings) < min_size:
+            return
+
+        encodings = self.encodings
+        nlist = nlist or max(1, int(np.sqrt(len(encodings))))
+        if centroids is None:
+            centroids = self._train(encodings, nlist)
+        self.centroids = np.asarray(centroids, dtype=self.dtype)
+        assign = self._nearest(encodings, self.centroids)
+        # Encodages triés par groupe : chaque liste inversée est une tranche contiguë
+        self._order = np.argsort(assign, kind="stable")
+        self._offsets = np.searchsorted(assign[self._order], np.arange(len(self.centroids) + 1))
+        self._sorted = np.ascontiguousarray(encodings[self._order])
+        self._sorted_sq = self._exact.sq_norms[self._order]
+        self._centroids_sq = np.einsum("ij,ij->i", self.centroids, self.centroids)
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+    def _train(self, encodings: np.ndarray, nlist: int) -> np.ndarray:
+        rng = np.random.default_rng(self.seed)
+        sample = encodings
+        if len(encodings) > nlist * 64:
+            sample = encodings[rng.choice(len(encodings), nlist * 64, replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            assign = self._nearest(sample, centroids)
+            for c in range(nlist):
+                members = sample[assign == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+        return centroids
+
+    @staticmethod
+    def _nearest(points: np.ndarray, centroids: np.ndarray, block: int = 8192) -> np.ndarray:
+        """Centroïde le plus proche de chaque point, par blocs pour borner la mémoire."""
+        c_sq = np.einsum("ij,ij->i", centroids, centroids)
+        assign = np.empty(len(points), dtype=np.intp)
+        for start in range(0, len(points), block):
+            stop = start + block
+            d2 = c_sq[np.newaxis, :] - 2.0 * (points[start:stop] @ centroids.T)
+            assign[start:stop] = np.argmin(d2, axis=1)
+        return assign
+
+    def rebuild(self, encodings: np.ndarray) -> "IVFMatcher":
+        """Nouvel index pour une galerie modifiée ; centroïdes conservés tant que la taille n'a pas doublé."""
+        keep = (
+            self.centroids is not None
+            and len(encodings) <= 2 * self.trained_size
+        )
+        matcher = IVFMatcher(
+            encodings, self.nlist, self.nprobe, self.min_size, self.iterations,
+            centroids=self.centroids if keep else None, seed=self.seed, dtype=self.dtype,
+        )
+        if keep:
+            matcher.trained_size = self.trained_size
+        return matcher
+
+    # ------------------------------------------------------------------
+    # Recherche
+    # ------------------------------------------------------------------
+    def search(self, encoding: np.ndarray) -> tuple[int, float]:
+        if self.centroids is None:
+            return self._exact.search(encoding)
+        indices, distances = self.search_batch(encoding, k=1)
+        return int(indices[0, 0]), float(distances[0, 0])
+
+    def search_batch(self, queries: np.ndarray, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """Même contrat que ExactMatcher.search_batch, limité aux groupes sondés."""
+        if self.centroids is None:
+            return self._exact.search_batch(queries, k)
+
+        queries = np.asarray(queries, dtype=self.dtype).reshape(-1, 128)
+        indices = np.full((len(queries), k), -1, dtype=np.intp)
+        distances = np.full((len(queries), k), np.inf)
+        nprobe = min(self.nprobe, len(self.centroids))
+        # Choix des groupes pour tout le lot en un seul produit matriciel
+        c_d2 = self._centroids_sq[np.newaxis, :] - 2.0 * (queries @ self.centroids.T)
+        probes = np.argpartition(c_d2, nprobe - 1, axis=1)[:, :nprobe]
+
+        empty = []
+        for row, (q, q_probes) in enumerate(zip(queries, probes)):
+            positions, partial = [], []
+            for c in q_probes:
+                start, stop = self._offsets[c], self._offsets[c + 1]
+                if start == stop:
+                    continue
+                # Vues contiguës : pas de copie des encodages candidats
+                partial.append(self._sorted_sq[start:stop] - 2.0 * (self._sorted[start:stop] @ q))
+                positions.append(np.arange(start, stop))
+            if not positions:
+                empty.append(row)
+                continue
+            d2 = np.concatenate(partial)[np.newaxis, :] + float(q @ q)
+            idx, dist = _top_k(d2, k)
+            found = idx.shape[1]
+            indices[row, :found] = self._order[np.concatenate(positions)[idx[0]]]
+            distances[row, :found] = dist[0]
+        if empty:
+            # Tous les groupes sondés sont vides : recherche exacte pour ces requêtes
+            indices[empty], distances[empty] = self._exact.search_batch(queries[empty], k)
+        return indices, distances
+
+
+MATCHERS = {
+    ExactMatcher.kind: ExactMatcher,
+    IVFMatcher.kind: IVFMatcher,
+}
+
+
+def create_matcher(kind: str, encodings: np.ndarray, **options):
+    """Construit le moteur de recherche demandé ("exact" ou "ivf")."""
+    try:
+        cls = MATCHERS[kind]
+    except KeyError:
+        raise ValueError(f"Moteur de recherche inconnu : {kind!r} (choix : {', '.join(MATCHERS)})")
+    return cls(encodings, **options)
+
+
+def _distance(partial_d2: float, encoding: np.ndarray) -> float:
+    """Complète ||g||² - 2 g·q avec ||q||² et retourne la distance euclidienne."""
+    return float(np.sqrt(max(float(partial_d2) + float(encoding @ encoding), 0.0)))
+
+
+def _top_k(d2: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """k plus petites distances au carré par ligne, triées ; retourne (indices, distances)."""
+    k = min(k, d2.shape[1])
+    if k < d2.shape[1]:
+        part = np.argpartition(d2, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(d2.shape[1]), d2.shape)
+    part_d2 = np.take_along_axis(d2, part, axis=1)
+    order = np.argsort(part_d2, axis=1, kind="stable")
+    idx = np.take_along_axis(part, order, axis=1)
+    dist = np.sqrt(np.maximum(np.take_along_axis(part_d2, order, axis=1), 0.0))
+    return idx, dist
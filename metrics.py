@@ -0,0 +1,304 @@
+# metrics.py
+
+import bisect
+import collections
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Bornes des histogrammes de latence (secondes) et du nombre de visages par frame
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FACE_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+
+
+class Histogram:
+    """
+    Histogramme cumulatif à bornes fixes (format Prometheus), sûr entre threads.
+    Les centiles sont calculés exactement sur les `window` dernières valeurs.
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS, window: int = 512):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # dernier : au-delà de la plus grande borne
+        self.sum = 0.0
+        self.count = 0
+        self._recent = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+            self._recent.append(value)
+
+    def percentile(self, p: float) -> float:
+        """p-ième centile des valeurs récentes (0.0 si aucune)."""
+        with self._lock:
+            recent = sorted(self._recent)
+        if not recent:
+            return 0.0
+        return recent[min(len(recent) - 1, int(p / 100 * len(recent)))]
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Metrics:
+    """
+    Registre de mesures : histogrammes et compteurs nommés, avec étiquettes.
+
+    Rien n'est mesuré tant qu'instrument() n'a pas été appelé : les objets
+    gardent alors leurs méthodes d'origine et le coût est strictement nul.
+    """
+
+    PREFIX = "presence"
+    HELP = {
+        "stage_seconds": "Durée de chaque étage de traitement",
+        "faces_per_frame": "Visages détectés par frame analysée",
+        "frames_total": "Frames passées par la détection",
+        "frames_skipped_total": "Frames sans détection (rien n'a bougé, MotionGate)",
+        "faces_total": "Visages détectés",
+        "fallback_runs_total": "Passages de la cascade Haar de secours",
+        "fallback_hits_total": "Visages identifiés par la cascade Haar",
+        "db_flushes_total": "Écritures groupées en base",
+        "db_rows_total": "Lignes de présence écrites en base",
+    }
+
+    def __init__(self):
+        self._histograms: dict[tuple, Histogram] = {}
+        self._counters: dict[tuple, Counter] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return (name, tuple(sorted(labels.items())))
+
+    def histogram(self, name: str, buckets: tuple = LATENCY_BUCKETS, **labels) -> Histogram:
+        key = self._key(name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(buckets))
+        return histogram
+
+    def counter(self, name: str, **labels) -> Counter:
+        key = self._key(name, labels)
+        counter = self._counters.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(key, Counter())
+        return counter
+
+    def stage(self, stage: str) -> Histogram:
+        return self.histogram("stage_seconds", stage=stage)
+
+    # ------------------------------------------------------------------
+    # Exposition
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _labels(labels: tuple, **extra) -> str:
+        pairs = list(labels) + list(extra.items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    def render(self) -> str:
+        """Texte au format d'exposition Prometheus (version 0.0.4)."""
+        lines = []
+        families: dict[str, list] = {}
+        for (name, labels), histogram in sorted(self._histograms.items()):
+            families.setdefault(name, []).append((labels, histogram))
+        for name, entries in families.items():
+            full = f"{self.PREFIX}_{name}"
+            lines.append(f"# HELP {full} {self.HELP.get(name, name)}")
+            lines.append(f"# TYPE {full} histogram")
+            for labels, h in entries:
+                with h._lock:
+                    counts, total, count = list(h.counts), h.sum, h.count
+                cumulative = 0
+                for bound, n in zip(h.buckets + (float("inf"),), counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{full}_bucket{self._labels(labels, le=le)} {cumulative}")
+                lines.append(f"{full}_sum{self._labels(labels)} {total}")
+                lines.append(f"{full}_count{self._labels(labels)} {count}")
+            # Centiles récents, en jauges à part (les histogrammes Prometheus n'en portent pas)
+            for q in (50, 95, 99):
+                lines.append(f"# TYPE {full}_p{q} gauge")
+                for labels, h in entries:
+                    lines.append(f"{full}_p{q}{self._labels(labels)} {h.percentile(q)}")
+
+        counters: dict[str, list] = {}
+        for (name, labels), counter in sorted(self._counters.items()):
+            counters.setdefault(name, []).append((labels, counter))
+        for name, entries in counters.items():
+            full = f"{self.PREFIX}_{name}"
+            lines.append(f"# HELP {full} {self.HELP.get(name, name)}")
+            lines.append(f"# TYPE {full} counter")
+            for labels, counter in entries:
+                lines.append(f"{full}{self._labels(labels)} {counter.value}")
+        return "\n".join(lines) + "\n"
+
+    OVERLAY_STAGES = (("capture", "cap"), ("detect", "det"), ("encode", "enc"),
+                      ("match", "match"), ("fallback", "haar"), ("db_flush", "db"))
+
+    def overlay_text(self) -> str:
+        """Résumé court (médiane en ms par étage) pour l'incrustation à côté de l'horloge."""
+        parts = []
+        for stage, short in self.OVERLAY_STAGES:
+            histogram = self._histograms.get(self._key("stage_seconds", {"stage": stage}))
+            if histogram is not None and histogram.count:
+                parts.append(f"{short} {histogram.percentile(50) * 1000:.0f}")
+        return " | ".join(parts) + (" ms" if parts else "")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Instrumentation : remplacement des méthodes sur les instances seulement
+# ─────────────────────────────────────────────────────────────────────────────
+def _wrap(obj, method: str, histogram: Histogram, after=None):
+    original = getattr(obj, method)
+    perf_counter = time.perf_counter
+
+    def timed(*args, **kwargs):
+        start = perf_counter()
+        result = original(*args, **kwargs)
+        histogram.observe(perf_counter() - start)
+        if after is not None:
+            after(result)
+        return result
+
+    timed.__wrapped__ = original
+    setattr(obj, method, timed)
+
+
+def instrument(metrics: Metrics, recognizer=None, processor=None, attendance=None, renderer=None) -> Metrics:
+    """
+    Branche les mesures sur les objets fournis (FaceRecognizer, VideoProcessor,
+    AttendanceManager, FrameRenderer). uninstrument() rétablit les méthodes
+    d'origine.
+    """
+    if recognizer is not None:
+        faces_hist = metrics.histogram("faces_per_frame", FACE_BUCKETS)
+        frames, faces = metrics.counter("frames_total"), metrics.counter("faces_total")
+        runs, hits = metrics.counter("fallback_runs_total"), metrics.counter("fallback_hits_total")
+
+        def after_detect(locations):
+            frames.inc()
+            faces.inc(len(locations))
+            faces_hist.observe(len(locations))
+
+        def after_fallback(names):
+            runs.inc()
+            hits.inc(sum(1 for n in names if n != "Inconnu"))
+
+        _wrap(recognizer, "detect_faces", metrics.stage("detect"), after_detect)
+        _wrap(recognizer, "detect_faces_in", metrics.stage("detect"), after_detect)
+        _wrap(recognizer, "encode_faces", metrics.stage("encode"))
+        _wrap(recognizer, "match_batch", metrics.stage("match"))
+        _wrap(recognizer, "_cascade_fallback", metrics.stage("fallback"), after_fallback)
+
+    if processor is not None:
+        _wrap(processor, "_read", metrics.stage("capture"))
+        _wrap(processor, "_recognize", metrics.stage("recognize"))
+        _wrap(processor, "_annotate", metrics.stage("annotate"))
+        gate = getattr(processor, "gate", None)
+        if gate is not None:
+            skipped = metrics.counter("frames_skipped_total")
+
+            def after_gate(decision):
+                if decision[0] == "skip":
+                    skipped.inc()
+
+            _wrap(gate, "check", metrics.stage("motion"), after_gate)
+
+    if attendance is not None:
+        flushes, rows_written = metrics.counter("db_flushes_total"), metrics.counter("db_rows_total")
+        histogram = metrics.stage("db_flush")
+        original = attendance.db.save_many
+
+        def save_many(rows):
+            start = time.perf_counter()
+            original(rows)
+            histogram.observe(time.perf_counter() - start)
+            flushes.inc()
+            rows_written.inc(len(rows))
+
+        save_many.__wrapped__ = original
+        attendance.db.save_many = save_many
+
+    if renderer is not None:
+        _wrap(renderer, "submit", metrics.stage("render_prepare"))
+        shown = renderer.shown
+        show_hist = metrics.stage("render_show")
+
+        def shown_timed(seconds):
+            show_hist.observe(seconds)
+            shown(seconds)
+
+        shown_timed.__wrapped__ = shown
+        renderer.shown = shown_timed
+    return metrics
+
+
+def uninstrument(*objects):
+    """Retire les mesures posées par instrument() (les méthodes de classe reprennent la main)."""
+    for obj in objects:
+        for target in (obj, getattr(obj, "db", None), getattr(obj, "gate", None)):
+            if target is None:
+                continue
+            for name, value in list(vars(target).items()):
+                if callable(value) and hasattr(value, "__wrapped__"):
+                    delattr(target, name)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Serveur HTTP local
+# ─────────────────────────────────────────────────────────────────────────────
+class MetricsServer:
+    """Sert Metrics.render() sur http://host:port/metrics dans un thread de fond."""
+
+    def __init__(self, metrics: Metrics, host: str = "127.0.0.1", port: int = 9108):
+        registry = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="metrics-http", daemon=True)
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def start(self):
+        self._thread.start()
+        host, port = self.address
+        print(f"📈 Mesures disponibles sur http://{host}:{port}/metrics")
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,153 @@
+# motiongate.py
+
+import time
+
+import cv2
+import numpy as np
+
+from metrics import Histogram
+
+SKIP, REGIONS, FULL = "skip", "regions", "full"
+
+
+def overlaps(a: tuple, b: tuple) -> bool:
+    """Vrai si deux boîtes (top, right, bottom, left) se touchent."""
+    return a[0] <= b[2] and b[0] <= a[2] and a[3] <= b[1] and b[3] <= a[1]
+
+
+def merge_boxes(boxes: list[tuple]) -> list[tuple]:
+    """Fusionne les boîtes (top, right, bottom, left) qui se chevauchent."""
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        out = []
+        for box in boxes:
+            for i, other in enumerate(out):
+                if overlaps(box, other):
+                    out[i] = (min(box[0], other[0]), max(box[1], other[1]),
+                              max(box[2], other[2]), min(box[3], other[3]))
+                    merged = True
+                    break
+            else:
+                out.append(box)
+        boxes = out
+    return boxes
+
+
+class MotionGate:
+    """
+    Pré-étage peu coûteux qui décide si une frame mérite une détection.
+
+    La frame est réduite à `width` pixels de large, passée en niveaux de gris
+    et floutée, puis comparée à un fond moyen glissant (accumulateWeighted,
+    poids `alpha`) : un pixel a changé si l'écart dépasse `threshold` (0-255).
+    Les zones changées de moins de `min_area` (fraction de l'image) sont du
+    bruit. check() retourne :
+
+    - ("skip", [])         rien n'a bougé : les détections précédentes restent valables ;
+    - ("regions", boîtes)  seules ces zones (pleine résolution, élargies de
+                           `margin` × largeur) sont à re-détecter ;
+    - ("full", [])         changement étendu (plus de `full_area` de l'image, plus
+                           de `max_regions` zones), première frame, ou rafraîchissement
+                           forcé toutes les `refresh` secondes.
+
+    Une personne immobile finit par se fondre dans le fond (en ~1/alpha
+    frames) : sa dernière annotation est alors réutilisée telle quelle.
+    """
+
+    def __init__(
+        self,
+        width: int = 160,
+        threshold: int = 25,
+        min_area: float = 0.002,
+        full_area: float = 0.3,
+        max_regions: int = 4,
+        alpha: float = 0.05,
+        margin: float = 0.05,
+        refresh: float = 10.0,
+    ):
+        self.width = width
+        self.threshold = threshold
+        self.min_area = min_area
+        self.full_area = full_area
+        self.max_regions = max_regions
+        self.alpha = alpha
+        self.margin = margin
+        self.refresh = refresh
+        self._background: np.ndarray | None = None
+        self._last_full = 0.0
+        self._kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        # Mesures
+        self.counts = {SKIP: 0, REGIONS: 0, FULL: 0}
+        self.changed = 0.0                # fraction changée de la dernière frame
+        self.cost = Histogram()           # durée de check(), en secondes
+
+    def reset(self):
+        """Oublie le fond : la prochaine frame passe en détection complète."""
+        self._background = None
+
+    def check(self, frame: np.ndarray) -> tuple[str, list[tuple]]:
+        """Décision pour une frame BGR : (mode, boîtes à re-détecter)."""
+        start = time.perf_counter()
+        decision = self._decide(frame)
+        self.cost.observe(time.perf_counter() - start)
+        self.counts[decision[0]] += 1
+        return decision
+
+    def _decide(self, frame: np.ndarray) -> tuple[str, list[tuple]]:
+        height, width = frame.shape[:2]
+        scale = self.width / width if width > self.width else 1.0
+        small = cv2.resize(frame, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+        now = time.monotonic()
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray.astype(np.float32)
+            self._last_full = now
+            self.changed = 1.0
+            return FULL, []
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        cv2.accumulateWeighted(gray, self._background, self.alpha)
+        mask = cv2.dilate(cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY)[1],
+                          self._kernel, iterations=2)
+        total = mask.shape[0] * mask.shape[1]
+        _, _, components, _ = cv2.connectedComponentsWithStats(mask)
+
+        pad = self.margin * mask.shape[1]
+        boxes, changed = [], 0
+        for x, y, w, h, area in components[1:]:
+            if area < self.min_area * total:
+                continue
+            changed += area
+            boxes.append((
+                max(0, int((y - pad) / scale)), min(width, int((x + w + pad) / scale)),
+                min(height, int((y + h + pad) / scale)), max(0, int((x - pad) / scale)),
+            ))
+        self.changed = changed / total
+
+        if self.refresh and now - self._last_full >= self.refresh:
+            self._last_full = now
+            return FULL, []
+        if not boxes:
+            return SKIP, []
+        boxes = merge_boxes(boxes)
+        covered = sum((b[2] - b[0]) * (b[1] - b[3]) for b in boxes) / (width * height)
+        if covered > self.full_area or len(boxes) > self.max_regions:
+            self._last_full = now
+            return FULL, []
+        return REGIONS, boxes
+
+    def stats(self) -> dict:
+        """Frames ignorées / limitées à des zones / complètes, et coût du pré-étage."""
+        frames = sum(self.counts.values())
+        return {
+            "frames": frames,
+            "skipped": self.counts[SKIP],
+            "regions": self.counts[REGIONS],
+            "full": self.counts[FULL],
+            "skip_ratio": self.counts[SKIP] / frames if frames else 0.0,
+            "changed": self.changed,
+            "gate_ms": 1000 * self.cost.percentile(50),
+        }
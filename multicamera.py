@@ -0,0 +1,282 @@
+# multicamera.py
+
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+from facerecognizer import FaceRecognizer
+from batchencoder import BatchEncoder
+from attendancemanager import AttendanceManager
+from videoprocessor import VideoProcessor
+
+
+class SightingDeduplicator:
+    """
+    Regroupe les détections d'un même étudiant par plusieurs caméras.
+
+    Une détection n'est transmise que si l'étudiant n'a été vu par aucune
+    caméra depuis `window` secondes.
+    """
+
+    def __init__(self, window: float = 5.0):
+        self.window = window
+        self._last_seen: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.accepted = 0
+        self.duplicates = 0
+
+    def accept(self, name: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_seen.get(name)
+            self._last_seen[name] = now
+            if last is not None and now - last < self.window:
+                self.duplicates += 1
+                return False
+            self.accepted += 1
+            return True
+
+
+class _DedupAttendance:
+    """Intermédiaire entre un VideoProcessor et l'AttendanceManager partagé."""
+
+    def __init__(self, attendance: AttendanceManager, dedup: SightingDeduplicator):
+        self.attendance = attendance
+        self.dedup = dedup
+
+    def process_presence(self, name: str, entry_time: str):
+        if self.dedup.accept(name):
+            self.attendance.process_presence(name, entry_time)
+
+
+class _QueueAttendance:
+    """Côté processus caméra : les présences sont renvoyées au processus principal."""
+
+    def __init__(self, sightings: mp.Queue, source: str):
+        self.sightings = sightings
+        self.source = source
+        self._day: str | None = None
+        self._reported: set[str] = set()
+
+    def process_presence(self, name: str, entry_time: str):
+        # Un étudiant déjà signalé ce jour-là par cette caméra n'est pas renvoyé ;
+        # au changement de date, tous le sont de nouveau une fois
+        if entry_time[:10] != self._day:
+            self._day = entry_time[:10]
+            self._reported = set()
+        if name not in self._reported:
+            self._reported.add(name)
+            self.sightings.put((self.source, name, entry_time))
+
+
+def _camera_worker(source, url, shm_name, shape, names, threshold, options,
+                   sightings, stop_event):
+    """Boucle d'un processus caméra : capture + reconnaissance sur la galerie partagée."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    encodings = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    recognizer = FaceRecognizer(None, threshold, **options["recognizer"])
+    recognizer.set_gallery(encodings, names)
+    processor = VideoProcessor(
+        recognizer, _QueueAttendance(sightings, source), url=url, **options["processor"]
+    )
+    try:
+        while not stop_event.is_set():
+            ret, frame = processor._read()
+            captured_at = time.time()
+            if not ret:
+                print(f"❌ [{source}] Impossible de lire le flux {url}")
+                break
+            processor._recognize(frame, captured_at)
+    finally:
+        processor.cap.release()
+        del recognizer, processor, encodings
+        try:
+            shm.close()
+        except BufferError:
+            pass   # une vue subsiste encore : libérée à la sortie du processus
+
+
+class MultiCameraManager:
+    """
+    Fait tourner plusieurs caméras en parallèle sur une galerie et un
+    AttendanceManager communs.
+
+    - mode "threads"   : un VideoProcessor threadé par caméra dans ce processus ;
+                         les frames annotées restent disponibles via get_frame().
+    - mode "processes" : un processus par caméra (sans affichage) ; la matrice
+                         des encodages est placée une seule fois en mémoire
+                         partagée et chaque processus la lit sans copie. Les
+                         présences remontent par une file vers ce processus.
+
+    Dans les deux modes, les détections d'un même étudiant par plusieurs
+    caméras sont regroupées (SightingDeduplicator). En mode processus, la
+    galerie est figée au démarrage : un ajout à chaud nécessite restart().
+
+    En mode threads, `batch_encoding` (dict d'options de BatchEncoder, {} pour
+    les valeurs par défaut) regroupe les encodages de toutes les caméras en
+    micro-lots sur le FaceRecognizer commun. Dans les deux modes, `motion_gate`
+    (dict d'options de MotionGate, {} pour les valeurs par défaut) évite la
+    détection sur les frames où rien ne bouge.
+    """
+
+    def __init__(
+        self,
+        recognizer: FaceRecognizer,
+        attendance: AttendanceManager,
+        sources: dict[str, str | int],
+        mode: str = "threads",
+        dedup_window: float = 5.0,
+        tracking: bool = True,
+        detect_every: int = 5,
+        batch_encoding: dict | None = None,
+        motion_gate: dict | None = None,
+    ):
+        if mode not in ("threads", "processes"):
+            raise ValueError(f"Mode inconnu : {mode!r} (choix : threads, processes)")
+        self.recognizer = recognizer
+        self.attendance = attendance
+        self.sources = dict(sources)
+        self.mode = mode
+        self.dedup = SightingDeduplicator(dedup_window)
+        self.tracking = tracking
+        self.detect_every = detect_every
+        self.batch_encoding = batch_encoding
+        self.motion_gate = motion_gate
+        self.processors: dict[str, VideoProcessor] = {}
+        self._processes: dict[str, mp.Process] = {}
+        self._shm: shared_memory.SharedMemory | None = None
+        self._stop = None
+        self._collector: threading.Thread | None = None
+
+    # ------------------------------------------------------------------
+    # Cycle de vie
+    # ------------------------------------------------------------------
+    def start(self):
+        if self.mode == "threads":
+            self._start_threads()
+        else:
+            self._start_processes()
+        print(f"🎥 {len(self.sources)} caméra(s) démarrée(s) en mode {self.mode}")
+
+    def stop(self):
+        if self.mode == "threads":
+            processors, self.processors = self.processors, {}
+            try:
+                for source, processor in processors.items():
+                    # Une caméra qui refuse de s'arrêter ne retient pas les autres
+                    try:
+                        processor.stop(windows=False)
+                    except Exception as e:
+                        print(f"❌ [{source}] Arrêt impossible : {e}")
+            finally:
+                encoder = self.recognizer.batch_encoder
+                if self.batch_encoding is not None and encoder is not None:
+                    self.recognizer.batch_encoder = None
+                    encoder.close()
+            return
+
+        if self._stop is None:
+            return    # jamais démarré
+        self._stop.set()
+        for process in self._processes.values():
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+        self._processes = {}
+        if self._collector:
+            self._collector.join(2)
+        if self._shm:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    # ------------------------------------------------------------------
+    # Mode threads
+    # ------------------------------------------------------------------
+    def _start_threads(self):
+        sink = _DedupAttendance(self.attendance, self.dedup)
+        if self.batch_encoding is not None:
+            self.recognizer.batch_encoder = BatchEncoder(**self.batch_encoding)
+        for source, url in self.sources.items():
+            processor = VideoProcessor(
+                self.recognizer, sink, tracking=self.tracking,
+                detect_every=self.detect_every, threaded=True, url=url,
+                motion_gate=self.motion_gate,
+            )
+            processor.start()
+            self.processors[source] = processor
+
+    def get_frame(self, source: str, timeout: float = 0.0):
+        """Dernière frame annotée d'une caméra (mode threads), ou None."""
+        processor = self.processors.get(source)
+        if processor is None or processor.pipeline is None:
+            return None
+        return processor.pipeline.get(timeout)
+
+    # ------------------------------------------------------------------
+    # Mode processus
+    # ------------------------------------------------------------------
+    def _start_processes(self):
+        gallery = self.recognizer.gallery
+        encodings = np.ascontiguousarray(gallery.encodings, dtype=np.float64)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, encodings.nbytes))
+        np.ndarray(encodings.shape, dtype=np.float64, buffer=self._shm.buf)[:] = encodings
+
+        ctx = mp.get_context("spawn")
+        self._stop = ctx.Event()
+        sightings = ctx.Queue()
+        options = {
+            "recognizer": self.recognizer.worker_options(),
+            "processor": {"tracking": self.tracking, "detect_every": self.detect_every,
+                          "motion_gate": self.motion_gate},
+        }
+        for source, url in self.sources.items():
+            process = ctx.Process(
+                target=_camera_worker, name=f"camera-{source}", daemon=True,
+                args=(source, url, self._shm.name, encodings.shape, list(gallery.names),
+                      self.recognizer.threshold, options, sightings, self._stop),
+            )
+            process.start()
+            self._processes[source] = process
+
+        self._collector = threading.Thread(
+            target=self._collect, args=(sightings,), daemon=True
+        )
+        self._collector.start()
+
+    def _collect(self, sightings: mp.Queue):
+        """Applique au gestionnaire commun les présences remontées par les caméras."""
+        while not self._stop.is_set() or not sightings.empty():
+            try:
+                source, name, entry_time = sightings.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if self.dedup.accept(name):
+                self.attendance.process_presence(name, entry_time)
+
+    # ------------------------------------------------------------------
+    # Statistiques
+    # ------------------------------------------------------------------
+    def stats(self) -> dict:
+        cameras = {}
+        if self.mode == "threads":
+            for source, processor in self.processors.items():
+                cameras[source] = processor.pipeline_stats()
+        else:
+            for source, process in self._processes.items():
+                cameras[source] = {"alive": process.is_alive()}
+        stats = {
+            "cameras": cameras,
+            "sightings": self.dedup.accepted,
+            "duplicates": self.dedup.duplicates,
+        }
+        if self.recognizer.batch_encoder is not None:
+            stats["batch_encoding"] = self.recognizer.batch_encoder.stats()
+        return stats
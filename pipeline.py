@@ -0,0 +1,165 @@
+# pipeline.py
+
+import collections
+import threading
+import time
+
+
+class DropOldestQueue:
+    """
+    File bornée entre deux étages du pipeline.
+
+    Quand elle est pleine, l'élément le plus ancien est jeté au profit du
+    nouveau : le consommateur travaille toujours sur les données les plus
+    récentes au lieu d'accumuler du retard.
+    """
+
+    def __init__(self, maxsize: int = 1):
+        self.maxsize = max(1, maxsize)
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self.put_count += 1
+            self._cond.notify()
+
+    def get(self, timeout: float | None = None):
+        """Retourne l'élément le plus ancien, ou None si délai écoulé / file fermée."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout):
+                return None
+            return self._items.popleft() if self._items else None
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+class CapturePipeline:
+    """
+    Pipeline de capture découplé en trois étages, chacun dans son thread :
+
+      capture ──► [frames] ──► reconnaissance ──► [detections] ──► annotation ──► [output]
+
+    L'étage de capture lit la caméra en continu et ne garde que la dernière
+    frame, si bien que la reconnaissance travaille toujours sur l'image la
+    plus récente au lieu de vider un tampon réseau en retard. Toutes les
+    files sont bornées et jettent leur élément le plus ancien quand elles
+    débordent ; profondeurs et pertes sont exposées par stats().
+    """
+
+    def __init__(self, processor, queue_size: int = 1):
+        self.processor = processor
+        self.frames = DropOldestQueue(1)
+        self.detections = DropOldestQueue(queue_size)
+        self.output = DropOldestQueue(queue_size)
+        self._threads: list[threading.Thread] = []
+        self._running = threading.Event()
+        self.ended = False
+        self._processed = {"capture": 0, "recognition": 0, "annotation": 0}
+
+    # ------------------------------------------------------------------
+    # Cycle de vie
+    # ------------------------------------------------------------------
+    def start(self):
+        self._running.set()
+        self.ended = False
+        for name, target in (
+            ("capture", self._capture_loop),
+            ("recognition", self._recognition_loop),
+            ("annotation", self._annotation_loop),
+        ):
+            thread = threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 2.0):
+        self._running.clear()
+        for q in (self.frames, self.detections, self.output):
+            q.close()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def get(self, timeout: float | None = 1.0):
+        """Dernière frame annotée disponible (None si rien dans le délai ou flux terminé)."""
+        return self.output.get(timeout)
+
+    # ------------------------------------------------------------------
+    # Étages
+    # ------------------------------------------------------------------
+    def _capture_loop(self):
+        while self._running.is_set():
+            ret, frame = self.processor._read()
+            if not ret:
+                print("❌ Impossible de lire la webcam.")
+                self.ended = True
+                break
+            self.frames.put((time.time(), frame))
+            self._processed["capture"] += 1
+        self.frames.close()
+
+    def _recognition_loop(self):
+        while self._running.is_set():
+            item = self.frames.get(timeout=0.5)
+            if item is None:
+                if self.frames.closed:
+                    break
+                continue
+            captured_at, frame = item
+            # Heure de présence = heure de capture, pas celle du traitement
+            detections = self.processor._recognize(frame, captured_at)
+            self.detections.put((captured_at, frame, detections))
+            self._processed["recognition"] += 1
+        self.detections.close()
+
+    def _annotation_loop(self):
+        while self._running.is_set():
+            item = self.detections.get(timeout=0.5)
+            if item is None:
+                if self.detections.closed:
+                    break
+                continue
+            _, frame, detections = item
+            self.output.put(self.processor._annotate(frame, detections))
+            self._processed["annotation"] += 1
+        self.output.close()
+
+    # ------------------------------------------------------------------
+    # Statistiques
+    # ------------------------------------------------------------------
+    def stats(self) -> dict:
+        """Profondeur des files, pertes et frames traitées par étage."""
+        return {
+            "capture": {"processed": self._processed["capture"]},
+            "recognition": {
+                "processed": self._processed["recognition"],
+                "queue_depth": self.frames.qsize(),
+                "dropped": self.frames.dropped,
+            },
+            "annotation": {
+                "processed": self._processed["annotation"],
+                "queue_depth": self.detections.qsize(),
+                "dropped": self.detections.dropped,
+            },
+            "output": {
+                "queue_depth": self.output.qsize(),
+                "dropped": self.output.dropped,
+            },
+        }
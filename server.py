@@ -0,0 +1,406 @@
+# server.py  —  Service HTTP de reconnaissance pour des postes distants
+#
+#   python server.py --port 8765 --workers 4
+#   python Main.py serve ...                     (même chose)
+#
+#   POST /frames?camera=porte-a      corps : image JPEG (ou PNG)
+#   GET  /records?date=YYYY-MM-DD    présences d'un jour (aujourd'hui par défaut)
+#   GET  /stats?date=...&classe=...  statistiques (globales par défaut)
+#   GET  /dates                      dates enregistrées
+#   GET  /health                     état du service et compteurs
+#
+# Serveur asyncio de la bibliothèque standard : la boucle ne fait que lire et
+# écrire les requêtes. Le décodage et la reconnaissance partent dans un pool
+# de processus (ou un thread avec --workers 1), les lectures en base dans des
+# threads. Au-delà de `max_pending` frames en cours, les nouvelles frames sont
+# refusées tout de suite (429 + Retry-After) au lieu de s'accumuler.
+#
+# Les présences sont tenues par journée : au changement de date, les absents
+# de la veille sont enregistrés et la liste repart à zéro. Une frame datée
+# d'un jour passé (`time=`) est appliquée à une liste propre à ce jour, sans
+# toucher aux étudiants qui y ont déjà une ligne.
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from student import Student
+from facerecognizer import FaceRecognizer
+from attendancemanager import AttendanceManager
+from workerpool import create_pool, on_worker, recognize_image
+
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str | None = None, headers: dict | None = None):
+        super().__init__(message or status.phrase)
+        self.status = status
+        self.headers = headers or {}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Service
+# ─────────────────────────────────────────────────────────────────────────────
+class AttendanceServer:
+    """
+    Service HTTP devant un FaceRecognizer et un AttendanceManager.
+
+    Avec `workers` > 1, la reconnaissance tourne dans autant de processus,
+    chacun avec une copie de la galerie prise au démarrage (un ajout à chaud
+    nécessite un redémarrage du service) ; avec `workers` = 1, elle tourne
+    dans un thread sur le FaceRecognizer fourni. Au plus `max_pending` frames
+    sont en cours (défaut : deux par processus) ; au-delà, réponse 429.
+
+    `attendance` tient la journée en cours (`day`) ; les jours passés rejoués
+    par `time=` ont chacun leur AttendanceManager, sans marquage d'absences :
+    au plus MAX_PAST_DAYS à la fois (le moins récemment utilisé est fermé),
+    chacun fermé après PAST_DAY_IDLE secondes sans frame.
+    """
+
+    MAX_BODY = 8 * 1024 * 1024     # taille maximale d'une frame (octets)
+    MAX_PAST_DAYS = 4              # jours passés tenus en mémoire au plus
+    PAST_DAY_IDLE = 300.0          # fermeture d'un jour passé inactif (s)
+
+    def __init__(
+        self,
+        recognizer: FaceRecognizer,
+        attendance: AttendanceManager,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        workers: int = 0,
+        max_pending: int | None = None,
+    ):
+        self.recognizer = recognizer
+        self.attendance = attendance
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.max_pending = max_pending or 2 * self.workers
+        self.pending = 0
+        self.stats = {"frames": 0, "faces": 0, "sightings": 0, "rejected": 0, "errors": 0}
+        self.day: str | None = None           # journée tenue par self.attendance
+        # Jours passés (`time=`) : date -> (gestionnaire, dernière utilisation),
+        # du moins au plus récemment utilisé
+        self._past_days: OrderedDict[str, tuple[AttendanceManager, float]] = OrderedDict()
+        self._day_lock: asyncio.Lock | None = None
+        self._pool: Executor | None = None
+        self._readers = ThreadPoolExecutor(max_workers=4, thread_name_prefix="server-db")
+        self._server: asyncio.AbstractServer | None = None
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+        self.routes = {
+            ("POST", "/frames"): self._post_frame,
+            ("GET", "/records"): self._get_records,
+            ("GET", "/stats"): self._get_stats,
+            ("GET", "/dates"): self._get_dates,
+            ("GET", "/health"): self._get_health,
+        }
+
+    # ------------------------------------------------------------------
+    # Cycle de vie
+    # ------------------------------------------------------------------
+    def _create_pool(self) -> Executor:
+        if self.workers == 1:
+            return ThreadPoolExecutor(max_workers=1, thread_name_prefix="server-recognition")
+        # Chargement des modèles avant la première requête
+        return create_pool(self.recognizer, self.workers)
+
+    async def serve(self):
+        """Démarre le service et répond jusqu'à l'annulation de la tâche."""
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        self._day_lock = asyncio.Lock()
+        self._pool = await self._loop.run_in_executor(None, self._create_pool)
+        await self._loop.run_in_executor(self._readers, self._roll_over,
+                                         datetime.date.today().isoformat())
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"🌐 Service de présence sur http://{self.host}:{self.port} "
+              f"({self.workers} worker(s), {self.max_pending} frame(s) en cours au plus)")
+        self._ready.set()
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            self._pool.shutdown(cancel_futures=True)
+            self._readers.shutdown()
+            for manager, _ in self._past_days.values():
+                manager.close()
+            self._past_days.clear()
+
+    def _run(self):
+        try:
+            asyncio.run(self.serve())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._ready.set()
+
+    def start(self, timeout: float | None = 60.0) -> "AttendanceServer":
+        """Lance le service dans un thread de fond (boucle asyncio dédiée)."""
+        self._thread = threading.Thread(target=self._run, name="attendance-server", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout)
+        if self._server is None or not self._server.is_serving():
+            raise RuntimeError("Le service de présence n'a pas démarré")
+        return self
+
+    def stop(self):
+        """Arrête le service lancé par start() (les requêtes en cours sont abandonnées)."""
+        if self._task is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join()
+
+    # ------------------------------------------------------------------
+    # HTTP/1.1 minimal (keep-alive, corps par Content-Length)
+    # ------------------------------------------------------------------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    await self._send(writer, HTTPStatus.BAD_REQUEST, {"error": "Requête invalide"},
+                                     keep_alive=False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = (version == "HTTP/1.1"
+                              and headers.get("connection", "").lower() != "close")
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._send(writer, HTTPStatus.BAD_REQUEST,
+                                     {"error": "Content-Length invalide"}, keep_alive=False)
+                    break
+                if length > self.MAX_BODY:
+                    await self._send(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                     {"error": f"Corps limité à {self.MAX_BODY} octets"},
+                                     keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                extra = {}
+                try:
+                    status, payload = await self._dispatch(method, target, body)
+                except HTTPError as e:
+                    status, payload, extra = e.status, {"error": str(e)}, e.headers
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    print(f"⚠️  Erreur sur {method} {target} : {e}")
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+                await self._send(writer, status, payload, keep_alive, extra)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _send(writer, status: HTTPStatus, payload, keep_alive: bool = True,
+                    headers: dict | None = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(self, method: str, target: str, body: bytes):
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            if any(path == url.path for _, path in self.routes):
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+            raise HTTPError(HTTPStatus.NOT_FOUND)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        return await handler(params, body)
+
+    # ------------------------------------------------------------------
+    # Routes
+    # ------------------------------------------------------------------
+    async def _post_frame(self, params: dict, body: bytes):
+        if not body:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Corps vide : image JPEG attendue")
+        # Contre-pression : une frame refusée coûte moins qu'une file qui grossit
+        if self.pending >= self.max_pending:
+            self.stats["rejected"] += 1
+            raise HTTPError(HTTPStatus.TOO_MANY_REQUESTS, "Service saturé, réessayer",
+                            {"Retry-After": "1"})
+        # Heure d'arrivée = réception de la frame (une frame refusée n'en fixe aucune)
+        stamp = params.get("time") or datetime.datetime.now().strftime(TIME_FORMAT)
+        try:
+            datetime.datetime.strptime(stamp, TIME_FORMAT)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "time attendu au format YYYY-MM-DD HH:MM:SS")
+        if stamp[:10] > datetime.date.today().isoformat():
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "time ne peut pas être dans le futur")
+
+        self.pending += 1
+        try:
+            if self.workers == 1:
+                future = self._loop.run_in_executor(self._pool, recognize_image,
+                                                    self.recognizer, body)
+            else:
+                future = self._loop.run_in_executor(self._pool, on_worker, recognize_image, body)
+            names, faces = await future
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+        finally:
+            self.pending -= 1
+
+        self.stats["frames"] += 1
+        self.stats["faces"] += faces
+        self.stats["sightings"] += len(names)
+        # Changement de date et ouverture des jours passés hors de la boucle ;
+        # le verrou retient les frames du nouveau jour jusqu'à la remise à zéro
+        async with self._day_lock:
+            attendance = await self._loop.run_in_executor(self._readers, self._attendance,
+                                                          stamp[:10])
+            for name in names:
+                attendance.process_presence(name, stamp)
+        return HTTPStatus.OK, {"camera": params.get("camera"), "time": stamp,
+                               "faces": faces, "recognized": names}
+
+    # ------------------------------------------------------------------
+    # Présences par journée
+    # ------------------------------------------------------------------
+    def _roll_over(self, date: str):
+        """Clôt la journée en cours (absents) et fait tenir `date` à self.attendance."""
+        if self.day is not None:
+            print(f"🌙 Fin de la journée du {self.day}")
+            self.attendance.process_absences(self.day)
+        self.attendance.start_day(date)
+        self.day = date
+        if date in self._past_days:
+            self._past_days.pop(date)[0].close()
+
+    def _attendance(self, date: str) -> AttendanceManager:
+        """
+        Gestionnaire de présences du jour `date` (changement de date compris).
+        Bloquant (absents de la veille, lectures en base) : appelé dans un
+        thread, sous self._day_lock.
+        """
+        now = time.monotonic()
+        self._evict_past_days(now)
+        today = datetime.date.today().isoformat()
+        if today > self.day:
+            self._roll_over(today)
+        if date == self.day:
+            return self.attendance
+        if date in self._past_days:
+            manager = self._past_days.pop(date)[0]
+        else:
+            students = [Student(n) for n in self.attendance.known_students]
+            manager = AttendanceManager(students, self.attendance.db.db_path)
+            manager.start_day(date)
+        self._past_days[date] = (manager, now)
+        while len(self._past_days) > self.MAX_PAST_DAYS:
+            self._past_days.popitem(last=False)[1][0].close()
+        return manager
+
+    def _evict_past_days(self, now: float):
+        """Ferme les jours passés inutilisés depuis plus de PAST_DAY_IDLE secondes."""
+        while self._past_days:
+            date, (manager, used) = next(iter(self._past_days.items()))
+            if now - used < self.PAST_DAY_IDLE:
+                break
+            del self._past_days[date]
+            manager.close()
+
+    async def _read(self, fn, *args):
+        """Lecture en base hors de la boucle (une connexion SQLite par thread)."""
+        return await self._loop.run_in_executor(self._readers, fn, *args)
+
+    @staticmethod
+    def _date(params: dict, default: str | None = None) -> str | None:
+        date = params.get("date", default)
+        if date is not None:
+            try:
+                datetime.date.fromisoformat(date)
+            except ValueError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "date attendue au format YYYY-MM-DD")
+        return date
+
+    async def _get_records(self, params: dict, body: bytes):
+        date = self._date(params, datetime.date.today().isoformat())
+        return HTTPStatus.OK, await self._read(self.attendance.get_records_by_date, date)
+
+    async def _get_stats(self, params: dict, body: bytes):
+        date = self._date(params)
+        return HTTPStatus.OK, await self._read(self.attendance.get_stats, date, params.get("classe"))
+
+    async def _get_dates(self, params: dict, body: bytes):
+        return HTTPStatus.OK, await self._read(self.attendance.get_dates)
+
+    async def _get_health(self, params: dict, body: bytes):
+        return HTTPStatus.OK, {
+            "status": "ok",
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "day": self.day,
+            "students": len(self.attendance.known_students),
+            **self.stats,
+        }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Service HTTP de reconnaissance et de présence.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--img", default="img", help="dossier des photos des étudiants")
+    parser.add_argument("--db", default="attendance.db")
+    parser.add_argument("--threshold", type=float, default=0.4)
+    parser.add_argument("--workers", type=int, default=0, help="0 = un processus par cœur")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="frames en cours au-delà desquelles le service répond 429")
+    parser.add_argument("--scale", type=float, default=1.0, help="échelle de détection")
+    args = parser.parse_args(argv)
+
+    recognizer = FaceRecognizer(args.img, args.threshold, workers=args.workers,
+                                detection_scale=args.scale)
+    students = [Student(n) for n in dict.fromkeys(recognizer.known_names)]
+    attendance = AttendanceManager(students, args.db)
+    server = AttendanceServer(recognizer, attendance, args.host, args.port,
+                              args.workers, args.max_pending)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        print("\n🛑 Arrêt du service")
+    finally:
+        attendance.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,10 @@ class Student:
     def mark_present(self, entry_time: str):
         self.entry_time = entry_time
 
+    def reset(self):
+        """Remet l'étudiant à « non vu » (nouvelle journée)."""
+        self.entry_time = None
+
     def is_present(self) -> bool:
         return self.entry_time is not None
 
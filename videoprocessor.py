@@ -4,7 +4,10 @@ import cv2
 import datetime
 import numpy as np
 from facerecognizer import FaceRecognizer
+from facetracker import FaceTracker
+from motiongate import MotionGate, SKIP, REGIONS, merge_boxes, overlaps
 from attendancemanager import AttendanceManager
+from pipeline import CapturePipeline
 
 
 class VideoProcessor:
@@ -19,13 +22,35 @@ class VideoProcessor:
        affiche elle-même — VideoProcessor ne crée aucune fenêtre dans ce cas.
     """
 
-    def __init__(self, recognizer: FaceRecognizer, attendance: AttendanceManager):
+    DEFAULT_URL = "http://192.168.1.8:4747/video"  # Adresse donnée par l'app
+
+    def __init__(
+        self,
+        recognizer: FaceRecognizer,
+        attendance: AttendanceManager,
+        tracking: bool = False,
+        detect_every: int = 5,
+        threaded: bool = False,
+        url: str | int = DEFAULT_URL,
+        motion_gate: dict | None = None,
+    ):
         self.recognizer = recognizer
         self.attendance = attendance
-        self.url = "http://192.168.1.8:4747/video"  # Adresse donnée par l'app
+        # Suivi optionnel : détection complète une frame sur `detect_every` seulement
+        self.tracker = FaceTracker(recognizer, detect_every) if tracking else None
+        # Pré-étage optionnel (options de MotionGate, {} = défauts) : pas de
+        # détection sur les frames inchangées, détection limitée aux zones changées
+        self.gate = MotionGate(**motion_gate) if motion_gate is not None else None
+        self._last_detections: list[tuple[str, tuple]] = []
+        self.url = url   # URL du flux, ou index de webcam (0)
         self.cap = cv2.VideoCapture(self.url)
         #self.cap        = cv2.VideoCapture(0)
         self.running    = False
+        # Mode Tkinter : capture / reconnaissance / annotation dans des threads séparés
+        self.threaded = threaded
+        self.pipeline: CapturePipeline | None = None
+        # Registre de mesures (metrics.Metrics) à incruster à côté de l'horloge, ou None
+        self.metrics_overlay = None
 
     # ──────────────────────────────────────────────────────────────────
     # Dessin des annotations sur la frame
@@ -48,20 +73,67 @@ class VideoProcessor:
         Détecte les visages, enregistre les présences et annote la frame.
         Retourne la frame annotée.
         """
-        detections = self.recognizer.identify_faces(frame)
-        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        for name, box in detections:
+        return self._annotate(frame, self._recognize(frame))
+
+    def _recognize(self, frame: np.ndarray, captured_at: float | None = None) -> list[tuple[str, tuple]]:
+        """Identifie les visages de la frame et enregistre les présences."""
+        regions = None
+        if self.gate:
+            mode, boxes = self.gate.check(frame)
+            if mode == SKIP:
+                # Rien n'a bougé : annotations précédentes, présences déjà enregistrées
+                return list(self._last_detections)
+            if mode == REGIONS:
+                # Un visage à cheval sur une zone changée est re-détecté en entier
+                regions = merge_boxes(boxes + [
+                    box for _, box in self._last_detections
+                    if any(overlaps(box, r) for r in boxes)
+                ])
+
+        if self.tracker:
+            detections = self.tracker.update(frame, regions)
+        elif regions is not None:
+            detections = self._recognize_regions(frame, regions)
+        else:
+            detections = self.recognizer.identify_faces(frame)
+        self._last_detections = detections
+        when = datetime.datetime.fromtimestamp(captured_at) if captured_at else datetime.datetime.now()
+        now = when.strftime("%Y-%m-%d %H:%M:%S")
+
+        for name, _ in detections:
             if name != "Inconnu":
                 self.attendance.process_presence(name, now)
+        return detections
+
+    def _recognize_regions(self, frame: np.ndarray, regions: list[tuple]) -> list[tuple[str, tuple]]:
+        """Ré-identifie les visages des zones changées ; les autres sont repris tels quels."""
+        kept = [
+            (name, box) for name, box in self._last_detections
+            if not any(overlaps(box, r) for r in regions)
+        ]
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return kept + self.recognizer.recognize(
+            frame, rgb, self.recognizer.detect_faces_in(rgb, regions)
+        )
+
+    def _annotate(self, frame: np.ndarray, detections: list[tuple[str, tuple]]) -> np.ndarray:
+        """Dessine les visages et l'horloge sur la frame."""
+        for name, box in detections:
             self._draw_label(frame, name, box)
 
         # Overlay horloge
         clock = datetime.datetime.now().strftime("%H:%M:%S")
         cv2.putText(frame, clock, (10, 25),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        if self.metrics_overlay is not None:
+            cv2.putText(frame, self.metrics_overlay.overlay_text(), (125, 24),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
         return frame
 
+    def _read(self) -> tuple[bool, np.ndarray | None]:
+        """Lit la frame suivante du flux."""
+        return self.cap.read()
+
     # ──────────────────────────────────────────────────────────────────
     # Mode autonome (console)
     # ──────────────────────────────────────────────────────────────────
@@ -71,7 +143,7 @@ class VideoProcessor:
         print("🎥 Reconnaissance faciale démarrée. Appuyez sur 'q' pour quitter.")
 
         while self.running:
-            ret, frame = self.cap.read()
+            ret, frame = self._read()
             if not ret:
                 print("❌ Impossible de lire la webcam.")
                 break
@@ -89,11 +161,20 @@ class VideoProcessor:
     def start(self):
         """Active la capture (sans boucle bloquante) pour le mode Tkinter."""
         self.running = True
+        if self.threaded:
+            self.pipeline = CapturePipeline(self)
+            self.pipeline.start()
 
-    def stop(self):
-        """Arrête la capture et libère la webcam."""
+    def stop(self, windows: bool = True):
+        """
+        Arrête la capture et libère la webcam. `windows=False` ne ferme pas les
+        fenêtres OpenCV : sans interface graphique, destroyAllWindows() échoue.
+        """
         self.running = False
-        self._shutdown()
+        if self.pipeline:
+            self.pipeline.stop()
+            self.pipeline = None
+        self._shutdown(windows)
 
     def get_annotated_frame(self) -> np.ndarray | None:
         """
@@ -103,7 +184,15 @@ class VideoProcessor:
         """
         if not self.running or not self.cap.isOpened():
             return None
-        ret, frame = self.cap.read()
+        pipeline = self.pipeline
+        if pipeline:
+            # La reconnaissance peut prendre plus d'une seconde : on attend tant que le flux vit
+            while self.running:
+                frame = pipeline.get(timeout=0.5)
+                if frame is not None or pipeline.output.closed:
+                    return frame
+            return None
+        ret, frame = self._read()
         if not ret:
             return None
         return self._process_frame(frame)
@@ -120,6 +209,17 @@ class VideoProcessor:
         for r in records:
             print(r)
 
-    def _shutdown(self):
+    def pipeline_stats(self) -> dict:
+        """
+        Profondeur des files et pertes par étage (mode threadé uniquement),
+        plus les décisions du pré-étage de mouvement sous "motion" s'il est actif.
+        """
+        stats = self.pipeline.stats() if self.pipeline else {}
+        if self.gate:
+            stats["motion"] = self.gate.stats()
+        return stats
+
+    def _shutdown(self, windows: bool = True):
         self.cap.release()
-        cv2.destroyAllWindows()
+        if windows:
+            cv2.destroyAllWindows()
@@ -0,0 +1,193 @@
+# virtualtable.py
+
+import bisect
+from tkinter import ttk
+
+
+class VirtualTable:
+    """
+    Tableau des présences fenêtré au-dessus d'un ttk.Treeview.
+
+    Seule une fenêtre de `max_rows` lignes autour de la zone visible est
+    matérialisée dans le Treeview. Les pages sont lues à la demande par
+    pagination par clé (DBManager.get_page) quand le défilement approche
+    d'un bord de la fenêtre (à moins de `margin` lignes), et les lignes
+    sorties de la fenêtre de l'autre côté sont supprimées.
+
+    apply() reporte dans le tableau des lignes modifiées sans le
+    reconstruire : mise à jour sur place, ou insertion à sa position si la
+    ligne tombe dans la fenêtre chargée.
+
+    `fetch(after=, before=, limit=, date=)` retourne des dicts
+    prenom / nom / date / etat / tempRetard dans l'ordre d'affichage.
+    """
+
+    TAGS = ("present", "retard", "absent")
+    SEP = "\x1f"    # séparateur des champs de la clé dans l'iid (date, nom, prenom)
+
+    def __init__(
+        self,
+        tree: ttk.Treeview,
+        scrollbar: ttk.Scrollbar,
+        fetch,
+        page_size: int = 100,
+        max_rows: int = 300,
+        margin: int = 20,
+    ):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch = fetch
+        self.page_size = page_size
+        self.max_rows = max(max_rows, 2 * page_size)
+        self.margin = margin
+        self.date: str | None = None
+        # Clés de tri des lignes chargées, dans l'ordre du Treeview
+        self._keys: list[tuple] = []
+        self._has_prev = False     # des lignes plus récentes existent au-dessus de la fenêtre
+        self._at_end = True        # la fenêtre contient la dernière ligne
+        self._loading = False
+        self.tree.configure(yscrollcommand=self._on_yscroll)
+
+    # ------------------------------------------------------------------
+    # Clés
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _sort_key(date: str, nom: str, prenom: str) -> tuple:
+        """Ordre d'affichage : date décroissante, puis nom, prénom."""
+        return (-int(date.replace("-", "")), nom, prenom)
+
+    @classmethod
+    def _iid(cls, date: str, nom: str, prenom: str) -> str:
+        return cls.SEP.join((date, nom, prenom))
+
+    @staticmethod
+    def _page_key(record: dict) -> tuple:
+        return (record["date"], record["nom"], record["prenom"])
+
+    def _row(self, record: dict) -> tuple[tuple, tuple]:
+        etat = record.get("etat") or "—"
+        tag = etat if etat in self.TAGS else "absent"
+        values = (record["prenom"], record["nom"], record["date"],
+                  etat, record.get("tempRetard", 0))
+        return values, (tag,)
+
+    # ------------------------------------------------------------------
+    # Chargement
+    # ------------------------------------------------------------------
+    def reset(self, date: str | None = None):
+        """Vide le tableau et charge la première page (toutes dates ou une seule)."""
+        self.date = date
+        self.tree.delete(*self.tree.get_children())
+        self._keys = []
+        self._has_prev = False
+        records = self.fetch(limit=self.page_size, date=date)
+        self._at_end = len(records) < self.page_size
+        self._insert(records, 0)
+        self.tree.yview_moveto(0)
+
+    def _insert(self, records: list[dict], index: int):
+        keys = []
+        for offset, record in enumerate(records):
+            values, tags = self._row(record)
+            self.tree.insert("", index + offset, iid=self._iid(*self._page_key(record)),
+                             values=values, tags=tags)
+            keys.append(self._sort_key(*self._page_key(record)))
+        self._keys[index:index] = keys
+
+    def _remove(self, start: int, stop: int):
+        children = self.tree.get_children()[start:stop]
+        self.tree.delete(*children)
+        del self._keys[start:stop]
+
+    def _trim_top(self, count: int):
+        """Retire `count` lignes en haut de la fenêtre (relues avec leur page)."""
+        self._remove(0, count)
+        self._has_prev = True
+        # Les lignes supprimées au-dessus décalent la vue : on compense
+        self.tree.yview_scroll(-count, "units")
+
+    def _trim_bottom(self, count: int):
+        """Retire `count` lignes en bas de la fenêtre (relues avec leur page)."""
+        self._remove(len(self._keys) - count, len(self._keys))
+        self._at_end = False
+
+    def _load_next(self):
+        try:
+            if self._at_end or not self._keys:
+                return
+            last = self.tree.get_children()[-1]
+            records = self.fetch(after=tuple(last.split(self.SEP)),
+                                 limit=self.page_size, date=self.date)
+            self._at_end = len(records) < self.page_size
+            self._insert(records, len(self._keys))
+            overflow = len(self._keys) - self.max_rows
+            if overflow > 0:
+                self._trim_top(overflow)
+        finally:
+            self._loading = False
+
+    def _load_prev(self):
+        try:
+            if not self._has_prev or not self._keys:
+                return
+            first = self.tree.get_children()[0]
+            records = self.fetch(before=tuple(first.split(self.SEP)),
+                                 limit=self.page_size, date=self.date)
+            self._has_prev = len(records) == self.page_size
+            self._insert(records, 0)
+            self.tree.yview_scroll(len(records), "units")
+            overflow = len(self._keys) - self.max_rows
+            if overflow > 0:
+                self._trim_bottom(overflow)
+        finally:
+            self._loading = False
+
+    def _on_yscroll(self, first: str, last: str):
+        self.scrollbar.set(first, last)
+        if self._loading or not self._keys:
+            return
+        count = len(self._keys)
+        if not self._at_end and (1.0 - float(last)) * count <= self.margin:
+            self._loading = True
+            self.tree.after_idle(self._load_next)
+        elif self._has_prev and float(first) * count <= self.margin:
+            self._loading = True
+            self.tree.after_idle(self._load_prev)
+
+    # ------------------------------------------------------------------
+    # Différentiel
+    # ------------------------------------------------------------------
+    def apply(self, rows: list[list]):
+        """
+        Reporte des lignes [prenom, nom, date, etat, tempRetard] modifiées.
+        Les lignes hors de la fenêtre chargée (ou hors du filtre de date) sont
+        ignorées : elles seront lues avec leur page. Au-delà de `max_rows`, le
+        bord de la fenêtre le plus éloigné de la zone visible est retiré.
+        """
+        for prenom, nom, date, etat, temp_retard in rows:
+            if self.date is not None and date != self.date:
+                continue
+            record = {"prenom": prenom, "nom": nom, "date": date,
+                      "etat": etat, "tempRetard": temp_retard or 0}
+            iid = self._iid(date, nom, prenom)
+            if self.tree.exists(iid):
+                values, tags = self._row(record)
+                self.tree.item(iid, values=values, tags=tags)
+                continue
+            index = bisect.bisect_left(self._keys, self._sort_key(date, nom, prenom))
+            if index == 0 and self._has_prev:
+                continue
+            if index == len(self._keys) and not self._at_end:
+                continue
+            self._insert([record], index)
+
+        overflow = len(self._keys) - self.max_rows
+        if overflow > 0:
+            first, last = self.tree.yview()
+            if first + last > 1.0:
+                self._trim_top(overflow)      # vue dans la moitié basse
+            else:
+                self._trim_bottom(overflow)
+
+    def __len__(self) -> int:
+        return len(self._keys)
@@ -0,0 +1,78 @@
+# workerpool.py  —  Pool de processus de reconnaissance (service HTTP, traitement par lots)
+#
+# Chaque processus reçoit une copie de la galerie au démarrage et construit
+# son propre FaceRecognizer (options de FaceRecognizer.worker_options()).
+# Les tâches sont des fonctions de ce module appelées avec ce FaceRecognizer :
+#
+#   pool = create_pool(recognizer, 4)
+#   names, faces = pool.submit(on_worker, recognize_item, "photo.jpg").result()
+
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from facerecognizer import FaceRecognizer
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Reconnaissance (dans le pool ou dans le processus courant)
+# ─────────────────────────────────────────────────────────────────────────────
+def recognize_frame(recognizer: FaceRecognizer, frame: np.ndarray) -> tuple[list[str], int]:
+    """Noms reconnus et nombre de visages d'une frame BGR."""
+    detections = recognizer.identify_faces(frame)
+    return [name for name, _ in detections if name != "Inconnu"], len(detections)
+
+
+def recognize_image(recognizer: FaceRecognizer, data: bytes) -> tuple[list[str], int]:
+    """Noms reconnus et nombre de visages d'une image encodée (JPEG, PNG...)."""
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("Image illisible")
+    return recognize_frame(recognizer, frame)
+
+
+def recognize_item(recognizer: FaceRecognizer, item) -> tuple[list[str], int]:
+    """Comme recognize_frame, pour une frame ou un chemin d'image (illisible : aucun visage)."""
+    frame = cv2.imread(item) if isinstance(item, str) else item
+    if frame is None:
+        return [], 0
+    return recognize_frame(recognizer, frame)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Côté processus de travail
+# ─────────────────────────────────────────────────────────────────────────────
+_worker: FaceRecognizer | None = None
+
+
+def _init_worker(encodings: np.ndarray, names: list[str], threshold: float, options: dict):
+    global _worker
+    _worker = FaceRecognizer(None, threshold, **options)
+    _worker.set_gallery(encodings, names)
+
+
+def _ready(_) -> bool:
+    return _worker is not None
+
+
+def on_worker(fn, *args):
+    """Exécute fn(recognizer, *args) avec le FaceRecognizer du processus de travail."""
+    return fn(_worker, *args)
+
+
+def create_pool(recognizer: FaceRecognizer, workers: int) -> ProcessPoolExecutor:
+    """
+    Pool de `workers` processus (contexte spawn) sur une copie de la galerie
+    de `recognizer`. Retourne une fois les modèles chargés dans chacun.
+    """
+    gallery = recognizer.gallery
+    pool = ProcessPoolExecutor(
+        max_workers=workers, mp_context=mp.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(gallery.encodings, list(gallery.names), recognizer.threshold,
+                  recognizer.worker_options()),
+    )
+    list(pool.map(_ready, range(workers)))
+    return pool
@@ -0,0 +1,157 @@
+# writebehind.py
+
+import atexit
+import threading
+import time
+
+
+class WriteBehindQueue:
+    """
+    Persistance différée des enregistrements de présence.
+
+    Les lignes [prenom, nom, date, etat, tempRetard] sont mises en file sans
+    attendre SQLite, puis écrites par un thread dédié en une seule transaction
+    (DBManager.save_many) dès que `max_batch` lignes sont en attente ou que la
+    plus ancienne attend depuis `max_delay` secondes. Deux lignes pour le même
+    (prenom, nom, date) se fusionnent : seule la dernière est écrite.
+    `on_flush(lignes)` est appelé après chaque écriture réussie.
+
+    Après un échec, les lignes sont remises en file et le prochain essai
+    attend RETRY_DELAY secondes, doublées à chaque nouvel échec (au plus
+    MAX_RETRY_DELAY). Au vidage final, CLOSE_RETRIES essais sont faits tout
+    de suite ; les lignes encore refusées sont affichées, jamais perdues en silence.
+    """
+
+    RETRY_DELAY = 0.5
+    MAX_RETRY_DELAY = 30.0
+    CLOSE_RETRIES = 3
+
+    def __init__(self, db, max_batch: int = 100, max_delay: float = 1.0, on_flush=None):
+        self.db = db
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self.on_flush = on_flush
+        self._pending: dict[tuple, list] = {}
+        self._oldest: float | None = None
+        self._cond = threading.Condition()
+        self._writing = False
+        self._closed = False
+        self._failures = 0                 # échecs d'écriture consécutifs
+        self._retry_at = 0.0               # pas de nouvel essai avant (monotonic)
+        self.flushes = 0
+        self.rows_written = 0
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, row: list):
+        """Met une ligne en attente d'écriture (ne bloque pas sur la base)."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WriteBehindQueue fermée")
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending[tuple(row[:3])] = row
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+
+    def flush(self, timeout: float | None = 10.0) -> bool:
+        """
+        Écrit immédiatement les lignes en attente et attend la fin de l'écriture.
+        Retourne False si tout n'a pas pu être écrit dans le délai.
+        """
+        with self._cond:
+            if self._pending:
+                self._oldest = float("-inf")
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._pending and not self._writing, timeout)
+
+    def close(self):
+        """Vidage final puis arrêt du thread d'écriture (idempotent)."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    # ------------------------------------------------------------------
+    # Thread d'écriture
+    # ------------------------------------------------------------------
+    def _due(self) -> bool:
+        if not self._pending:
+            return False
+        if self._closed:
+            return True
+        now = time.monotonic()
+        if now < self._retry_at:
+            return False
+        return len(self._pending) >= self.max_batch or now - self._oldest >= self.max_delay
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._due():
+                    if self._closed:
+                        return
+                    timeout = None
+                    if self._pending:
+                        due = max(self._oldest + self.max_delay, self._retry_at)
+                        timeout = max(0.0, due - time.monotonic())
+                    self._cond.wait(timeout)
+                rows = list(self._pending.values())
+                self._pending = {}
+                self._oldest = None
+                self._writing = True
+
+            try:
+                self.db.save_many(rows)
+            except Exception as e:
+                print(f"⚠️  Échec d'écriture de {len(rows)} présence(s) : {e}")
+                self._requeue(rows)
+                continue
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+            self._failures = 0
+            self._written(rows)
+
+    def _written(self, rows: list[list]):
+        self.flushes += 1
+        self.rows_written += len(rows)
+        if self.on_flush:
+            self.on_flush(rows)
+
+    def _requeue(self, rows: list[list]):
+        """Remet en file les lignes d'une écriture échouée, avec un délai croissant."""
+        with self._cond:
+            if not self._closed:
+                for row in rows:
+                    # Une ligne plus récente arrivée entre-temps reste prioritaire
+                    self._pending.setdefault(tuple(row[:3]), row)
+                if self._oldest is None:
+                    self._oldest = time.monotonic()
+                self._failures += 1
+                delay = min(self.RETRY_DELAY * 2 ** (self._failures - 1), self.MAX_RETRY_DELAY)
+                self._retry_at = time.monotonic() + delay
+                return
+
+        # Vidage final : derniers essais ici, le thread s'arrête ensuite
+        for attempt in range(self.CLOSE_RETRIES):
+            time.sleep(self.RETRY_DELAY * 2 ** attempt)
+            try:
+                self.db.save_many(rows)
+            except Exception as e:
+                print(f"⚠️  Échec d'écriture de {len(rows)} présence(s) ({attempt + 1}/{self.CLOSE_RETRIES}) : {e}")
+                continue
+            self._written(rows)
+            return
+        print(f"❌ {len(rows)} présence(s) non enregistrée(s) :")
+        for prenom, nom, date, etat, temp_retard in rows:
+            print(f"   {prenom} {nom} {date} {etat} ({temp_retard} min)")